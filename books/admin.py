@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from django.urls import path
 from django.shortcuts import redirect
 from books.models import Book
+from books.search import ranked, search_books
+from shared.paginator import EstimatedCountPaginator
+
+
+class BookPaginator(EstimatedCountPaginator):
+    estimate_threshold = settings.BOOKS_ADMIN_ESTIMATED_COUNT_THRESHOLD
 
 
 @admin.register(Book)
@@ -12,9 +20,33 @@ class BookAdmin(admin.ModelAdmin):
         "book_depot_price",
         "updated_at",
     )
-    search_fields = ("title", "isbn", "author")
+    search_fields = ("title", "isbn", "author")  # see get_search_results
     # Make sure 'stock' exists in models.py, otherwise use 'is_in_stock'
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("created_at", "updated_at", "enriched_at")
+
+    # Large catalogs: estimated total instead of COUNT(*), and no second
+    # unfiltered count next to search results unless explicitly enabled
+    paginator = BookPaginator
+    show_full_result_count = settings.BOOKS_ADMIN_SHOW_FULL_RESULT_COUNT
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name == "books_book_changelist":
+            # Changelist only renders list_display; the change form needs every field
+            queryset = queryset.only("id", *self.list_display)
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        # Postgres full-text/trigram search instead of ILIKE '%term%' on each field
+        if not search_term:
+            return queryset, False
+        queryset = search_books(queryset, search_term)
+        # Arama sonuçları alaka sırasına göre; başlığa tıklanınca ?o= yine geçerli.
+        # rank/similarity ancak burada eklendiği için get_ordering'de olamaz
+        if ORDER_VAR not in request.GET:
+            queryset = ranked(queryset)
+        return queryset, False
 
     def get_urls(self):
         urls = super().get_urls()
@@ -29,13 +61,18 @@ class BookAdmin(admin.ModelAdmin):
 
     def add_books_from_depot(self, request):
 
-        from books.tasks import scrape_books
+        from books.tasks import start_catalog_crawl
 
-        # 1. Run the scraper
-        scrape_books.delay(1, 20)  # Adjust parameters as needed
+        # 1. Fan the whole catalog out to the workers (once, however many clicks)
+        result, created = start_catalog_crawl(page_size=20)
 
         # 2. Success message
-        self.message_user(request, "Scraping has started in the background!")
+        if created:
+            self.message_user(request, "Catalog crawl has started in the background!")
+        else:
+            self.message_user(
+                request, f"A catalog crawl is already running (task {result.id})."
+            )
 
         # 3. Redirect back to the table view (Changelist)
         return redirect("admin:books_book_changelist")
@@ -0,0 +1,217 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from playwright.sync_api import sync_playwright
+from playwright_stealth import Stealth
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+class BrowserSlot(threading.Thread):
+    """
+    A headless Chromium with one context and one warm, stealth-patched page.
+
+    Playwright's sync API binds every object to the thread that created it,
+    so each slot owns a thread and jobs are handed to it through a queue.
+    The browser is recycled after ``max_pages`` jobs or when it crashes.
+    ``started`` resolves once Playwright is up (or holds the error that
+    kept it from starting); jobs submitted to a slot whose thread has
+    ended fail at once instead of waiting forever.
+    """
+
+    def __init__(self, index, max_pages):
+        super().__init__(name=f"browser-slot-{index}", daemon=True)
+        self.max_pages = max_pages
+        self.pages_served = 0
+        self._jobs = queue.Queue()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._stopped = False
+        self.started = Future()
+
+    def submit(self, job):
+        future = Future()
+        self._jobs.put((job, future))
+        # Thread bittiyse kuyruktaki iş hiç alınmayacak
+        if self._stopped:
+            self._fail_pending()
+        return future
+
+    def stop(self):
+        self._jobs.put(None)
+
+    def run(self):
+        try:
+            self._playwright = sync_playwright().start()
+        except Exception as exc:
+            logger.exception("%s could not start Playwright.", self.name)
+            self._stopped = True
+            self.started.set_exception(exc)
+            self._fail_pending()
+            return
+        self.started.set_result(None)
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is None:
+                    break
+                job, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    page = self._checkout_page()
+                    result = job(page)
+                except Exception as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+
+                self.pages_served += 1
+                if not self.is_healthy():
+                    logger.warning("%s is unhealthy, relaunching browser.", self.name)
+                    self._close_browser()
+                elif self.pages_served >= self.max_pages:
+                    logger.info(
+                        "%s served %s pages, recycling browser.",
+                        self.name,
+                        self.pages_served,
+                    )
+                    self._close_browser()
+        finally:
+            self._stopped = True
+            self._fail_pending()
+            self._close_browser()
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug("Playwright stop failed on %s: %s", self.name, e)
+
+    def _fail_pending(self):
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError(f"{self.name} has stopped"))
+
+    def is_healthy(self):
+        return (
+            self._browser is not None
+            and self._browser.is_connected()
+            and self._page is not None
+            and not self._page.is_closed()
+        )
+
+    def _checkout_page(self):
+        if self._browser is None or not self._browser.is_connected():
+            self._close_browser()
+            self._launch_browser()
+        if self._page is None or self._page.is_closed():
+            self._page = self._new_page()
+        return self._page
+
+    def _launch_browser(self):
+        self._browser = self._playwright.chromium.launch(headless=True)
+        self._context = self._browser.new_context(
+            user_agent=USER_AGENT,
+            viewport=VIEWPORT,
+        )
+        self.pages_served = 0
+
+    def _new_page(self):
+        page = self._context.new_page()
+        Stealth().apply_stealth_sync(page)
+        return page
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.debug("Browser close failed on %s: %s", self.name, e)
+        self._browser = None
+        self._context = None
+        self._page = None
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of ``BrowserSlot`` threads shared by one worker process.
+
+    ``run(job)`` blocks until a slot is free, calls ``job(page)`` on that
+    slot's thread and returns its result (or re-raises its exception).
+    Creating the pool raises if a slot cannot start within
+    ``start_timeout`` seconds.
+    """
+
+    def __init__(self, size=1, max_pages=50, start_timeout=60):
+        self._slots = [BrowserSlot(i, max_pages) for i in range(size)]
+        self._idle = queue.Queue()
+        for slot in self._slots:
+            slot.start()
+        try:
+            for slot in self._slots:
+                slot.started.result(timeout=start_timeout)
+        except BaseException:
+            self.close()
+            raise
+        for slot in self._slots:
+            self._idle.put(slot)
+
+    def run(self, job):
+        slot = self._idle.get()
+        try:
+            return slot.submit(job).result()
+        finally:
+            self._idle.put(slot)
+
+    def close(self):
+        for slot in self._slots:
+            slot.stop()
+        for slot in self._slots:
+            slot.join(timeout=30)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Return this process's pool, creating it on first use.
+
+    Celery's prefork workers fork after importing tasks, so the pool is
+    created lazily and keyed by pid to stay per-process.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = BrowserPool(
+                size=settings.SCRAPER_BROWSER_POOL_SIZE,
+                max_pages=settings.SCRAPER_BROWSER_MAX_PAGES,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@atexit.register
+def close_browser_pool():
+    global _pool
+
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
+        _pool = None
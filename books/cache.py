@@ -0,0 +1,95 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import Book
+
+VERSION_KEY = "catalog:version"
+LAST_MODIFIED_KEY = "catalog:last_modified"
+
+
+def catalog_version():
+    """
+    Current catalog version. Every cached catalog entry is stored under it,
+    so bumping it invalidates them all at once; old entries just expire.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    # Silinen kitaplar max(updated_at)'i değiştirmiyor; Last-Modified bump zamanı.
+    # Önce zaman yazılıyor ki yeni sürüm eski zamanla görülmesin
+    cache.set(LAST_MODIFIED_KEY, timezone.now(), timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def catalog_last_modified():
+    """
+    When the catalog last changed: the time of the last version bump, or
+    the newest ``updated_at`` until the first bump after a cache flush.
+    """
+    last_modified = cache.get(LAST_MODIFIED_KEY)
+    if last_modified is None:
+        last_modified = Book.objects.aggregate(last=Max("updated_at"))["last"]
+        if last_modified is not None:
+            cache.add(LAST_MODIFIED_KEY, last_modified, timeout=None)
+    return last_modified
+
+
+class CachedCatalogMixin:
+    """
+    Serves GET responses of catalog views from the cache, keyed by the
+    request's absolute URL (the bodies hold absolute ``next``/``previous``
+    links, so each host gets its own entry) under the current
+    ``catalog_version()``. Only 200 responses are cached, and only they
+    carry an ETag and answer ``If-None-Match`` / ``If-Modified-Since``
+    with 304s.
+    """
+
+    def get(self, request, *args, **kwargs):
+        version = catalog_version()
+        last_modified = catalog_last_modified()
+        timestamp = int(last_modified.timestamp()) if last_modified else 0
+        etag = f'"catalog-{version}-{timestamp}"'
+
+        key = "catalog:response:" + hashlib.md5(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        data = cache.get(key, version=version)
+        if data is None:
+            response = super().get(request, *args, **kwargs)
+            # 404 gibi yanıtlar önbelleğe girmiyor, 304 ile de karşılanmıyor
+            if response.status_code != 200:
+                return response
+            cache.set(
+                key,
+                response.data,
+                timeout=settings.CATALOG_CACHE_TIMEOUT,
+                version=version,
+            )
+        else:
+            response = Response(data)
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=timestamp or None
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response["ETag"] = etag
+        if timestamp:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,376 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from playwright.async_api import async_playwright
+from playwright_stealth import Stealth
+
+from .browser import USER_AGENT, VIEWPORT
+from .fetcher import DETAIL_READY, AsyncHybridFetcher
+from .parsing import looks_blocked, parse_detail, parse_listing
+from .throttle import ScrapeThrottle
+from scraper.archive import archive_enabled, store_html
+from scraper.models import ScrapePageResult
+from scraper.utils import PageTimer
+
+logger = logging.getLogger(__name__)
+
+LISTING_URL = "https://bookdepot.ca/Store/Browse?page={page}&size={size}&sort=arrival_1"
+
+
+def listing_url(page_number, page_size=20):
+    return LISTING_URL.format(page=page_number, size=page_size)
+
+
+def parse_page(content, timer, archive=False):
+    """
+    Parses a loaded page inside ``timer``'s parse stage. Returns ``[]``
+    with ``timer.failure`` set when the page has no rows. With ``archive``
+    the page is also archived (see ``scraper.archive``) unless the fetch
+    stage already did; pass it only when ``timer`` will be saved under a
+    run, which is what indexes the archived file.
+    """
+    # Ayrıştırılamayan sayfalar da saklanıyor: parser düzeltilince
+    # yeniden tarama yapmadan reparse edilebilsinler
+    if archive and content and timer.archived is None and archive_enabled():
+        try:
+            timer.archived = store_html(content)
+        except OSError as e:
+            logger.warning("Page %s could not be archived: %s", timer.page_number, e)
+
+    with timer.stage("parse"):
+        try:
+            books = parse_listing(content, backend=settings.SCRAPER_PARSER_BACKEND)
+        except Exception:
+            logger.exception("Page %s could not be parsed.", timer.page_number)
+            books = []
+            timer.failure = ScrapePageResult.Failure.PARSE_ERROR
+
+    # .grid-item var ama satır çıkmadıysa sayfa yapısı değişmiş olabilir
+    if not books and not timer.failure:
+        timer.failure = ScrapePageResult.Failure.PARSE_ERROR
+    timer.books = len(books)
+    return books
+
+
+class BrowserCrawler(ABC):
+    """
+    Runs ``concurrency`` workers that fetch pages through an
+    ``AsyncHybridFetcher``; the browser (``contexts`` contexts, one tab per
+    worker) is launched only once a page has to be loaded in it. Each
+    worker takes items from ``claim()`` until it returns ``None`` and
+    handles them with ``_crawl_one(get_page, item)``.
+    """
+
+    def __init__(self, concurrency, contexts):
+        self.concurrency = concurrency
+        self.contexts = min(contexts, concurrency)
+        self._throttle = ScrapeThrottle()
+        self._fetcher = None
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._browser_lock = None
+
+    @abstractmethod
+    def claim(self):
+        """The next item to crawl, or ``None`` when there is nothing left."""
+
+    @abstractmethod
+    async def _crawl_one(self, get_page, item):
+        """Loads and handles one claimed item."""
+
+    @abstractmethod
+    def summary(self):
+        """What ``crawl()`` returns."""
+
+    async def crawl(self):
+        self._fetcher = AsyncHybridFetcher(self._throttle)
+        self._browser_lock = asyncio.Lock()
+        async with async_playwright() as p:
+            self._playwright = p
+            try:
+                await asyncio.gather(*(self._worker(i) for i in range(self.concurrency)))
+            finally:
+                await self._fetcher.aclose()
+                if self._browser is not None:
+                    await self._browser.close()
+
+        return self.summary()
+
+    async def _context(self, index):
+        async with self._browser_lock:
+            if self._browser is None:
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._contexts = [
+                    await self._browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+                    for _ in range(self.contexts)
+                ]
+        return self._contexts[index % len(self._contexts)]
+
+    async def _new_page(self, context):
+        page = await context.new_page()
+        await Stealth().apply_stealth_async(page)
+        return page
+
+    async def _worker(self, index):
+        page = None
+
+        async def get_page():
+            nonlocal page
+            if page is None or page.is_closed():
+                page = await self._new_page(await self._context(index))
+            return page
+
+        try:
+            while (item := self.claim()) is not None:
+                await self._crawl_one(get_page, item)
+        finally:
+            if page is not None and not page.is_closed():
+                await page.close()
+
+
+class CatalogCrawler(BrowserCrawler):
+    """
+    Crawls a range of Book Depot listing pages with a bounded number of
+    pages in flight (see ``BrowserCrawler``).
+
+    Workers claim page numbers in order and failed pages are claimed again
+    up to ``max_retries`` times. ``end_page=-1`` means "until the first
+    empty page", after which no higher page is claimed. ``on_page(page_number,
+    books)`` is a regular (sync) callable, run off the event loop as soon
+    as each page is parsed, so persistence overlaps with fetching. If it
+    returns a page number, no page above it is claimed. ``archive`` archives
+    the pages; see ``parse_page``.
+
+    A crawl that cannot finish is cut short and reports why in its
+    summary's ``aborted``: after ``max_failed_pages`` pages in a row fail
+    every attempt (blocked), or when an open-ended crawl reaches
+    ``max_pages`` pages without an empty one.
+    """
+
+    def __init__(
+        self,
+        start_page=1,
+        end_page=-1,
+        page_size=20,
+        on_page=None,
+        concurrency=None,
+        contexts=None,
+        max_retries=None,
+        max_failed_pages=None,
+        max_pages=None,
+        archive=False,
+    ):
+        super().__init__(
+            concurrency or settings.SCRAPER_CRAWL_CONCURRENCY,
+            contexts or settings.SCRAPER_CRAWL_CONTEXTS,
+        )
+        self.start_page = start_page
+        self.end_page = end_page
+        self.page_size = page_size
+        self.max_retries = (
+            settings.SCRAPER_PAGE_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.max_failed_pages = max_failed_pages or settings.SCRAPER_MAX_FAILED_PAGES
+        self.max_pages = max_pages or settings.SCRAPER_MAX_PAGES
+        self.archive = archive
+        self._on_page = sync_to_async(on_page) if on_page else None
+
+        self._next_page = start_page
+        self._last_page = None if end_page == -1 else end_page
+        self._retry_pages = []
+        self._attempts = {}
+        self._failed_in_a_row = 0
+
+        self.pages_done = 0
+        self.books_found = 0
+        self.failed_pages = []
+        self.timers = []
+        self.aborted = None
+
+    def claim(self):
+        if self.aborted:
+            return None
+        # Katalog sonu bulunduktan sonra ötesindeki sayfalar tekrar denenmiyor
+        if self._last_page is not None:
+            self._retry_pages = [p for p in self._retry_pages if p <= self._last_page]
+        if self._retry_pages:
+            return self._retry_pages.pop(0)
+
+        page_number = self._next_page
+        if self._last_page is not None and page_number > self._last_page:
+            return None
+        if self._last_page is None and page_number - self.start_page >= self.max_pages:
+            # Boş sayfa hiç gelmiyorsa (hep engel/hata) sonsuza dek sürmesin;
+            # sürmekte olan sayfalardan biri boş çıkarsa tarama yine başarılı
+            return None
+        self._next_page += 1
+        return page_number
+
+    def abort(self, reason):
+        """Stops claiming pages (retries included); in-flight pages finish."""
+        if self.aborted is None:
+            logger.error("Crawl from page %s aborted: %s.", self.start_page, reason)
+            self.aborted = reason
+
+    def stop_after(self, page_number):
+        """Stop claiming pages above ``page_number``; in-flight pages finish."""
+        if self._last_page is None or page_number < self._last_page:
+            self._last_page = page_number
+
+    def summary(self):
+        capped = self._next_page - self.start_page >= self.max_pages
+        if self._last_page is None and capped:
+            self.abort(f"no empty page within {self.max_pages} pages")
+        summary = {
+            "start_page": self.start_page,
+            "last_page": self._last_page,
+            "pages": self.pages_done,
+            "books": self.books_found,
+            "failed_pages": sorted(
+                page_number
+                for page_number in self.failed_pages
+                if self._last_page is None or page_number <= self._last_page
+            ),
+        }
+        if self.aborted:
+            summary["aborted"] = self.aborted
+        return summary
+
+    async def _crawl_one(self, get_page, page_number):
+        url = listing_url(page_number, self.page_size)
+        attempt = self._attempts.get(page_number, 0) + 1
+        timer = PageTimer(page_number, attempt)
+        self.timers.append(timer)
+
+        try:
+            content = await self._fetcher.fetch(get_page, url, timer)
+        except Exception as e:
+            logger.warning("Page %s failed (attempt %s): %s", page_number, attempt, e)
+            self._retry_or_fail(page_number, attempt)
+            return
+
+        books = parse_page(content, timer, archive=self.archive)
+        if timer.failure == ScrapePageResult.Failure.EMPTY:
+            logger.info("Page %s is empty.", page_number)
+            if self.end_page == -1:
+                self.stop_after(page_number - 1)
+            return
+        if not books:
+            logger.warning(
+                "Page %s: no books (%s, attempt %s).", page_number, timer.failure, attempt
+            )
+            self._retry_or_fail(page_number, attempt)
+            return
+
+        self._failed_in_a_row = 0
+        self.pages_done += 1
+        self.books_found += len(books)
+        if self._on_page is not None:
+            with timer.stage("db"):
+                stop_page = await self._on_page(page_number, books)
+            if stop_page is not None:
+                self.stop_after(stop_page)
+
+    def _retry_or_fail(self, page_number, attempt):
+        if self._last_page is not None and page_number > self._last_page:
+            # Katalog bu sayfadan önce bitiyor; hata sayılmıyor
+            return
+        self._attempts[page_number] = attempt
+        if attempt <= self.max_retries:
+            self._retry_pages.append(page_number)
+            return
+        self.failed_pages.append(page_number)
+        self._failed_in_a_row += 1
+        if self._failed_in_a_row >= self.max_failed_pages:
+            self.abort(f"{self._failed_in_a_row} pages in a row failed")
+
+
+class DetailCrawler(BrowserCrawler):
+    """
+    Fetches and parses the detail pages of ``books``, ``(isbn, url)``
+    pairs, ``SCRAPER_ENRICH_CONCURRENCY`` at a time. ``details`` maps each
+    ISBN whose page loaded to ``parse_detail``'s fields; the others end up
+    in ``failed`` and wait until the book is queued again.
+    """
+
+    def __init__(self, books, concurrency=None, contexts=None):
+        super().__init__(
+            concurrency or settings.SCRAPER_ENRICH_CONCURRENCY,
+            contexts or settings.SCRAPER_CRAWL_CONTEXTS,
+        )
+        self._books = list(books)
+        self.requested = len(self._books)
+        self.details = {}
+        self.failed = []
+
+    def claim(self):
+        return self._books.pop() if self._books else None
+
+    def summary(self):
+        return {
+            "books": self.requested,
+            "enriched": len(self.details),
+            "failed": sorted(self.failed),
+        }
+
+    async def _crawl_one(self, get_page, book):
+        isbn, url = book
+        timer = PageTimer(None)
+        try:
+            content = await self._fetcher.fetch(
+                get_page, url, timer, ready_selector=DETAIL_READY
+            )
+        except Exception as e:
+            logger.warning("Detail page of %s failed: %s", isbn, e)
+            self.failed.append(isbn)
+            return
+        if not timer.ready or looks_blocked(content):
+            logger.warning(
+                "Detail page of %s did not load (%s).", isbn, timer.failure or "blocked"
+            )
+            self.failed.append(isbn)
+            return
+
+        try:
+            details = parse_detail(content)
+        except Exception:
+            logger.exception("Detail page of %s could not be parsed.", isbn)
+            self.failed.append(isbn)
+            return
+        # Adres başka bir kitaba yönlendirdiyse yazılmıyor
+        if details["isbn"] not in (None, isbn):
+            logger.warning("Detail page of %s shows %s.", isbn, details["isbn"])
+            self.failed.append(isbn)
+            return
+        self.details[isbn] = details
+
+
+def fetch_details(books, **kwargs):
+    """
+    Synchronous entry point for ``enrich_books``; see ``DetailCrawler``.
+    Returns ``(details, summary)``.
+    """
+    crawler = DetailCrawler(books, **kwargs)
+    summary = asyncio.run(crawler.crawl())
+    return crawler.details, summary
+
+
+def crawl_pages(
+    start_page=1, end_page=-1, page_size=20, on_page=None, timers=None, **kwargs
+):
+    """
+    Synchronous entry point for Celery tasks; see ``CatalogCrawler``. Each
+    page attempt's ``PageTimer`` is appended to ``timers`` if given.
+    """
+    crawler = CatalogCrawler(
+        start_page, end_page, page_size=page_size, on_page=on_page, **kwargs
+    )
+    try:
+        return asyncio.run(crawler.crawl())
+    finally:
+        if timers is not None:
+            timers.extend(crawler.timers)
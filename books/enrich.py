@@ -0,0 +1,99 @@
+"""
+Detail-page enrichment: the listing only has a (truncated) title, so the
+book's own page is fetched for the rest.
+
+``BookWriter`` queues the ISBNs that need it (new books, books never
+enriched, books whose listing title or URL changed) in a Redis set, which
+also deduplicates them, and makes sure an ``enrich_books`` task is
+draining it. The task fetches the pages in batches with
+``crawler.fetch_details`` and writes each batch with ``save_details``, so
+the work follows catalog churn rather than catalog size.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from .cache import bump_catalog_version
+from .models import Book
+from shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "scraper:enrich:pending"
+ENRICHED_FIELDS = ("title", "publisher", "category", "page_count", "description")
+
+
+def request_details(isbns):
+    """Queues ``isbns`` for enrichment and starts ``enrich_books`` if idle."""
+    if not settings.SCRAPER_ENRICH_DETAILS or not isbns:
+        return
+    from .tasks import start_enrichment
+
+    try:
+        get_redis().sadd(PENDING_KEY, *isbns)
+        start_enrichment()
+    except RedisError as e:
+        # Kaçanlar, sayfaları bir sonraki taramada yine görülünce kuyruğa girer
+        logger.warning("Could not queue %s books for enrichment: %s", len(isbns), e)
+
+
+def take_pending(count):
+    """Removes and returns up to ``count`` queued ISBNs."""
+    return [isbn.decode() for isbn in get_redis().spop(PENDING_KEY, count) or []]
+
+
+def pending_count():
+    return get_redis().scard(PENDING_KEY)
+
+
+def record_failures(isbns):
+    """
+    Counts a failed detail page load for ``isbns``; see
+    ``SCRAPER_ENRICH_MAX_FAILURES``.
+    """
+    if isbns:
+        Book.objects.filter(isbn__in=isbns).update(
+            enrich_failures=F("enrich_failures") + 1
+        )
+
+
+def save_details(details):
+    """
+    Writes ``{isbn: parse_detail(...)}`` to the books with one bulk update.
+    Fields the page did not have keep their stored value; every book gets
+    ``enriched_at``, so a page without details is not fetched again until
+    its listing changes. Returns the number of books updated.
+    """
+    if not details:
+        return 0
+
+    now = timezone.now()
+    books = list(
+        Book.objects.filter(isbn__in=details.keys()).only(
+            "id", "isbn", "enrich_failures", *ENRICHED_FIELDS
+        )
+    )
+    for book in books:
+        for name in ENRICHED_FIELDS:
+            value = details[book.isbn].get(name)
+            if value is None:
+                continue
+            max_length = Book._meta.get_field(name).max_length
+            setattr(book, name, value[:max_length] if max_length else value)
+        book.enriched_at = now
+        book.enrich_failures = 0
+        book.updated_at = now
+
+    with transaction.atomic():
+        Book.objects.bulk_update(
+            books,
+            [*ENRICHED_FIELDS, "enriched_at", "enrich_failures", "updated_at"],
+            batch_size=settings.BOOKS_WRITER_BATCH_SIZE,
+        )
+        transaction.on_commit(bump_catalog_version)
+    return len(books)
@@ -0,0 +1,142 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Book
+
+EXPORT_FIELDS = (
+    "isbn",
+    "title",
+    "author",
+    "format",
+    "book_depot_price",
+    "stock",
+    "stock_quantity",
+    "stock_at_least",
+    "book_depot_url",
+    "updated_at",
+)
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_rows(queryset=None):
+    """
+    Yields ``EXPORT_FIELDS`` tuples oldest change first, so the last row's
+    ``updated_at`` is a valid ``since`` watermark for the next export.
+    ``iterator()`` streams them through a server-side cursor.
+    """
+    if queryset is None:
+        queryset = Book.objects.all()
+    return (
+        queryset.order_by("updated_at", "id")
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=settings.BOOKS_EXPORT_CHUNK_SIZE)
+    )
+
+
+class _Echo:
+    """File-like object whose write() returns the data instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+class _ParquetSink:
+    """Write-only stream that hands written bytes back to the generator."""
+
+    closed = False
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def stream_parquet(rows):
+    """One Parquet row group per ``BOOKS_EXPORT_CHUNK_SIZE`` rows; needs pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("isbn", pa.string()),
+            ("title", pa.string()),
+            ("author", pa.string()),
+            ("format", pa.string()),
+            ("book_depot_price", pa.decimal128(10, 2)),
+            ("stock", pa.string()),
+            ("stock_quantity", pa.int64()),
+            ("stock_at_least", pa.bool_()),
+            ("book_depot_url", pa.string()),
+            ("updated_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write_batch(batch):
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema,
+        ))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= settings.BOOKS_EXPORT_CHUNK_SIZE:
+            write_batch(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_batch(batch)
+    writer.close()
+    yield sink.drain()
+
+
+STREAMERS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "parquet": stream_parquet,
+}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
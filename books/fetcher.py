@@ -0,0 +1,478 @@
+"""
+Page loading for the scraper: through a browser tab, or (hybrid mode)
+through a plain HTTP/2 client that reuses a browser-solved session.
+
+Cloudflare's clearance is a cookie tied to the user agent, so once a
+browser tab has loaded a page, its cookies and user agent are stored in
+Redis and every worker fetches pages with ``httpx`` until a challenge shows
+up again. Then the page is loaded in the browser, which solves the
+challenge and refreshes the shared session.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from playwright.async_api import TimeoutError as AsyncPlaywrightTimeoutError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from redis.exceptions import RedisError
+
+from .browser import get_browser_pool
+from .parsing import PRODUCT_SELECTOR, has_element, looks_blocked
+from .throttle import BLOCKED, OK, ScrapeThrottle, failure_outcome
+from scraper.models import ScrapePageResult
+from scraper.utils import PageTimer
+from shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+LISTING_READY = ".grid-item"
+# h1 404 sayfalarında da var; kitabın bloğu yalnızca gerçek detay sayfasında
+DETAIL_READY = PRODUCT_SELECTOR
+SESSION_KEY = "scraper:session:bookdepot"
+CHALLENGE_STATUSES = (403, 429, 503)
+HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def record_load(throttle, timer, content):
+    """Classifies a loaded page on ``timer`` and feeds the throttle."""
+    if timer.ready:
+        throttle.report(OK)
+    elif looks_blocked(content):
+        timer.failure = ScrapePageResult.Failure.BLOCKED
+        throttle.report(BLOCKED)
+    else:
+        # .grid-item yok ama engel de değil: katalogun sonu
+        timer.failure = ScrapePageResult.Failure.EMPTY
+
+
+class ResourcePolicy:
+    """
+    Which subresources a browser tab may skip: resource types
+    (``SCRAPER_BLOCKED_RESOURCE_TYPES``) and hosts, including their
+    subdomains (``SCRAPER_BLOCKED_DOMAINS``). Only the HTML is read, but
+    the Cloudflare challenge's own scripts must still load.
+    """
+
+    def __init__(self, resource_types=None, domains=None):
+        if resource_types is None:
+            resource_types = settings.SCRAPER_BLOCKED_RESOURCE_TYPES
+        if domains is None:
+            domains = settings.SCRAPER_BLOCKED_DOMAINS
+        self.resource_types = set(resource_types)
+        self.domains = tuple(domains)
+
+    def blocks(self, request):
+        if request.resource_type in self.resource_types:
+            return True
+        host = urlsplit(request.url).hostname or ""
+        return any(host == domain or host.endswith("." + domain) for domain in self.domains)
+
+
+def _count_response(timer, response):
+    # Transfer boyutu; Content-Length yoksa (chunked) sayılamıyor
+    length = response.headers.get("content-length")
+    if length and length.isdigit():
+        timer.bytes += int(length)
+
+
+@contextmanager
+def lean_page(page, timer, policy=None):
+    """
+    Blocks what ``policy`` drops and counts requests and bytes on
+    ``timer`` while the block runs.
+    """
+    policy = policy or ResourcePolicy()
+
+    def route(route):
+        if policy.blocks(route.request):
+            timer.blocked_requests += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def on_request(request):
+        timer.requests += 1
+
+    def on_response(response):
+        _count_response(timer, response)
+
+    page.route("**/*", route)
+    page.on("request", on_request)
+    page.on("response", on_response)
+    try:
+        yield
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("response", on_response)
+        if not page.is_closed():
+            page.unroute("**/*", route)
+
+
+@asynccontextmanager
+async def lean_page_async(page, timer, policy=None):
+    """Async twin of ``lean_page``."""
+    policy = policy or ResourcePolicy()
+
+    async def route(route):
+        if policy.blocks(route.request):
+            timer.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def on_request(request):
+        timer.requests += 1
+
+    def on_response(response):
+        _count_response(timer, response)
+
+    await page.route("**/*", route)
+    page.on("request", on_request)
+    page.on("response", on_response)
+    try:
+        yield
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("response", on_response)
+        if not page.is_closed():
+            await page.unroute("**/*", route)
+
+
+def wait_until_ready(page, ready_selector):
+    """
+    Is ``ready_selector`` on the loaded page? Pages are rendered on the
+    server, so a page that has neither the selector nor a challenge after
+    ``domcontentloaded`` (the end of the catalog) is answered at once;
+    only a challenge is given ``SCRAPER_READY_TIMEOUT`` to clear.
+    """
+    if page.query_selector(ready_selector) is not None:
+        return True
+    if not looks_blocked(page.content()):
+        return False
+    try:
+        page.wait_for_selector(
+            ready_selector, timeout=settings.SCRAPER_READY_TIMEOUT * 1000
+        )
+    except PlaywrightTimeoutError:
+        return False
+    return True
+
+
+async def wait_until_ready_async(page, ready_selector):
+    """Async twin of ``wait_until_ready``."""
+    if await page.query_selector(ready_selector) is not None:
+        return True
+    if not looks_blocked(await page.content()):
+        return False
+    try:
+        await page.wait_for_selector(
+            ready_selector, timeout=settings.SCRAPER_READY_TIMEOUT * 1000
+        )
+    except AsyncPlaywrightTimeoutError:
+        return False
+    return True
+
+
+def load_listing_page(page, url, throttle=None, timer=None, ready_selector=LISTING_READY):
+    """
+    Loads a page in a browser tab once the shared ``ScrapeThrottle`` allows
+    it and waits until ``ready_selector`` shows up (Cloudflare solved), see
+    ``wait_until_ready``. Images, fonts, media and analytics are not
+    fetched (``ResourcePolicy``). Stage timings, request and byte counts
+    and the outcome go on ``timer``.
+    """
+    throttle = throttle or ScrapeThrottle()
+    timer = timer or PageTimer(None)
+    with throttle.page(), lean_page(page, timer):
+        try:
+            # Sayfaya git
+            with timer.stage("navigation"):
+                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+
+            # Sabit bekleme yerine: Cloudflare çözülüp sayfa gelene kadar
+            with timer.stage("wait"):
+                timer.ready = wait_until_ready(page, ready_selector)
+            content = page.content()
+        except Exception as e:
+            timer.failure = failure_outcome(e)
+            throttle.report(timer.failure)
+            raise
+    record_load(throttle, timer, content)
+
+    return content
+
+
+async def load_listing_page_async(
+    page, url, throttle=None, timer=None, ready_selector=LISTING_READY
+):
+    """Async twin of ``load_listing_page``."""
+    throttle = throttle or ScrapeThrottle()
+    timer = timer or PageTimer(None)
+    async with throttle.page_async(), lean_page_async(page, timer):
+        try:
+            with timer.stage("navigation"):
+                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            # Sabit bekleme yerine: Cloudflare çözülüp sayfa gelene kadar
+            with timer.stage("wait"):
+                timer.ready = await wait_until_ready_async(page, ready_selector)
+            content = await page.content()
+        except Exception as e:
+            timer.failure = failure_outcome(e)
+            await throttle.report_async(timer.failure)
+            raise
+    await sync_to_async(record_load, thread_sensitive=False)(throttle, timer, content)
+
+    return content
+
+
+def make_session(cookies, user_agent):
+    """Session dict from Playwright's ``context.cookies()`` and the tab's user agent."""
+    return {
+        "id": uuid.uuid4().hex,
+        "user_agent": user_agent,
+        "cookies": [
+            {
+                "name": cookie["name"],
+                "value": cookie["value"],
+                "domain": cookie.get("domain", ""),
+                "path": cookie.get("path", "/"),
+            }
+            for cookie in cookies
+        ],
+    }
+
+
+def load_session():
+    try:
+        raw = get_redis().get(SESSION_KEY)
+    except RedisError as e:
+        logger.warning("Could not read the shared HTTP session: %s", e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+def store_session(session):
+    try:
+        get_redis().set(
+            SESSION_KEY, json.dumps(session), ex=settings.SCRAPER_SESSION_TTL
+        )
+    except RedisError as e:
+        logger.warning("Could not share the HTTP session: %s", e)
+
+
+def drop_session(session):
+    """Forgets ``session`` unless another worker has already replaced it."""
+    current = load_session()
+    if current and current["id"] == session["id"]:
+        try:
+            get_redis().delete(SESSION_KEY)
+        except RedisError as e:
+            logger.warning("Could not drop the HTTP session: %s", e)
+
+
+def client_options(session):
+    return {
+        "http2": True,
+        "headers": {**HEADERS, "User-Agent": session["user_agent"]},
+        "limits": httpx.Limits(
+            max_connections=settings.SCRAPER_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SCRAPER_HTTP_MAX_CONNECTIONS,
+        ),
+        "timeout": settings.SCRAPER_HTTP_TIMEOUT,
+        "follow_redirects": True,
+    }
+
+
+def set_cookies(client, session):
+    client.cookies.clear()
+    for cookie in session["cookies"]:
+        client.cookies.set(
+            cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"]
+        )
+
+
+def is_challenge(response):
+    return response.status_code in CHALLENGE_STATUSES or looks_blocked(response.text)
+
+
+def hybrid_enabled():
+    return settings.SCRAPER_FETCH_MODE == "hybrid"
+
+
+def finish_http_fetch(throttle, session, response, timer, ready_selector):
+    """Returns the page's HTML, or ``None`` if the browser should load it instead."""
+    if is_challenge(response):
+        logger.info("HTTP fetch hit a challenge, falling back to the browser.")
+        # Tarayıcıya düşmeden önce AIMD de geri çekilsin
+        throttle.report(BLOCKED)
+        drop_session(session)
+        return None
+    if response.status_code >= 400:
+        logger.warning("HTTP fetch got %s for %s", response.status_code, response.url)
+        return None
+
+    content = response.text
+    timer.requests += 1
+    timer.bytes += response.num_bytes_downloaded
+    # Sayfa sunucuda render ediliyor; hazır işareti tarayıcıdaki gibi
+    # eleman olarak aranıyor (sınıf adı bir script'te de geçebilir)
+    timer.ready = has_element(content, ready_selector)
+    record_load(throttle, timer, content)
+    return content
+
+
+class HybridFetcher:
+    """
+    Fetches pages with a pooled HTTP/2 client while a browser-solved session
+    is available, and through the worker's ``BrowserPool`` otherwise.
+    One per process; see ``get_fetcher``.
+    """
+
+    def __init__(self, throttle=None):
+        self.throttle = throttle or ScrapeThrottle()
+        self._client = None
+        self._session_id = None
+        self._lock = threading.Lock()
+
+    def fetch(self, url, timer=None, ready_selector=LISTING_READY):
+        timer = timer or PageTimer(None)
+        if hybrid_enabled():
+            content = self._fetch_http(url, timer, ready_selector)
+            if content is not None:
+                return content
+        return self._fetch_browser(url, timer, ready_selector)
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _http_client(self, session):
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**client_options(session))
+            if self._session_id != session["id"]:
+                self._client.headers["User-Agent"] = session["user_agent"]
+                set_cookies(self._client, session)
+                self._session_id = session["id"]
+            return self._client
+
+    def _fetch_http(self, url, timer, ready_selector):
+        session = load_session()
+        if session is None:
+            return None
+        client = self._http_client(session)
+
+        with self.throttle.page():
+            try:
+                with timer.stage("navigation"):
+                    response = client.get(url)
+            except httpx.HTTPError as e:
+                logger.warning("HTTP fetch of %s failed: %s", url, e)
+                return None
+        return finish_http_fetch(
+            self.throttle, session, response, timer, ready_selector
+        )
+
+    def _fetch_browser(self, url, timer, ready_selector):
+        def job(page):
+            content = load_listing_page(page, url, self.throttle, timer, ready_selector)
+            session = None
+            if hybrid_enabled() and timer.ready:
+                session = make_session(
+                    page.context.cookies(), page.evaluate("navigator.userAgent")
+                )
+            return content, session
+
+        content, session = get_browser_pool().run(job)
+        if session is not None:
+            store_session(session)
+        return content
+
+
+class AsyncHybridFetcher:
+    """
+    ``HybridFetcher`` for the crawlers in ``books.crawler``: the browser
+    fallback runs in the tab returned by ``await get_page()``, so a crawler
+    only opens tabs (and launches Chromium) when a page needs one. Create
+    it inside the event loop and ``aclose()`` it before the loop ends.
+    """
+
+    def __init__(self, throttle=None):
+        self.throttle = throttle or ScrapeThrottle()
+        self._client = None
+        self._session_id = None
+
+    async def fetch(self, get_page, url, timer=None, ready_selector=LISTING_READY):
+        timer = timer or PageTimer(None)
+        if hybrid_enabled():
+            content = await self._fetch_http(url, timer, ready_selector)
+            if content is not None:
+                return content
+
+        page = await get_page()
+        content = await load_listing_page_async(
+            page, url, self.throttle, timer, ready_selector
+        )
+        if hybrid_enabled() and timer.ready:
+            session = make_session(
+                await page.context.cookies(),
+                await page.evaluate("navigator.userAgent"),
+            )
+            await sync_to_async(store_session, thread_sensitive=False)(session)
+        return content
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch_http(self, url, timer, ready_selector):
+        # Redis çağrıları event loop'u bloklamasın
+        session = await sync_to_async(load_session, thread_sensitive=False)()
+        if session is None:
+            return None
+        if self._client is None:
+            self._client = httpx.AsyncClient(**client_options(session))
+        if self._session_id != session["id"]:
+            self._client.headers["User-Agent"] = session["user_agent"]
+            set_cookies(self._client, session)
+            self._session_id = session["id"]
+
+        async with self.throttle.page_async():
+            try:
+                with timer.stage("navigation"):
+                    response = await self._client.get(url)
+            except httpx.HTTPError as e:
+                logger.warning("HTTP fetch of %s failed: %s", url, e)
+                return None
+        return await sync_to_async(finish_http_fetch, thread_sensitive=False)(
+            self.throttle, session, response, timer, ready_selector
+        )
+
+
+_fetcher = None
+_fetcher_pid = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """This process's ``HybridFetcher``, keyed by pid like the browser pool."""
+    global _fetcher, _fetcher_pid
+
+    with _fetcher_lock:
+        if _fetcher is None or _fetcher_pid != os.getpid():
+            _fetcher = HybridFetcher()
+            _fetcher_pid = os.getpid()
+        return _fetcher
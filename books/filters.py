@@ -0,0 +1,55 @@
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_price(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: "A valid number is required."})
+
+
+def parse_since(params, name="since"):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ValidationError({name: "An ISO 8601 datetime is required."})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def filter_books(queryset, params):
+    """
+    Applies the catalog filters shared by the API and the exports:
+    ``book_format``, ``author``, ``min_price``, ``max_price``, ``in_stock``
+    and ``since`` (``updated_at`` watermark, inclusive).
+    """
+    if params.get("book_format"):
+        queryset = queryset.filter(format=params["book_format"])
+    if params.get("author"):
+        queryset = queryset.filter(author=params["author"])
+
+    min_price = parse_price(params, "min_price")
+    if min_price is not None:
+        queryset = queryset.filter(book_depot_price__gte=min_price)
+    max_price = parse_price(params, "max_price")
+    if max_price is not None:
+        queryset = queryset.filter(book_depot_price__lte=max_price)
+
+    if str(params.get("in_stock")).lower() in ("1", "true"):
+        queryset = queryset.in_stock()
+
+    since = parse_since(params)
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+
+    return queryset
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+)
+from django.utils import timezone
+
+from .models import Book, BookPriceSnapshot
+
+INTERVALS = ("hour", "day", "week", "month")
+
+
+def bucket_start(moment, interval):
+    """Start of the ``interval`` bucket holding ``moment``, in local time."""
+    local = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if interval != "hour":
+        local = local.replace(hour=0)
+    if interval == "week":
+        local -= timedelta(days=local.weekday())
+    elif interval == "month":
+        local = local.replace(day=1)
+    # Yaz saati geçişinde ofset değişebiliyor; duvar saatinden yeniden kuruluyor
+    return timezone.make_aware(local.replace(tzinfo=None))
+
+
+def next_bucket(start, interval):
+    if interval == "hour":
+        return start + timedelta(hours=1)
+    local = timezone.localtime(start).replace(tzinfo=None)
+    if interval == "day":
+        local += timedelta(days=1)
+    elif interval == "week":
+        local += timedelta(weeks=1)
+    else:
+        month = local.month % 12 + 1
+        local = local.replace(year=local.year + (month == 1), month=month)
+    return timezone.make_aware(local)
+
+
+def price_series(isbn, interval="day", since=None, until=None):
+    """
+    Price history of one ISBN downsampled to ``interval`` buckets ("hour",
+    "day", "week", "month") up to ``until`` (now), as a list of dicts with
+    ``bucket`` and the ``low``, ``high`` and ``average`` price in it.
+
+    Snapshots are only written on change, so the price in effect when a
+    bucket starts carries over into it: buckets without a change repeat
+    the last known price, and with ``since`` the series starts from the
+    latest snapshot before it. Unreadable (empty) prices are skipped.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval: {interval}")
+
+    snapshots = BookPriceSnapshot.objects.filter(
+        book__isbn=isbn, book_depot_price__isnull=False
+    ).order_by("recorded_at", "id")
+    price = None
+    if since is not None:
+        before = snapshots.filter(recorded_at__lt=since).last()
+        price = before.book_depot_price if before else None
+        snapshots = snapshots.filter(recorded_at__gte=since)
+    changes = list(snapshots.values_list("recorded_at", "book_depot_price"))
+    if price is None and not changes:
+        return []
+
+    bucket = bucket_start(since if price is not None else changes[0][0], interval)
+    end = bucket_start(until or timezone.now(), interval)
+    series = []
+    index = 0
+    while bucket <= end:
+        following = next_bucket(bucket, interval)
+        prices = [] if price is None else [price]
+        while index < len(changes) and changes[index][0] < following:
+            price = changes[index][1]
+            prices.append(price)
+            index += 1
+        if prices:
+            series.append(
+                {
+                    "bucket": bucket,
+                    "low": min(prices),
+                    "high": max(prices),
+                    "average": (sum(prices) / len(prices)).quantize(Decimal("0.01")),
+                }
+            )
+        bucket = following
+    return series
+
+
+def biggest_price_drops(since, limit=50):
+    """
+    Books whose current price is lowest compared to the price they had at
+    ``since``, biggest absolute drop first. One query: the price at
+    ``since`` is the latest snapshot recorded at or before it.
+    """
+    price_then = Subquery(
+        BookPriceSnapshot.objects.filter(book=OuterRef("pk"), recorded_at__lte=since)
+        .order_by("-recorded_at")
+        .values("book_depot_price")[:1]
+    )
+    money = DecimalField(max_digits=10, decimal_places=2)
+
+    return (
+        Book.objects.annotate(price_then=price_then)
+        .annotate(
+            price_drop=ExpressionWrapper(
+                F("price_then") - F("book_depot_price"), output_field=money
+            )
+        )
+        .filter(price_drop__gt=0)
+        .order_by("-price_drop")[:limit]
+    )
@@ -0,0 +1,208 @@
+import functools
+import json
+import resource
+import statistics
+import subprocess
+import threading
+import time
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from books.parsing import parse_listing
+from books.writer import BookWriter
+from shared.utils import normalize_prices
+
+
+class Rollback(Exception):
+    pass
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays saved Book Depot listing pages through parse, price cleaning "
+        "and DB upsert, and reports per-stage throughput and latency. The "
+        "upsert is rolled back unless --commit is given; with it the rows are "
+        "saved and the catalog cache version is bumped like any other write. "
+        "Detail pages are never queued for enrichment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory of saved listing pages (*.html)")
+        parser.add_argument(
+            "--serve",
+            action="store_true",
+            help="Fetch pages over HTTP from a local stand-in server instead of reading them from disk",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+        parser.add_argument(
+            "--backend",
+            default=settings.SCRAPER_PARSER_BACKEND,
+            choices=["lxml", "bs4"],
+        )
+        parser.add_argument("--no-db", action="store_true", help="Skip the upsert stage")
+        parser.add_argument(
+            "--commit",
+            action="store_true",
+            help=(
+                "Keep the upserted rows and bump the catalog cache version "
+                "(by default everything is rolled back)"
+            ),
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument(
+            "--compare", help="Print the change against a previous --output JSON file"
+        )
+
+    def handle(self, *args, **options):
+        corpus = Path(options["corpus"])
+        files = sorted(corpus.glob("*.html"))
+        if not files:
+            raise CommandError(f"No *.html pages found in {corpus}")
+
+        server = None
+        if options["serve"]:
+            handler = functools.partial(QuietHandler, directory=str(corpus))
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_port}/"
+
+            def load(path):
+                with urllib.request.urlopen(base_url + path.name) as response:
+                    return response.read().decode("utf-8")
+
+        else:
+
+            def load(path):
+                return path.read_text(encoding="utf-8")
+
+        stages = {"fetch": [], "parse": [], "clean": [], "upsert": []}
+        pages = books = changed = 0
+        started = time.perf_counter()
+
+        try:
+            with transaction.atomic():
+                # Ölçüm, zenginleştirme kuyruğuna iş bırakmasın
+                writer = BookWriter(enrich=False)
+                for _ in range(options["repeat"]):
+                    for path in files:
+                        t0 = time.perf_counter()
+                        html = load(path)
+                        t1 = time.perf_counter()
+                        rows = parse_listing(html, backend=options["backend"])
+                        t2 = time.perf_counter()
+                        normalize_prices([row["book_depot_price"] for row in rows])
+                        t3 = time.perf_counter()
+                        if not options["no_db"]:
+                            writer.extend(rows)
+                            changed += writer.flush()
+                        t4 = time.perf_counter()
+
+                        stages["fetch"].append(t1 - t0)
+                        stages["parse"].append(t2 - t1)
+                        stages["clean"].append(t3 - t2)
+                        if not options["no_db"]:
+                            stages["upsert"].append(t4 - t3)
+                        pages += 1
+                        books += len(rows)
+
+                elapsed = time.perf_counter() - started
+                if not options["commit"]:
+                    raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if server is not None:
+                server.shutdown()
+
+        results = {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "corpus": str(corpus),
+            "source": "http" if options["serve"] else "disk",
+            "backend": options["backend"],
+            "pages": pages,
+            "books": books,
+            "changed": changed,
+            "elapsed": elapsed,
+            "pages_per_sec": pages / elapsed,
+            "books_per_sec": books / elapsed,
+            # Linux reports ru_maxrss in kilobytes
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "stages": {
+                name: {
+                    "total": sum(samples),
+                    "p50_ms": percentile(samples, 50) * 1000,
+                    "p95_ms": percentile(samples, 95) * 1000,
+                }
+                for name, samples in stages.items()
+                if samples
+            },
+        }
+
+        self.stdout.write(
+            f"{pages} pages, {books} books in {elapsed:.2f}s "
+            f"({results['pages_per_sec']:.1f} pages/s, {results['books_per_sec']:.1f} books/s), "
+            f"peak RSS {results['peak_rss_mb']:.1f} MB"
+        )
+        for name, stage in results["stages"].items():
+            self.stdout.write(
+                f"  {name:<7} total {stage['total']:.3f}s  "
+                f"p50 {stage['p50_ms']:.2f}ms  p95 {stage['p95_ms']:.2f}ms"
+            )
+
+        if options["compare"]:
+            self.compare(results, json.loads(Path(options["compare"]).read_text()))
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def compare(self, current, baseline):
+        self.stdout.write(f"Compared with revision {baseline.get('revision')}:")
+
+        def change(new, old):
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        for key in ("pages_per_sec", "books_per_sec", "peak_rss_mb"):
+            self.stdout.write(
+                f"  {key:<14} {baseline[key]:.2f} -> {current[key]:.2f} "
+                f"({change(current[key], baseline[key])})"
+            )
+        for name, stage in current["stages"].items():
+            old = baseline["stages"].get(name)
+            if old:
+                self.stdout.write(
+                    f"  {name + ' p95':<14} {old['p95_ms']:.2f}ms -> {stage['p95_ms']:.2f}ms "
+                    f"({change(stage['p95_ms'], old['p95_ms'])})"
+                )
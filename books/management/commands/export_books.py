@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from books.export import STREAMERS, export_rows, parquet_available
+from books.filters import filter_books
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams the Book table as CSV, NDJSON or Parquet with flat memory use. "
+        "Use --since for incremental exports: pass the watermark printed to "
+        "stderr by the previous run. Parquet needs pyarrow; without it "
+        "--file-format parquet fails with a CommandError."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file-format", default="csv", choices=list(STREAMERS))
+        parser.add_argument("--output", help="File to write (default: stdout)")
+        parser.add_argument("--since", help="Only rows updated at or after this ISO datetime")
+        parser.add_argument("--book-format")
+        parser.add_argument("--author")
+        parser.add_argument("--min-price")
+        parser.add_argument("--max-price")
+        parser.add_argument("--in-stock", action="store_true")
+
+    def handle(self, *args, **options):
+        file_format = options["file_format"]
+        if file_format == "parquet" and not parquet_available():
+            raise CommandError("Parquet export needs pyarrow (pip install pyarrow).")
+        if file_format == "parquet" and not options["output"]:
+            raise CommandError("Parquet export needs --output.")
+
+        watermark = timezone.now()
+        try:
+            queryset = filter_books(Book.objects.all(), options)
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        chunks = STREAMERS[file_format](export_rows(queryset))
+        if options["output"]:
+            mode = "wb" if file_format == "parquet" else "w"
+            with open(options["output"], mode) as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+
+        # stderr'e, veri stdout'a gidiyorsa karışmasın diye
+        self.stderr.write(f"Next --since watermark: {watermark.isoformat()}")
@@ -0,0 +1,323 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from books.cache import bump_catalog_version
+from books.models import Book, BookPriceSnapshot
+from books.writer import book_values
+from shared.utils import normalize_prices, parse_stock
+
+COLUMNS = (
+    "line",
+    "isbn",
+    "title",
+    "listing_title",
+    "author",
+    "format",
+    "book_depot_price",
+    "stock",
+    "stock_quantity",
+    "stock_at_least",
+    "book_depot_url",
+)
+FEED_FIELDS = (
+    "isbn",
+    "title",
+    "author",
+    "format",
+    "book_depot_price",
+    "stock",
+    "book_depot_url",
+)
+MERGE_FIELDS = (
+    "title",
+    "listing_title",
+    "author",
+    "format",
+    "book_depot_price",
+    "stock",
+    "stock_quantity",
+    "stock_at_least",
+)
+# Fiyatlar bu büyüklükte gruplar halinde çözülüyor
+NORMALIZE_CHUNK_SIZE = 5000
+# Atlanan kayıtlardan en fazla bu kadarı satır numarasıyla raporlanıyor
+REPORT_LIMIT = 20
+# Sütununa sığmayınca kısaltılan alanlar; sığmayan stok kaydı geçersiz kılıyor,
+# sığmayan URL boş bırakılıyor
+TRUNCATED_FIELDS = ("title", "author", "format")
+# stock_quantity bir Postgres integer'ı
+MAX_STOCK_QUANTITY = 2**31 - 1
+
+
+def text(value):
+    """Feed value as stripped text; ``None`` for missing or empty values."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def max_length(name):
+    return Book._meta.get_field(name).max_length
+
+
+def feed_row(record):
+    """
+    Maps a feed record to a parsed-listing row, or returns ``(None,
+    reason)`` for a record that cannot be loaded. JSON numbers are
+    accepted as text and over-long titles, authors and formats are
+    cut to their column's length, so one bad record cannot abort the
+    COPY.
+    """
+    if not isinstance(record, dict):
+        return None, "not a JSON object"
+
+    row = {name: text(record.get(name)) for name in FEED_FIELDS}
+    row["isbn"] = (row["isbn"] or "").replace("-", "")
+    if len(row["isbn"]) != 13 or not row["isbn"].isdigit():
+        return None, f"invalid ISBN {row['isbn'][:20]!r}"
+    if row["stock"] and (
+        len(row["stock"]) > max_length("stock")
+        or (parse_stock(row["stock"])[0] or 0) > MAX_STOCK_QUANTITY
+    ):
+        return None, f"invalid stock {row['stock'][:20]!r}"
+
+    row["title"] = row["title"] or "Title not found"
+    for name in TRUNCATED_FIELDS:
+        if row[name]:
+            row[name] = row[name][: max_length(name)]
+    if row["book_depot_url"] and len(row["book_depot_url"]) > max_length(
+        "book_depot_url"
+    ):
+        # Kayıtlı bağlantı korunuyor
+        row["book_depot_url"] = None
+    return row, None
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class CopyStream:
+    """Read-only file object over a generator of text lines, for COPY FROM STDIN."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads a CSV or NDJSON book feed into books_book with Postgres COPY and "
+        "one INSERT ... ON CONFLICT (isbn) DO UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with header) or NDJSON file")
+        parser.add_argument(
+            "--file-format",
+            choices=["csv", "ndjson"],
+            help="Defaults to the file extension",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("import_books needs PostgreSQL (COPY).")
+
+        path = Path(options["path"])
+        file_format = options["file_format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "ndjson"):
+            raise CommandError("Use --file-format csv or ndjson.")
+
+        self.skipped = 0
+        self.problems = []
+        self.price_errors = 0
+        started = time.perf_counter()
+
+        with path.open(newline="", encoding="utf-8") as feed, transaction.atomic():
+            records = (
+                csv.DictReader(feed)
+                if file_format == "csv"
+                else self.read_ndjson(feed)
+            )
+            with connection.cursor() as cursor:
+                staged, inserted, updated = self.load(cursor, records)
+            if inserted or updated:
+                transaction.on_commit(bump_catalog_version)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{inserted} inserted, {updated} updated, "
+                f"{staged - inserted - updated} unchanged, {self.skipped} skipped, "
+                f"{self.price_errors} unreadable prices "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
+        for number, reason in self.problems:
+            self.stderr.write(self.style.WARNING(f"Skipped record {number}: {reason}"))
+        if self.skipped > len(self.problems):
+            self.stderr.write(
+                self.style.WARNING(f"... and {self.skipped - len(self.problems)} more")
+            )
+
+    def read_ndjson(self, feed):
+        """Yields the feed's JSON lines, ``None`` for lines that do not parse."""
+        for line in feed:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+    def skip(self, line, reason):
+        self.skipped += 1
+        if len(self.problems) < REPORT_LIMIT:
+            self.problems.append((line + 1, reason))
+
+    def load(self, cursor, records):
+        book_table = Book._meta.db_table
+        snapshot_table = BookPriceSnapshot._meta.db_table
+
+        cursor.execute(
+            """
+            CREATE TEMP TABLE import_books (
+                line bigint,
+                isbn varchar(13),
+                title varchar(500),
+                listing_title varchar(500),
+                author varchar(255),
+                format varchar(50),
+                book_depot_price numeric(10, 2),
+                stock varchar(10),
+                stock_quantity integer,
+                stock_at_least boolean,
+                book_depot_url varchar(1000)
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(
+            f"COPY import_books ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            CopyStream(self.copy_lines(records)),
+        )
+
+        # Aynı ISBN dosyada birden fazla geçerse son satır geçerli
+        cursor.execute(
+            """
+            CREATE TEMP TABLE import_latest ON COMMIT DROP AS
+            SELECT DISTINCT ON (isbn) * FROM import_books ORDER BY isbn, line DESC
+            """
+        )
+        cursor.execute("SELECT count(*) FROM import_latest")
+        staged = cursor.fetchone()[0]
+
+        # Okunamayan fiyat: bilinen fiyat korunuyor, yeni kitapta boş kalıyor
+        cursor.execute(
+            f"""
+            UPDATE import_latest s SET book_depot_price = b.book_depot_price
+            FROM {book_table} b
+            WHERE b.isbn = s.isbn AND s.book_depot_price IS NULL
+            """
+        )
+
+        # Fiyat/stok geçmişi için: yeni ya da fiyatı/stoğu değişen ISBN'ler
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE import_moved ON COMMIT DROP AS
+            SELECT s.isbn FROM import_latest s
+            LEFT JOIN {book_table} b ON b.isbn = s.isbn
+            WHERE b.id IS NULL
+               OR b.book_depot_price IS DISTINCT FROM s.book_depot_price
+               OR b.stock IS DISTINCT FROM s.stock
+            """
+        )
+
+        # Zenginleştirilmiş kitap detay sayfasındaki tam başlığını koruyor;
+        # başlık değişikliği listing_title üzerinden görülüyor
+        compared = [name for name in MERGE_FIELDS if name != "title"]
+        fields = ", ".join(MERGE_FIELDS)
+        updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in compared)
+        current = ", ".join(f"{book_table}.{name}" for name in compared)
+        incoming = ", ".join(f"EXCLUDED.{name}" for name in compared)
+        cursor.execute(
+            f"""
+            WITH merged AS (
+                INSERT INTO {book_table}
+                    (created_at, updated_at, enrich_failures, isbn, {fields}, book_depot_url)
+                SELECT now(), now(), 0, isbn, {fields}, book_depot_url FROM import_latest
+                ON CONFLICT (isbn) DO UPDATE SET
+                    {updates},
+                    title = CASE WHEN {book_table}.enriched_at IS NULL
+                        THEN EXCLUDED.title ELSE {book_table}.title END,
+                    book_depot_url = COALESCE(
+                        EXCLUDED.book_depot_url, {book_table}.book_depot_url
+                    ),
+                    updated_at = EXCLUDED.updated_at
+                WHERE ({current}) IS DISTINCT FROM ({incoming})
+                   OR (EXCLUDED.book_depot_url IS NOT NULL
+                       AND EXCLUDED.book_depot_url IS DISTINCT FROM {book_table}.book_depot_url)
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+            FROM merged
+            """
+        )
+        inserted, updated = cursor.fetchone()
+
+        cursor.execute(
+            f"""
+            INSERT INTO {snapshot_table} (book_id, recorded_at, book_depot_price, stock)
+            SELECT b.id, now(), b.book_depot_price, b.stock
+            FROM {book_table} b JOIN import_moved m ON m.isbn = b.isbn
+            """
+        )
+
+        return staged, inserted, updated
+
+    def copy_lines(self, records):
+        """Normalizes feed records exactly like scraped rows and renders CSV lines."""
+        writer = csv.writer(_Echo())
+        numbered = enumerate(records)
+        while chunk := list(islice(numbered, NORMALIZE_CHUNK_SIZE)):
+            rows = []
+            for line, record in chunk:
+                row, reason = feed_row(record)
+                if row is None:
+                    self.skip(line, reason)
+                    continue
+                rows.append((line, row))
+
+            prices, errors = normalize_prices(
+                [row["book_depot_price"] for _, row in rows]
+            )
+            self.price_errors += sum(errors)
+            for (line, row), price in zip(rows, prices):
+                values = book_values(row, price)
+                yield writer.writerow(
+                    [
+                        line,
+                        row["isbn"],
+                        *(values[name] for name in MERGE_FIELDS),
+                        row["book_depot_url"],
+                    ]
+                )
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scraper.utils import prune_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes archived listing pages older than the retention period and "
+        "every archive file no scrape run references any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SCRAPER_ARCHIVE_RETENTION_DAYS,
+            help="Keep pages fetched within this many days; 0 keeps every page "
+            "(default: SCRAPER_ARCHIVE_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=settings.SCRAPER_ARCHIVE_PRUNE_GRACE,
+            help="Keep unreferenced files written within this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SCRAPER_ARCHIVE_DIR:
+            raise CommandError("SCRAPER_ARCHIVE_DIR is not set.")
+        if options["days"] < 0 or options["grace"] < 0:
+            raise CommandError("--days and --grace cannot be negative.")
+
+        rows, files, size = prune_archive(options["days"], options["grace"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {rows} archived pages and {files} files "
+                f"({size / 2**20:.1f} MiB)."
+            )
+        )
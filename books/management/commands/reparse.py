@@ -0,0 +1,157 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from books.writer import BookWriter
+from scraper.archive import archive_path, parse_archived
+from scraper.models import ArchivedPage, ScrapeRun
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a crawl run's archived listing pages through the current "
+        "parser and upserts the books, without fetching anything. Without "
+        "--run the latest catalog run with archived pages is replayed; "
+        "hourly incremental runs only cover the first few pages. Books saved "
+        "after their page was fetched are left alone, and replayed books are "
+        "not queued for their detail pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run",
+            type=int,
+            help=(
+                "Scrape run to replay (default: the latest catalog run with "
+                "archived pages)"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes parsing pages in parallel",
+        )
+        parser.add_argument(
+            "--backend",
+            default=settings.SCRAPER_PARSER_BACKEND,
+            choices=["lxml", "bs4"],
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Parse and upsert, then roll everything back",
+        )
+
+    def handle(self, *args, **options):
+        root = settings.SCRAPER_ARCHIVE_DIR
+        if not root:
+            raise CommandError("SCRAPER_ARCHIVE_DIR is not set.")
+
+        run = self.get_run(options["run"])
+        # Aynı sayfa birkaç kez denendiyse en son alınan kopya geçerli; sıra
+        # alınma sırası, böylece sonra görülen ISBN öncekini eziyor
+        latest = {}
+        for page_number, sha256, fetched_at in (
+            ArchivedPage.objects.filter(run=run)
+            .order_by("fetched_at", "attempt")
+            .values_list("page_number", "sha256", "fetched_at")
+        ):
+            latest.pop(page_number, None)
+            latest[page_number] = (sha256, fetched_at)
+        pages = list(latest.values())
+
+        missing = {
+            sha256 for sha256, _ in pages if not archive_path(sha256, root).exists()
+        }
+        if missing:
+            self.stderr.write(
+                f"{len(missing)} archived pages are missing from {root}; skipping them."
+            )
+        digests = list(dict.fromkeys(s for s, _ in pages if s not in missing))
+
+        started = time.perf_counter()
+        rows_by_digest = self.parse(digests, root, options["backend"], options["workers"])
+        parsed = time.perf_counter()
+
+        books = empty = 0
+        # ISBN başına en son alınan sayfadaki satır, alındığı zamanla
+        replayed = {}
+        for sha256, fetched_at in pages:
+            rows = rows_by_digest.get(sha256)
+            if rows is None:
+                continue
+            if not rows:
+                empty += 1
+            books += len(rows)
+            for row in rows:
+                replayed.pop(row["isbn"], None)
+                replayed[row["isbn"]] = (row, fetched_at)
+
+        writer = BookWriter(enrich=False)
+        try:
+            with transaction.atomic():
+                for row, fetched_at in replayed.values():
+                    writer.add(row, as_of=fetched_at)
+                writer.flush()
+                if options["dry_run"]:
+                    raise Rollback
+        except Rollback:
+            pass
+        finished = time.perf_counter()
+
+        self.stdout.write(
+            f"{run}: {len(pages)} pages ({len(digests)} distinct, {empty} without books), "
+            f"{books} books; parsed in {parsed - started:.2f}s, "
+            f"written in {finished - parsed:.2f}s"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would have inserted' if options['dry_run'] else 'Inserted'} "
+                f"{writer.inserted}, updated {writer.updated}, "
+                f"unchanged {writer.unchanged}, newer in the database {writer.stale}, "
+                f"unreadable prices {writer.price_errors}"
+            )
+        )
+
+    def get_run(self, run_id):
+        if run_id is not None:
+            run = ScrapeRun.objects.filter(pk=run_id).first()
+            if run is None:
+                raise CommandError(f"Scrape run {run_id} does not exist.")
+            return run
+        run = (
+            ScrapeRun.objects.filter(
+                kind=ScrapeRun.Kind.CATALOG, archived_pages__isnull=False
+            )
+            .distinct()
+            .order_by("-started_at")
+            .first()
+        )
+        if run is None:
+            raise CommandError("No catalog run has archived pages; pass --run.")
+        return run
+
+    def parse(self, digests, root, backend, workers):
+        """``{sha256: rows}`` for each archived page, parsed ``workers`` at a time."""
+        if workers <= 1 or len(digests) <= 1:
+            return {
+                digest: parse_archived(digest, root, backend) for digest in digests
+            }
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                parse_archived,
+                digests,
+                [root] * len(digests),
+                [backend] * len(digests),
+                chunksize=max(1, len(digests) // (workers * 4)),
+            )
+            return dict(zip(digests, results))
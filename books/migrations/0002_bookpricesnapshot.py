@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:58
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookPriceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('book_depot_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('stock', models.CharField(blank=True, max_length=10, null=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_snapshots', to='books.book')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['recorded_at'], name='books_bookp_recorde_58134e_brin'), models.Index(fields=['book', '-recorded_at'], name='books_bookp_book_id_69999a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+def parse_existing_stock(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+
+    batch = []
+    for book in Book.objects.exclude(stock=None).only("id", "stock").iterator(
+        chunk_size=2000
+    ):
+        stock = book.stock.strip()
+        digits = stock.strip("+")
+        if not digits.isdigit():
+            continue
+        book.stock_quantity = int(digits)
+        book.stock_at_least = "+" in stock
+        batch.append(book)
+
+        if len(batch) >= 2000:
+            Book.objects.bulk_update(batch, ["stock_quantity", "stock_at_least"])
+            batch = []
+
+    Book.objects.bulk_update(batch, ["stock_quantity", "stock_at_least"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_bookpricesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='stock_at_least',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='stock_quantity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(parse_existing_stock, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['stock_quantity'], name='books_book_stock_q_728615_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['book_depot_price'], name='books_book_in_stock_price_idx'),
+        ),
+    ]
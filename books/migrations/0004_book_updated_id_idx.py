@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_book_stock_quantity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-updated_at', '-id'], name='books_book_updated_id_idx'),
+        ),
+    ]
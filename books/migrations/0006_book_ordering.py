@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_book_search'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='book',
+            options={'ordering': ['-updated_at', '-id']},
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+def copy_listing_titles(apps, schema_editor):
+    # Zenginleştirilmemiş kitabın başlığı listedeki başlık; zenginleştirilmişler
+    # boş kalıyor ve bir sonraki taramada bir kez daha detay sayfasına gidiyor
+    Book = apps.get_model("books", "Book")
+    Book.objects.filter(enriched_at=None).update(listing_title=models.F("title"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_book_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='listing_title',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.RunPython(copy_listing_titles, migrations.RunPython.noop),
+    ]
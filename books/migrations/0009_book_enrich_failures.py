@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_book_listing_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='enrich_failures',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
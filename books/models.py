@@ -1,10 +1,40 @@
-from django.db import models
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.utils import timezone
 
 from shared.models import TimestampedModel
 
 
+class BookQuerySet(models.QuerySet):
+    def in_stock(self, min_quantity=1):
+        return self.filter(stock_quantity__gte=min_quantity)
+
+    # Toplu update()/delete() books.signals'taki alıcıları atlayabiliyor;
+    # önbellekteki katalog sürümü burada da yenilenmeli
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            self._bump_catalog_version()
+        return rows
+
+    def delete(self):
+        deleted, per_model = super().delete()
+        if deleted:
+            self._bump_catalog_version()
+        return deleted, per_model
+
+    def _bump_catalog_version(self):
+        from .cache import bump_catalog_version
+
+        transaction.on_commit(bump_catalog_version, using=self.db)
+
+
 class Book(TimestampedModel):
     title = models.CharField(max_length=500)
+    # The title as the listing last showed it (often cut short); once the
+    # book is enriched, ``title`` is the detail page's full one
+    listing_title = models.CharField(max_length=500, blank=True, null=True)
     author = models.CharField(max_length=255, blank=True, null=True)
     isbn = models.CharField(max_length=13, unique=True, verbose_name="ISBN-13")
     format = models.CharField(max_length=50, blank=True, null=True)
@@ -17,12 +47,83 @@ class Book(TimestampedModel):
     # Links and Availability
     book_depot_url = models.URLField(max_length=1000, blank=True, null=True)
     stock = models.CharField(max_length=10, blank=True, null=True)  # e.g., "+10000"
+    # Parsed from `stock` at ingest: "12+" -> 12, at least
+    stock_quantity = models.PositiveIntegerField(blank=True, null=True)
+    stock_at_least = models.BooleanField(default=False)
+
+    # From the book's detail page; see books.enrich
+    publisher = models.CharField(max_length=255, blank=True, null=True)
+    category = models.CharField(max_length=255, blank=True, null=True)
+    page_count = models.PositiveIntegerField(blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    enriched_at = models.DateTimeField(blank=True, null=True)
+    # Detail page loads that failed since the last success; the writer stops
+    # queueing a never-enriched book at SCRAPER_ENRICH_MAX_FAILURES
+    enrich_failures = models.PositiveSmallIntegerField(default=0)
+
+    # Maintained by Postgres; see books.search
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", "author", config="simple"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = BookQuerySet.as_manager()
 
     class Meta:
-        ordering = ["-updated_at"]
+        # Matches books_book_updated_id_idx, and deterministic for pagination
+        ordering = ["-updated_at", "-id"]
         indexes = [
             models.Index(fields=["isbn"]),
+            # Default ordering, the admin changelist and the API's keyset pagination
+            models.Index(fields=["-updated_at", "-id"], name="books_book_updated_id_idx"),
+            models.Index(fields=["stock_quantity"]),
+            # In-stock listings filtered or sorted by price
+            models.Index(
+                fields=["book_depot_price"],
+                condition=models.Q(stock_quantity__gt=0),
+                name="books_book_in_stock_price_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="books_book_search_idx"),
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="books_book_title_trgm_idx",
+            ),
+            GinIndex(
+                fields=["author"],
+                opclasses=["gin_trgm_ops"],
+                name="books_book_author_trgm_idx",
+            ),
         ]
 
     def __str__(self):
         return f"{self.title} ({self.isbn})"
+
+
+class BookPriceSnapshot(models.Model):
+    """
+    Price and stock of a book from the moment they changed. Rows are only
+    written when either value differs from the stored book, so a book
+    whose price never moves has a single snapshot.
+    """
+
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="price_snapshots"
+    )
+    recorded_at = models.DateTimeField(default=timezone.now)
+    book_depot_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    stock = models.CharField(max_length=10, blank=True, null=True)
+
+    class Meta:
+        ordering = ["-recorded_at"]
+        indexes = [
+            # Append-only and written in time order: BRIN stays tiny
+            BrinIndex(fields=["recorded_at"]),
+            models.Index(fields=["book", "-recorded_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} @ {self.recorded_at:%Y-%m-%d %H:%M}: {self.book_depot_price}"
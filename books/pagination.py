@@ -0,0 +1,83 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination on ``(-updated_at, -id)``.
+
+    The cursor holds the last row's ``updated_at`` and ``id``, so every
+    page is an index range scan on ``books_book_updated_id_idx`` no matter
+    how deep it is, unlike ``OFFSET``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by("-updated_at", "-id")
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            updated_at, pk = self.decode_cursor(cursor)
+            # İlk koşul index'te aralık taraması sağlıyor, ikincisi eşitlikleri ayırıyor
+            queryset = queryset.filter(updated_at__lte=updated_at).filter(
+                Q(updated_at__lt=updated_at) | Q(id__lt=pk)
+            )
+
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(last.updated_at, last.pk),
+        )
+
+    def encode_cursor(self, updated_at, pk):
+        raw = f"{updated_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            updated_at, pk = raw.split("|")
+            return datetime.fromisoformat(updated_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,403 @@
+import re
+from functools import lru_cache
+from typing import TypedDict
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
+
+ISBN_RE = re.compile(r"ISBN:\s*(\d{13})")
+QTY_RE = re.compile(r"Qty:\s*(\+?\d+\+?)")
+PAGE_LINK_RE = re.compile(r"[?&]page=(\d+)")
+# Detay sayfasındaki "Publisher: ..." gibi etiketli satırlar
+DETAIL_LABELS = r"(Publisher|Category|Pages)\s*:"
+DETAIL_LABEL_RE = re.compile(rf"^{DETAIL_LABELS}\s*(.+)$", re.IGNORECASE)
+ANY_DETAIL_LABEL_RE = re.compile(DETAIL_LABELS, re.IGNORECASE)
+
+SITE_URL = "https://bookdepot.ca"
+# Detay sayfasında kitabın kendi bloğu (schema.org Product); 404 ve hata
+# sayfalarında yok
+PRODUCT_SELECTOR = "[itemtype*='schema.org/Product']"
+
+GRID_ITEMS = etree.XPath(
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' grid-item ')]"
+)
+PAGE_LINKS = etree.XPath("//a[contains(@href, 'page=')]/@href")
+
+DEFAULT_BACKEND = "lxml"
+
+# Cloudflare'in challenge/engel sayfalarında geçen işaretler
+BLOCK_MARKERS = ("challenge-platform", "cf-chl", "Just a moment...", "Attention Required!")
+
+
+class BookRow(TypedDict):
+    title: str
+    author: str
+    format: str
+    book_depot_price: str  # ham metin, örn. "$4.99"; temizliği writer yapar
+    isbn: str
+    stock: str  # ham metin, örn. "12+" ya da "+10000"
+    book_depot_url: str | None  # ürün (detay) sayfası
+
+
+def parse_listing(html, backend=DEFAULT_BACKEND):
+    """
+    Book Depot liste sayfasının HTML'inden kitap satırlarını çıkarır.
+
+    ``.grid-item`` bulunamazsa (sayfa yapısı değişmiş ya da Cloudflare
+    engeli) boş liste döner. ISBN'i olmayan kitaplar atlanır. ``backend``
+    ``"lxml"`` (hızlı) ya da ``"bs4"`` (referans) olabilir; ikisi aynı
+    satırları üretir.
+    """
+    if backend == "bs4":
+        return parse_listing_bs4(html)
+    if backend == "lxml":
+        return parse_listing_lxml(html)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+
+def parse_listing_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    rows = []
+    for book in soup.select(".grid-item"):
+        row = parse_book_bs4(book)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def parse_listing_lxml(html):
+    if not html or not html.strip():
+        return []
+    root = lxml_html.fromstring(html)
+
+    rows = []
+    for book in GRID_ITEMS(root):
+        row = parse_book_lxml(book)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def parse_page_count(html):
+    """
+    Sayfalama linklerindeki en büyük ``page=`` değerini döner; sayfalama
+    bulunamazsa ``None``.
+    """
+    if not html or not html.strip():
+        return None
+
+    pages = [
+        int(match.group(1))
+        for href in PAGE_LINKS(lxml_html.fromstring(html))
+        if (match := PAGE_LINK_RE.search(href))
+    ]
+    return max(pages) if pages else None
+
+
+def parse_detail(html):
+    """
+    Kitabın detay sayfasından listede olmayan alanları çıkarır: kısaltılmamış
+    ``title``, ``publisher``, ``category``, ``page_count``, ``description``
+    ve ``isbn``. Hepsi kitabın kendi bloğundan (``PRODUCT_SELECTOR``) okunur;
+    "benzer kitaplar" gibi bölümlerdeki ISBN ve açıklamalar karışmasın diye
+    blok dışına bakılmaz. Bulunamayan alanlar ``None``.
+    """
+    details = dict.fromkeys(
+        ("isbn", "title", "publisher", "category", "page_count", "description")
+    )
+    if not html or not html.strip():
+        return details
+    product = next(iter(_css(PRODUCT_SELECTOR)(lxml_html.fromstring(html))), None)
+    if product is None:
+        return details
+
+    heading = next(product.iter("h1"), None)
+    if heading is not None:
+        details["title"] = _text(heading) or None
+
+    isbn_match = ISBN_RE.search(product.text_content())
+    if isbn_match:
+        details["isbn"] = isbn_match.group(1)
+
+    for el in product.iter("li", "p", "span", "div", "tr", "td", "dd"):
+        match = DETAIL_LABEL_RE.match(" ".join(el.text_content().split()))
+        # Birden çok etiketi saran kapsayıcılar atlanıyor; tek satırlık
+        # elemanlara sıra gelecek
+        if not match or ANY_DETAIL_LABEL_RE.search(match.group(2)):
+            continue
+        label, value = match.group(1).lower(), match.group(2)
+        if label == "pages":
+            label, value = "page_count", value.split()[0]
+            value = int(value) if value.isdigit() else None
+        if details[label] is None:
+            details[label] = value
+
+    description = product.xpath(".//*[@itemprop='description' or @id='description']")
+    if description:
+        text = description[0].text_content()
+        details["description"] = " ".join(text.split()) or None
+    return details
+
+
+def looks_blocked(html):
+    """Sayfa bir Cloudflare challenge/engel sayfası mı?"""
+    return bool(html) and any(marker in html for marker in BLOCK_MARKERS)
+
+
+def has_element(html, selector):
+    """HTML'de CSS ``selector``'a uyan bir eleman var mı?"""
+    if not html or not html.strip():
+        return False
+    try:
+        root = lxml_html.fromstring(html)
+    except etree.ParserError:
+        return False
+    return bool(_css(selector)(root))
+
+
+@lru_cache(maxsize=32)
+def _css(selector):
+    return CSSSelector(selector)
+
+
+def _text(el):
+    # BeautifulSoup'taki get_text(strip=True) ile aynı: her metin parçası
+    # ayrı ayrı kırpılıp birleştiriliyor
+    return "".join(part.strip() for part in el.itertext())
+
+
+def _classes(el):
+    return el.get("class", "").split()
+
+
+def _has_ancestor(el, test):
+    parent = el.getparent()
+    while parent is not None:
+        if test(parent):
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def _in_caption(el):
+    return _has_ancestor(el, lambda p: "caption" in _classes(p))
+
+
+def _in_dropdown_in_caption(el):
+    parent = el.getparent()
+    while parent is not None:
+        if "dropdown" in _classes(parent):
+            return _in_caption(parent)
+        parent = parent.getparent()
+    return False
+
+
+def parse_book_lxml(book):
+    """
+    ``parse_book_bs4`` ile aynı kurallar, ama kitabın ağacı tek seferde
+    dolaşılıyor; lambda'lı ``find`` taramaları yok.
+    """
+    h2_title = first_title = author_tag = format_tag = None
+    price_strong = quantity_tag = isbn_tag = None
+
+    for el in book.iterdescendants():
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue  # yorum satırları
+
+        if tag == "a":
+            href = el.get("href", "")
+            if "truncate" in _classes(el):
+                if h2_title is None and _has_ancestor(el, lambda p: p.tag == "h2"):
+                    h2_title = el
+                if first_title is None and _text(el):
+                    first_title = el
+            if author_tag is None and "Na=" in href:
+                author_tag = el
+            if format_tag is None and "Nb=" in href:
+                format_tag = el
+        elif tag == "strong":
+            if price_strong is None and _in_caption(el):
+                price_strong = el
+        # .small a ya da strong da olabilir (bs4'teki ".caption .dropdown .small")
+        if quantity_tag is None and "small" in _classes(el):
+            if _in_dropdown_in_caption(el):
+                quantity_tag = el
+        # bs4 gibi: "ISBN:" içeren ilk span/div/p, yalnızca onun metninde aranıyor
+        if isbn_tag is None and tag in ("span", "div", "p"):
+            if "ISBN:" in el.text_content():
+                isbn_tag = el
+
+    # ISBN yoksa kaydetme (Unique constraint hatasını önler)
+    isbn_match = ISBN_RE.search(isbn_tag.text_content()) if isbn_tag is not None else None
+    if not isbn_match:
+        return None
+
+    title_tag = h2_title if h2_title is not None else first_title
+
+    quantity = "0"
+    if quantity_tag is not None:
+        qty_match = QTY_RE.search(_text(quantity_tag))
+        if qty_match:
+            quantity = qty_match.group(1)
+
+    return {
+        "title": _text(title_tag) if title_tag is not None else "Title not found",
+        "author": _text(author_tag) if author_tag is not None else "Author not found",
+        "format": _text(format_tag) if format_tag is not None else "Format not found",
+        "book_depot_price": _price_text_lxml(book, price_strong),
+        "isbn": isbn_match.group(1),
+        "stock": quantity,
+        "book_depot_url": _product_url(title_tag),
+    }
+
+
+def _product_url(title_tag):
+    href = title_tag.get("href") if title_tag is not None else None
+    return urljoin(SITE_URL, href) if href else None
+
+
+def _price_text_lxml(book, price_strong):
+    if price_strong is not None:
+        # İndirimli ürün: üzeri çizili span'dan sonraki span asıl fiyat
+        for span in price_strong.iterdescendants("span"):
+            if "line-through" in span.get("style", ""):
+                for sibling in span.itersiblings("span"):
+                    return _text(sibling)
+                break
+        return _text(price_strong)
+
+    # Yedek mantık: içinde "$" geçen ilk span, üzeri çiziliyse ondan sonraki
+    final_price_element = None
+    for el in book.iterdescendants("span"):
+        if "$" not in el.text_content():
+            continue
+        if "line-through" in el.get("style", ""):
+            next_el = next(el.itersiblings(etree.Element), None)
+            if next_el is None:
+                next_el = next(el.iterdescendants("span"), None)
+                if next_el is None:
+                    following = el.xpath("following::span[1]")
+                    next_el = following[0] if following else None
+            final_price_element = next_el
+            break
+        if final_price_element is None:
+            final_price_element = el
+
+    if final_price_element is None:
+        return "Price not found"
+    return _text(final_price_element)
+
+
+def parse_book_bs4(book):
+    """Referans backend: tek bir ``.grid-item`` Tag'inden satır çıkarır."""
+    # 1. Başlık
+    # İlk a.truncate etiketi bazen boş geliyor, bu yüzden h2 içindekini veya dolu olanı arıyoruz
+    title_tag = book.select_one("h2 a.truncate")
+    if not title_tag:
+         # h2 içinde bulamazsa, metni olan ilk a.truncate'i bul
+         for t in book.select("a.truncate"):
+             if t.get_text(strip=True):
+                 title_tag = t
+                 break
+
+    title = (
+        title_tag.get_text(strip=True) if title_tag else "Title not found"
+    )
+
+    # 2. Yazar
+    author_tag = book.select_one('a[href*="Na="]')
+    author = (
+        author_tag.get_text(strip=True)
+        if author_tag
+        else "Author not found"
+    )
+
+    # 3. Format
+    format_tag = book.select_one('a[href*="Nb="]')
+    book_format = (
+        format_tag.get_text(strip=True)
+        if format_tag
+        else "Format not found"
+    )
+
+    # 4. Fiyat Mantığı
+    # Fiyat yoksa 0.00 değil: writer bu kitabın bilinen fiyatını korur
+    raw_price_text = "Price not found"
+
+    # Öncelik: .caption altındaki strong etiketi (genelde ana fiyat burada)
+    # Bu yöntem div gibi kapsayıcıları alıp "List: ..." gibi yan metinleri çekmeyi engeller
+    price_strong = book.select_one(".caption strong")
+
+    if price_strong:
+        # İndirimli ürün kontrolü: strong içinde line-through olan bir span var mı?
+        discount_span = price_strong.select_one("span[style*='line-through']")
+        if discount_span:
+            # Varsa, asıl fiyat bir sonraki span'dadır
+            real_price_span = discount_span.find_next_sibling("span")
+            if real_price_span:
+                raw_price_text = real_price_span.get_text(strip=True)
+            else:
+                # Yedek: sonraki span yoksa mevcut olanı al (beklenmedik durum)
+                raw_price_text = price_strong.get_text(strip=True)
+        else:
+            # İndirim yoksa direkt strong içeriğini al
+            raw_price_text = price_strong.get_text(strip=True)
+    else:
+        # Yedek mantık: strong bulunamazsa span'lara bak (div'i hariç tutuyoruz)
+        price_elements = book.find_all(
+            lambda tag: tag.name in ["span"]  # strong yukarıda denendi, div kafa karıştırıyor
+            and "$" in tag.text
+        )
+
+        final_price_element = None
+        for el in price_elements:
+            style = el.get("style", "")
+            # Eğer üzeri çizili fiyat (eski fiyat) bulursak, bir sonrakini al
+            if "line-through" in style:
+                next_el = el.find_next_sibling()
+                final_price_element = (
+                    next_el if next_el else el.find_next("span")
+                )
+                break
+            # Üzeri çizili yoksa, bulduğun ilk dolar işaretli elementi al
+            if not final_price_element:
+                final_price_element = el
+
+        if final_price_element:
+            raw_price_text = final_price_element.get_text(strip=True)
+
+    # 5. ISBN Mantığı
+    isbn = "ISBN not found"
+    isbn_element = book.find(
+        lambda tag: tag.name in ["span", "div", "p"] and "ISBN:" in tag.text
+    )
+    if isbn_element:
+        isbn_match = ISBN_RE.search(isbn_element.text)
+        if isbn_match:
+            isbn = isbn_match.group(1)
+
+    # 6. Stok/Miktar Mantığı
+    quantity = "0"
+    quantity_tag = book.select_one(".caption .dropdown .small")
+    if quantity_tag:
+        qty_match = QTY_RE.search(quantity_tag.get_text(strip=True))
+        if qty_match:
+            quantity = qty_match.group(1)
+
+    # ISBN yoksa kaydetme (Unique constraint hatasını önler)
+    if isbn == "ISBN not found":
+        return None
+
+    return {
+        "title": title,
+        "author": author,
+        "format": book_format,
+        "book_depot_price": raw_price_text,
+        "isbn": isbn,
+        "stock": quantity,
+        "book_depot_url": _product_url(title_tag),
+    }
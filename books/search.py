@@ -0,0 +1,41 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Greatest
+
+MIN_ISBN_PREFIX = 3
+
+
+def search_books(queryset, term):
+    """
+    Filters ``queryset`` by ``term`` and annotates ``rank`` and
+    ``similarity`` for ordering (best first).
+
+    - Digits (hyphens allowed) are an ISBN prefix, served by the ``isbn``
+      unique index's ``varchar_pattern_ops`` twin.
+    - Anything else matches the ``search_vector`` GIN index (whole words,
+      websearch syntax) or, for typos and partial words, the trigram GIN
+      indexes on title and author.
+    """
+    term = term.strip()
+    digits = term.replace("-", "").replace(" ", "")
+    if digits.isdigit() and len(digits) >= MIN_ISBN_PREFIX:
+        return queryset.filter(isbn__startswith=digits).annotate(
+            rank=Value(1.0, output_field=FloatField()),
+            similarity=Value(1.0, output_field=FloatField()),
+        )
+
+    query = SearchQuery(term, config="simple", search_type="websearch")
+    return queryset.filter(
+        Q(search_vector=query)
+        | Q(title__trigram_similar=term)
+        | Q(author__trigram_similar=term)
+    ).annotate(
+        rank=SearchRank(F("search_vector"), query),
+        similarity=Greatest(
+            TrigramSimilarity("title", term), TrigramSimilarity("author", term)
+        ),
+    )
+
+
+def ranked(queryset):
+    return queryset.order_by("-rank", "-similarity", "-id")
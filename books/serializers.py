@@ -0,0 +1,42 @@
+from rest_framework import serializers
+
+LIST_FIELDS = (
+    "id",
+    "title",
+    "author",
+    "isbn",
+    "format",
+    "book_depot_price",
+    "stock_quantity",
+    "stock_at_least",
+    "updated_at",
+)
+DETAIL_FIELDS = LIST_FIELDS + (
+    "stock",
+    "book_depot_url",
+    "publisher",
+    "category",
+    "page_count",
+    "description",
+    "created_at",
+)
+
+
+class BookSerializer(serializers.BaseSerializer):
+    """
+    Read-only ``Book`` serializer. Plain attribute reads instead of a
+    ``ModelSerializer`` field per column, since the API never writes.
+    """
+
+    fields_to_render = LIST_FIELDS
+
+    def to_representation(self, book):
+        data = {name: getattr(book, name) for name in self.fields_to_render}
+        # DRF'nin DecimalField'ı gibi fiyatı string olarak döndür
+        if data["book_depot_price"] is not None:
+            data["book_depot_price"] = str(data["book_depot_price"])
+        return data
+
+
+class BookDetailSerializer(BookSerializer):
+    fields_to_render = DETAIL_FIELDS
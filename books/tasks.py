@@ -1,194 +1,598 @@
-import threading
-from celery import shared_task
-from playwright.sync_api import sync_playwright
-
-from playwright_stealth import Stealth
-from bs4 import BeautifulSoup
-import re
+import logging
 import time
-import random
+
+from celery import chain, chord, shared_task
+from django.conf import settings
+
+from .crawler import crawl_pages, fetch_details, listing_url, parse_page
+from .enrich import pending_count, record_failures, save_details, take_pending
+from .fetcher import get_fetcher
 from .models import Book
-from shared.utils import clean_price_string
+from .parsing import parse_page_count
+from .writer import BookWriter
+from shared.locks import TaskLock, enqueue_once
+from scraper.archive import archive_enabled
+from scraper.models import ScrapePageResult, ScrapeRun
+from scraper.utils import (
+    PageTimer,
+    UnchangedPageTracker,
+    finish_run,
+    page_fingerprint,
+    prune_archive,
+    save_page_fingerprints,
+    save_page_results,
+    start_run,
+    stored_fingerprints,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_listing(page_number, page_size=20, timer=None):
+    """
+    Loads one listing page and returns its HTML; ``None`` if it failed,
+    with the reason in ``timer.failure``.
+    """
+    url = listing_url(page_number, page_size)
+    timer = timer or PageTimer(page_number)
 
+    # Önce paylaşılan oturumla düz HTTP; challenge çıkarsa worker'ın
+    # havuzundaki hazır (stealth uygulanmış) tarayıcı sayfası
+    try:
+        return get_fetcher().fetch(url, timer)
+    except Exception as e:
+        logger.warning("Sayfa %s yüklenemedi (%s): %s", page_number, timer.failure, e)
+        return None
 
-def run_scraper(page_number, page_size=20, result_list=None):
-    url = f"https://bookdepot.ca/Store/Browse?page={page_number}&size={page_size}&sort=arrival_1"
 
-    with sync_playwright() as p:
-        # Tarayıcıyı başlatıyoruz
-        browser = p.chromium.launch(headless=True)
+def run_scraper(page_number, page_size=20, timer=None):
+    """
+    Scrapes one listing page and returns its rows; ``[]`` if it failed, with
+    the reason in ``timer.failure``.
+    """
+    timer = timer or PageTimer(page_number)
+    content = fetch_listing(page_number, page_size, timer)
+    if content is None:
+        return []
 
-        # Gerçekçi bir tarayıcı ortamı oluşturuyoruz
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
+    books = parse_page(content, timer)
+    if not books:
+        logger.warning(
+            "Sayfa %s: kitap bulunamadı (%s). Sayfa yapısı değişmiş veya "
+            "Cloudflare engeline takılmış olabiliriz.",
+            page_number,
+            timer.failure,
         )
-        page = context.new_page()
+        return []
 
-        stealth = Stealth()
-        stealth.apply_stealth_sync(page)
+    logger.info("Sayfa %s: %s kitap bulundu.", page_number, len(books))
+    return books
 
-        try:
-            # Sayfaya git
-            page.goto(url, wait_until="domcontentloaded", timeout=60000)
 
-            # Cloudflare'in çözülmesi için rastgele insansı bekleme
-            time.sleep(random.uniform(5, 8))
+def discover_page_count(page_size=20):
+    url = listing_url(1, page_size)
+    try:
+        content = get_fetcher().fetch(url)
+    except Exception as e:
+        logger.warning("Could not load page 1 to count pages: %s", e)
+        return None
+    return parse_page_count(content)
 
-            content = page.content()
-            soup = BeautifulSoup(content, "html.parser")
 
-            books = soup.select(".grid-item")
+def page_summary(
+    page_number, books=0, changed=0, failed=False, last_page=None, duplicate_of=None
+):
+    # crawl_pages() ile aynı şekilde, chord callback'i ikisini de toplayabilsin diye
+    summary = {
+        "start_page": page_number,
+        "last_page": page_number if last_page is None else last_page,
+        "pages": 0 if failed or duplicate_of else 1,
+        "books": books,
+        "changed": changed,
+        "failed_pages": [page_number] if failed else [],
+    }
+    if duplicate_of:
+        summary["duplicate_of"] = duplicate_of
+    return summary
 
-            if not books:
-                print(
-                    "Kitap bulunamadı. Sayfa yapısı değişmiş veya Cloudflare engeline takılmış olabiliriz."
-                )
-                # Sayfa içeriğini debug için yazdırabilirsin: print(soup.prettify()[:500])
-                return -1
-
-            print(f"Sayfa {page_number}: {len(books)} kitap bulundu.\n")
-
-            for book in books:
-                # 1. Başlık
-                # İlk a.truncate etiketi bazen boş geliyor, bu yüzden h2 içindekini veya dolu olanı arıyoruz
-                title_tag = book.select_one("h2 a.truncate")
-                if not title_tag:
-                     # h2 içinde bulamazsa, metni olan ilk a.truncate'i bul
-                     for t in book.select("a.truncate"):
-                         if t.get_text(strip=True):
-                             title_tag = t
-                             break
-
-                title = (
-                    title_tag.get_text(strip=True) if title_tag else "Title not found"
-                )
 
-                # 2. Yazar
-                author_tag = book.select_one('a[href*="Na="]')
-                author = (
-                    author_tag.get_text(strip=True)
-                    if author_tag
-                    else "Author not found"
-                )
+def run_status(summary):
+    """A crawl cut short by ``CatalogCrawler`` (``aborted``) failed."""
+    if summary.get("aborted"):
+        return ScrapeRun.Status.FAILED
+    return ScrapeRun.Status.FINISHED
+
+
+def page_lock(page_number, page_size, ttl=None):
+    return TaskLock(f"page:{page_size}:{page_number}", ttl=ttl)
+
+
+def range_lock(start_page, end_page, page_size):
+    return TaskLock(f"pages:{page_size}:{start_page}-{end_page}")
+
+
+def incremental_lock(page_size):
+    return TaskLock(f"incremental:{page_size}")
+
+
+def catalog_lock(page_size):
+    # Chord bitene kadar tutuluyor; heartbeat yok, finalize_crawl ya da
+    # crawl_failed bırakıyor
+    return TaskLock(f"catalog:{page_size}", ttl=settings.SCRAPER_CRAWL_LOCK_TTL)
+
+
+def enrich_lock():
+    return TaskLock("enrich")
+
+
+def start_enrichment():
+    """Queues ``enrich_books`` unless one is already draining the queue."""
+    return enqueue_once(enrich_books, enrich_lock())
+
+
+def start_catalog_crawl(page_size=20):
+    """
+    Queues ``crawl_catalog`` unless one is already running for ``page_size``
+    (or finished within ``SCRAPER_DEDUP_WINDOW``). Returns
+    ``(AsyncResult, created)``; a duplicate gets the existing task's result.
+    """
+    return enqueue_once(
+        crawl_catalog, catalog_lock(page_size), kwargs={"page_size": page_size}
+    )
+
+
+def scrape_page(page_number, page_size=20, run_id=None):
+    """
+    The pipeline scraping and saving one listing page, as a signature:
+    ``fetch_page`` (browser queue) | ``parse_books`` (parse queue) |
+    ``persist_books`` (persist queue), so each stage runs on workers sized
+    for it (``CELERY_TASK_ROUTES``). The chain's result is the page's
+    ``page_summary``.
+
+    The page's lock makes concurrent or recent (``SCRAPER_DEDUP_WINDOW``)
+    runs for the same page return at once with ``duplicate_of`` set to the
+    task that did the work. Each attempt is recorded under ``run_id`` (a
+    new single-page run if not given).
+    """
+    return chain(
+        fetch_page.s(page_number, page_size, run_id=run_id),
+        parse_books.s(),
+        persist_books.s(),
+    )
+
+
+def hand_off(payload, timer):
+    """
+    Passes ``payload`` to the next ``scrape_page`` stage. The page's lock
+    gets ``SCRAPER_PIPELINE_LOCK_TTL`` seconds to cover the wait in that
+    stage's queue, where no heartbeat runs.
+    """
+    lock = page_lock(
+        payload["page_number"],
+        payload["page_size"],
+        ttl=settings.SCRAPER_PIPELINE_LOCK_TTL,
+    )
+    if not lock.renew(payload["owner"]):
+        logger.warning(
+            "Page %s lost its lock to another task; saving it anyway.",
+            payload["page_number"],
+        )
+    payload["timer"] = timer.as_dict()
+    return payload
+
+
+def fail_page(payload, timer):
+    """
+    Ends a pipeline page that could not be scraped and returns its summary.
+    A single-page run is closed as failed; a crawl's chord callback closes
+    its own run.
+    """
+    page_lock(payload["page_number"], payload["page_size"]).release(payload["owner"])
+    save_page_results(payload["run_id"], [timer])
+    summary = page_summary(payload["page_number"], failed=True)
+    finish_run(
+        payload["run_id"],
+        summary,
+        status=ScrapeRun.Status.FAILED,
+        kinds=[ScrapeRun.Kind.PAGE],
+    )
+    return summary
+
+
+@shared_task(bind=True)
+def fetch_page(self, page_number, page_size=20, run_id=None):
+    """
+    First stage of ``scrape_page``: takes the page's lock and loads it,
+    retrying blocked or failed loads. Returns the payload for
+    ``parse_books``, or a finished ``page_summary`` the later stages pass
+    through.
+    """
+    lock = page_lock(page_number, page_size)
+    owner = lock.reserve(self.request.id)
+    if owner != self.request.id:
+        logger.info("Page %s is already handled by task %s.", page_number, owner)
+        return page_summary(page_number, duplicate_of=owner)
+
+    if run_id is None:
+        run_id = start_run(ScrapeRun.Kind.PAGE, self.request.id, page_size).pk
+
+    payload = {
+        "page_number": page_number,
+        "page_size": page_size,
+        "run_id": run_id,
+        "owner": self.request.id,
+    }
+    timer = PageTimer(page_number, attempt=self.request.retries + 1)
+    # Playwright havuzun kendi thread'lerinde çalışıyor, Django'dan zaten ayrı
+    with lock.heartbeat(self.request.id):
+        content = fetch_listing(page_number, page_size, timer)
+
+    if content is None or not timer.ready:
+        if self.request.retries < settings.SCRAPER_PAGE_MAX_RETRIES:
+            save_page_results(run_id, [timer])
+            # Tekrar deneme aynı task id ile browser kuyruğunda bekliyor; kilit
+            # gecikme artı kuyruk payı kadar bu görevde kalıyor
+            retry_ttl = (
+                settings.SCRAPER_PAGE_RETRY_DELAY + settings.SCRAPER_PIPELINE_LOCK_TTL
+            )
+            page_lock(page_number, page_size, ttl=retry_ttl).renew(self.request.id)
+            raise self.retry(
+                args=[page_number],
+                kwargs={"page_size": page_size, "run_id": run_id},
+                countdown=settings.SCRAPER_PAGE_RETRY_DELAY,
+                max_retries=settings.SCRAPER_PAGE_MAX_RETRIES,
+            )
+        # Chord'un callback'i beklemeye devam etsin diye hata fırlatmıyoruz
+        return fail_page(payload, timer)
+
+    # HTML mesajla gidiyor: parse worker'ı bu worker'ın diskini görmeyebilir
+    payload["html"] = content
+    return hand_off(payload, timer)
+
+
+@shared_task
+def parse_books(payload):
+    """Second stage of ``scrape_page``: turns the fetched HTML into rows."""
+    if "timer" not in payload:
+        return payload
+
+    timer = PageTimer.from_dict(payload["timer"])
+    try:
+        books = parse_page(payload.pop("html"), timer, archive=True)
+    except Exception:
+        logger.exception("Page %s could not be parsed.", payload["page_number"])
+        timer.failure = ScrapePageResult.Failure.ERROR
+        # Chord'un callback'i beklemeye devam etsin diye hata fırlatmıyoruz
+        return fail_page(payload, timer)
+    if not books:
+        logger.warning(
+            "Sayfa %s: kitap bulunamadı (%s).", payload["page_number"], timer.failure
+        )
+        return fail_page(payload, timer)
+
+    payload["books"] = books
+    return hand_off(payload, timer)
 
-                # 3. Format
-                format_tag = book.select_one('a[href*="Nb="]')
-                book_format = (
-                    format_tag.get_text(strip=True)
-                    if format_tag
-                    else "Format not found"
+
+@shared_task
+def persist_books(payload):
+    """Last stage of ``scrape_page``: saves the rows and closes the page."""
+    if "timer" not in payload:
+        return payload
+
+    timer = PageTimer.from_dict(payload["timer"])
+    page_number, books = payload["page_number"], payload["books"]
+    try:
+        with timer.stage("db"):
+            timer.changed = save_books(books)
+            save_page_fingerprints(
+                payload["page_size"], {page_number: page_fingerprint(books)}
+            )
+    except Exception:
+        timer.failure = ScrapePageResult.Failure.ERROR
+        fail_page(payload, timer)
+        raise
+
+    page_lock(page_number, payload["page_size"]).release(
+        payload["owner"], keep=settings.SCRAPER_DEDUP_WINDOW
+    )
+    save_page_results(payload["run_id"], [timer])
+    summary = page_summary(page_number, books=len(books), changed=timer.changed)
+    finish_run(payload["run_id"], summary, kinds=[ScrapeRun.Kind.PAGE])
+    return summary
+
+
+def record_crawl(run_id, timers, changed_by_page):
+    # Writer batch'leri sayfalara yayıldığından değişiklik, yazımı
+    # tetikleyen sayfaya sayılıyor
+    for timer in timers:
+        if not timer.failure:
+            timer.changed = changed_by_page.get(timer.page_number, 0)
+    save_page_results(run_id, timers)
+
+
+@shared_task(bind=True)
+def crawl_books(self, start_page=1, end_page=-1, page_size=20, run_id=None):
+    """
+    Fetches pages ``start_page..end_page`` concurrently from one process and
+    saves each page as soon as it is parsed. ``end_page=-1`` keeps going
+    until an empty page is reached. Deduplicated per range like
+    ``scrape_page``, and recorded under ``run_id`` (a new range run if
+    not given).
+    """
+    lock = range_lock(start_page, end_page, page_size)
+    owner = lock.reserve(self.request.id)
+    if owner != self.request.id:
+        logger.info(
+            "Pages %s-%s are already handled by task %s.", start_page, end_page, owner
+        )
+        return page_summary(start_page, last_page=end_page, duplicate_of=owner)
+
+    own_run = run_id is None
+    if own_run:
+        run_id = start_run(ScrapeRun.Kind.RANGE, self.request.id, page_size).pk
+
+    fingerprints = {}
+    changed_by_page = {}
+    timers = []
+
+    def on_page(page_number, books):
+        before = writer.changed
+        writer.extend(books)
+        changed_by_page[page_number] = writer.changed - before
+        fingerprints[page_number] = page_fingerprint(books)
+
+    try:
+        with lock.heartbeat(self.request.id):
+            # Sayfalar arasında tek writer: satırlar batch dolunca topluca yazılıyor
+            with BookWriter() as writer:
+                summary = crawl_pages(
+                    start_page,
+                    end_page,
+                    page_size=page_size,
+                    on_page=on_page,
+                    timers=timers,
+                    archive=True,
                 )
 
-                # 4. Fiyat Mantığı
-                raw_price_text = "0.00"
-                
-                # Öncelik: .caption altındaki strong etiketi (genelde ana fiyat burada)
-                # Bu yöntem div gibi kapsayıcıları alıp "List: ..." gibi yan metinleri çekmeyi engeller
-                price_strong = book.select_one(".caption strong")
-                
-                if price_strong:
-                    # İndirimli ürün kontrolü: strong içinde line-through olan bir span var mı?
-                    discount_span = price_strong.select_one("span[style*='line-through']")
-                    if discount_span:
-                        # Varsa, asıl fiyat bir sonraki span'dadır
-                        real_price_span = discount_span.find_next_sibling("span")
-                        if real_price_span:
-                            raw_price_text = real_price_span.get_text(strip=True)
-                        else:
-                            # Yedek: sonraki span yoksa mevcut olanı al (beklenmedik durum)
-                            raw_price_text = price_strong.get_text(strip=True)
-                    else:
-                        # İndirim yoksa direkt strong içeriğini al
-                        raw_price_text = price_strong.get_text(strip=True)
-                else:
-                    # Yedek mantık: strong bulunamazsa span'lara bak (div'i hariç tutuyoruz)
-                    price_elements = book.find_all(
-                        lambda tag: tag.name in ["span"]  # strong yukarıda denendi, div kafa karıştırıyor
-                        and "$" in tag.text
-                    )
-
-                    final_price_element = None
-                    for el in price_elements:
-                        style = el.get("style", "")
-                        # Eğer üzeri çizili fiyat (eski fiyat) bulursak, bir sonrakini al
-                        if "line-through" in style:
-                            next_el = el.find_next_sibling()
-                            final_price_element = (
-                                next_el if next_el else el.find_next("span")
-                            )
-                            break
-                        # Üzeri çizili yoksa, bulduğun ilk dolar işaretli elementi al
-                        if not final_price_element:
-                            final_price_element = el
-
-                    if final_price_element:
-                        raw_price_text = final_price_element.get_text(strip=True)
-
-                # 5. ISBN Mantığı
-                isbn = "ISBN not found"
-                isbn_element = book.find(
-                    lambda tag: tag.name in ["span", "div", "p"] and "ISBN:" in tag.text
+            # Parmak izleri ancak satırlar yazıldıktan sonra kaydediliyor
+            save_page_fingerprints(page_size, fingerprints)
+    except Exception:
+        lock.release(self.request.id)
+        record_crawl(run_id, timers, changed_by_page)
+        if own_run:
+            finish_run(run_id, {}, status=ScrapeRun.Status.FAILED)
+        raise
+
+    # Yarıda kesilen aralık beklemeden yeniden denenebilsin
+    lock.release(
+        self.request.id,
+        keep=0 if summary.get("aborted") else settings.SCRAPER_DEDUP_WINDOW,
+    )
+    summary["changed"] = writer.changed
+    record_crawl(run_id, timers, changed_by_page)
+    if own_run:
+        finish_run(run_id, summary, status=run_status(summary))
+    return summary
+
+
+@shared_task(bind=True)
+def crawl_incremental(self, page_size=20, unchanged_pages=None):
+    """
+    Crawls from the newest arrivals and stops after ``unchanged_pages``
+    consecutive pages without changed rows.
+
+    Pages whose fingerprint matches the previous crawl are not written at
+    all; the others go through the writer and count as unchanged only if
+    it finds nothing to update. Without stored fingerprints a full
+    ``crawl_catalog`` runs instead. Full sweeps also run on their own
+    schedule (``CELERY_BEAT_SCHEDULE``). Overlapping runs return at once.
+    """
+    previous = stored_fingerprints(page_size)
+    if not previous:
+        result, _ = start_catalog_crawl(page_size)
+        return {"full_sweep": True, "task_id": result.id}
+
+    lock = incremental_lock(page_size)
+    owner = lock.reserve(self.request.id)
+    if owner != self.request.id:
+        logger.info("Incremental crawl already running as task %s.", owner)
+        return {"duplicate_of": owner}
+
+    run = start_run(ScrapeRun.Kind.INCREMENTAL, self.request.id, page_size)
+    tracker = UnchangedPageTracker(
+        unchanged_pages or settings.SCRAPER_INCREMENTAL_UNCHANGED_PAGES
+    )
+    writer = BookWriter()
+    changed_by_page = {}
+    timers = []
+
+    def on_page(page_number, books):
+        fingerprint = page_fingerprint(books)
+        changed = 0
+        if previous.get(page_number) != fingerprint:
+            writer.extend(books)
+            changed = writer.flush()
+            save_page_fingerprints(page_size, {page_number: fingerprint})
+        changed_by_page[page_number] = changed
+        return tracker.mark(page_number, changed)
+
+    try:
+        with lock.heartbeat(self.request.id):
+            summary = crawl_pages(
+                1, -1, page_size=page_size, on_page=on_page, timers=timers, archive=True
+            )
+    except Exception:
+        record_crawl(run.pk, timers, changed_by_page)
+        run.finish({"changed": writer.changed}, status=ScrapeRun.Status.FAILED)
+        raise
+    finally:
+        # Bir sonraki saatlik tarama beklemeden çalışabilsin
+        lock.release(self.request.id)
+
+    summary["changed"] = writer.changed
+    record_crawl(run.pk, timers, changed_by_page)
+    run.finish(summary, status=run_status(summary))
+    return summary
+
+
+@shared_task(bind=True)
+def crawl_catalog(self, page_size=20, chunk_size=None):
+    """
+    Refreshes the whole catalog by fanning pages out to every worker.
+
+    The page count is read from page 1's pagination. Ranges of
+    ``chunk_size`` pages go to ``crawl_books`` (a single page goes to
+    the ``scrape_page`` pipeline) and ``finalize_crawl`` runs once all of them finish.
+    If the page count cannot be found, one ``crawl_books`` task walks until
+    the first empty page instead. Only one catalog crawl per ``page_size``
+    runs at a time; queue it with ``start_catalog_crawl``. Subtasks record
+    their pages under one ``ScrapeRun``.
+    """
+    lock = catalog_lock(page_size)
+    owner = lock.reserve(self.request.id)
+    if owner != self.request.id:
+        logger.info("Catalog crawl already running as task %s.", owner)
+        return {"duplicate_of": owner}
+
+    run = start_run(ScrapeRun.Kind.CATALOG, self.request.id, page_size)
+    try:
+        chunk_size = chunk_size or settings.SCRAPER_CATALOG_CHUNK_SIZE
+        page_count = discover_page_count(page_size)
+
+        if page_count is None:
+            header = [crawl_books.s(1, -1, page_size, run_id=run.pk)]
+        elif chunk_size == 1:
+            header = [
+                scrape_page(n, page_size, run_id=run.pk)
+                for n in range(1, page_count + 1)
+            ]
+        else:
+            header = [
+                crawl_books.s(
+                    start,
+                    min(start + chunk_size - 1, page_count),
+                    page_size,
+                    run_id=run.pk,
                 )
-                if isbn_element:
-                    isbn_match = re.search(r"ISBN:\s*(\d{13})", isbn_element.text)
-                    if isbn_match:
-                        isbn = isbn_match.group(1)
-
-                # 6. Stok/Miktar Mantığı
-                quantity = "0"
-                quantity_tag = book.select_one(".caption .dropdown .small")
-                if quantity_tag:
-                    qty_match = re.search(
-                        r"Qty:\s*(\d+\+?)", quantity_tag.get_text(strip=True)
-                    )
-                    if qty_match:
-                        quantity = qty_match.group(1)
-
-                # ISBN yoksa kaydetme (Unique constraint hatasını önler)
-                if isbn == "ISBN not found":
-                    continue
-
-                extracted_data = {
-                    "title": title,
-                    "author": author,
-                    "format": book_format,
-                    "book_depot_price": raw_price_text,
-                    "isbn": isbn,
-                    "stock": quantity,
-                }
-
-                result_list.append(extracted_data)
-
-            return page_number + 1
-
-        except Exception as e:
-            print(f"Beklenmeyen bir hata oluştu: {e}")
-            return None
-        finally:
-            browser.close()
+                for start in range(1, page_count + 1, chunk_size)
+            ]
+
+        # Bir alt görev hata verirse finalize_crawl hiç çalışmıyor;
+        # kilidi bırakıp run'ı kapatan crawl_failed çalışıyor
+        callback = finalize_crawl.s(
+            started_at=time.time(),
+            page_count=page_count,
+            crawl_id=self.request.id,
+            page_size=page_size,
+            run_id=run.pk,
+        ).on_error(
+            crawl_failed.si(crawl_id=self.request.id, page_size=page_size, run_id=run.pk)
+        )
+        chord(header)(callback)
+    except Exception:
+        lock.release(self.request.id)
+        run.finish({}, status=ScrapeRun.Status.FAILED)
+        raise
+
+    return {"page_count": page_count, "subtasks": len(header), "run_id": run.pk}
 
 
 @shared_task
-def scrape_books(page_number, page_size=20):
-    extracted_books = []
-    # 3. Playwright'ı Django'dan kaçırma operasyonu
-    thread = threading.Thread(
-        target=run_scraper, args=(page_number, page_size, extracted_books)
+def finalize_crawl(
+    results, started_at, page_count=None, crawl_id=None, page_size=20, run_id=None
+):
+    summary = {
+        "page_count": page_count,
+        "pages": sum(result["pages"] for result in results),
+        "books": sum(result["books"] for result in results),
+        "changed": sum(result.get("changed", 0) for result in results),
+        "failed_pages": sorted(
+            page for result in results for page in result["failed_pages"]
+        ),
+        "duplicates": sum(1 for result in results if result.get("duplicate_of")),
+        "duration": round(time.time() - started_at, 1),
+    }
+    aborted = [result["aborted"] for result in results if result.get("aborted")]
+    if aborted:
+        summary["aborted"] = aborted
+    logger.info("Catalog crawl finished: %s", summary)
+
+    if run_id:
+        finish_run(run_id, summary, status=run_status(summary))
+    if crawl_id:
+        catalog_lock(page_size).release(crawl_id, keep=settings.SCRAPER_DEDUP_WINDOW)
+    return summary
+
+
+@shared_task
+def crawl_failed(crawl_id, page_size=20, run_id=None):
+    """
+    Errback of ``crawl_catalog``'s chord, for when a subtask (or
+    ``finalize_crawl`` itself) raised: closes the run as failed and frees
+    the catalog lock at once, instead of leaving both until the lock's TTL.
+    Pages recorded before the failure stay on the run.
+    """
+    logger.error("Catalog crawl %s failed.", crawl_id)
+    if run_id:
+        finish_run(run_id, {}, status=ScrapeRun.Status.FAILED)
+    catalog_lock(page_size).release(crawl_id)
+
+
+@shared_task
+def prune_archived_pages():
+    """Daily archive retention; see ``scraper.utils.prune_archive``."""
+    if not archive_enabled():
+        return None
+    rows, files, size = prune_archive()
+    logger.info(
+        "Pruned %s archived pages and %s files (%.1f MiB).", rows, files, size / 2**20
     )
-    thread.start()
-    thread.join()  # Thread bitene kadar Celery worker'ı bekletir
-
-    for data in extracted_books:
-        Book.objects.update_or_create(
-            isbn=data["isbn"],
-            defaults={
-                "title": data["title"],
-                "author": data["author"],
-                "format": data["format"],
-                "book_depot_price": clean_price_string(data["book_depot_price"]),
-                "stock": data["stock"],
-            },
-        )
+    return {"rows": rows, "files": files, "bytes": size}
+
+
+def save_books(books):
+    with BookWriter() as writer:
+        writer.extend(books)
+    return writer.changed
+
+
+@shared_task(bind=True)
+def enrich_books(self, batch_size=None):
+    """
+    Drains the enrichment queue (see ``books.enrich``): takes up to
+    ``batch_size`` queued ISBNs at a time, fetches their detail pages and
+    bulk-updates the books, until the queue is empty. Books whose page
+    could not be loaded are dropped from the queue and their
+    ``enrich_failures`` counted; ``BookWriter`` queues them again until
+    ``SCRAPER_ENRICH_MAX_FAILURES``.
+    """
+    lock = enrich_lock()
+    owner = lock.reserve(self.request.id)
+    if owner != self.request.id:
+        logger.info("Enrichment already running as task %s.", owner)
+        return {"duplicate_of": owner}
+
+    batch_size = batch_size or settings.SCRAPER_ENRICH_BATCH_SIZE
+    summary = {"books": 0, "enriched": 0, "failed": 0}
+    try:
+        with lock.heartbeat(self.request.id):
+            while isbns := take_pending(batch_size):
+                books = list(
+                    Book.objects.filter(isbn__in=isbns, book_depot_url__isnull=False)
+                    .values_list("isbn", "book_depot_url")
+                )
+                details, batch = fetch_details(books)
+                save_details(details)
+                record_failures(batch["failed"])
+                summary["books"] += batch["books"]
+                summary["enriched"] += batch["enriched"]
+                summary["failed"] += len(batch["failed"])
+    finally:
+        lock.release(self.request.id)
 
-    return f"Sayfa {page_number} tamamlandı."
+    # Kilit bırakılmadan hemen önce kuyruğa girenler beklemesin
+    if pending_count():
+        start_enrichment()
+    logger.info("Enrichment finished: %s", summary)
+    return summary
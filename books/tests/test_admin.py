@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from books.models import Book
+
+
+# Manifest'i collectstatic üretiyor; testlerde yok
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class BookAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        Book.objects.bulk_create(
+            [
+                Book(title="Dune", author="Frank Herbert", isbn="9780441172719"),
+                Book(title="Dune Messiah", author="Frank Herbert", isbn="9780593098233"),
+                Book(title="Emma", author="Jane Austen", isbn="9780141439587"),
+            ]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse("admin:books_book_changelist")
+
+    def results(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [book.isbn for book in response.context["cl"].result_list]
+
+    def test_search_orders_by_relevance(self):
+        isbns = self.results(q="dune")
+
+        self.assertEqual(set(isbns), {"9780441172719", "9780593098233"})
+
+    def test_isbn_prefix_search(self):
+        self.assertEqual(self.results(q="978-0141"), ["9780141439587"])
+
+    def test_search_keeps_column_ordering(self):
+        self.assertEqual(
+            self.results(q="dune", o="1"), ["9780441172719", "9780593098233"]
+        )
+        self.assertEqual(
+            self.results(q="dune", o="-1"), ["9780593098233", "9780441172719"]
+        )
+
+    def test_changelist_without_search(self):
+        self.assertEqual(len(self.results()), 3)
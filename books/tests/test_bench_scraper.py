@@ -0,0 +1,56 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from books.models import Book
+from books.tests.test_parsing import FIXTURES
+
+
+class BenchScraperTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.corpus = Path(directory.name)
+        shutil.copy(FIXTURES / "listing.html", self.corpus / "page-1.html")
+
+    def bench(self, *args):
+        out = StringIO()
+        with mock.patch("books.writer.request_details") as request_details:
+            call_command("bench_scraper", str(self.corpus), *args, stdout=out)
+        request_details.assert_not_called()
+        return out.getvalue()
+
+    def test_no_db(self):
+        out = self.bench("--no-db", "--repeat", "2")
+
+        self.assertIn("2 pages, 6 books", out)
+        self.assertNotIn("upsert", out)
+
+    def test_upsert_is_rolled_back(self):
+        out = self.bench()
+
+        self.assertIn("upsert", out)
+        self.assertFalse(Book.objects.exists())
+
+    def test_commit_keeps_the_rows_without_queueing_details(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.bench("--commit")
+
+        self.assertEqual(Book.objects.count(), 3)
+        # Yalnızca önbellek sürümü yenileniyor
+        self.assertEqual(len(callbacks), 1)
+
+    def test_output_and_compare(self):
+        results = self.corpus / "results.json"
+        self.bench("--no-db", "--output", str(results))
+
+        out = self.bench("--no-db", "--compare", str(results))
+
+        self.assertEqual(json.loads(results.read_text())["books"], 3)
+        self.assertIn("pages_per_sec", out)
@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from books.browser import BrowserPool
+
+
+class BrowserPoolTests(SimpleTestCase):
+    @mock.patch("books.browser.Stealth")
+    @mock.patch("books.browser.sync_playwright")
+    def test_runs_jobs_and_raises_their_errors(self, sync_playwright, stealth):
+        pool = BrowserPool(size=1)
+        self.addCleanup(pool.close)
+
+        self.assertEqual(pool.run(lambda page: 42), 42)
+        with self.assertRaisesMessage(ValueError, "bad page"):
+            pool.run(mock.Mock(side_effect=ValueError("bad page")))
+
+    @mock.patch("books.browser.sync_playwright")
+    def test_slot_that_cannot_start_fails_the_pool(self, sync_playwright):
+        sync_playwright.return_value.start.side_effect = RuntimeError("no browser")
+
+        with self.assertRaisesMessage(RuntimeError, "no browser"):
+            BrowserPool(size=2, start_timeout=5)
+
+    @mock.patch("books.browser.sync_playwright")
+    def test_jobs_for_a_stopped_slot_fail(self, sync_playwright):
+        pool = BrowserPool(size=1)
+        (slot,) = pool._slots
+        pool.close()
+
+        with self.assertRaisesMessage(RuntimeError, "has stopped"):
+            slot.submit(lambda page: None).result(timeout=5)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from books.cache import LAST_MODIFIED_KEY, catalog_last_modified, catalog_version
+from books.models import Book
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(title="Dune", isbn="9780441172719")
+        self.other = Book.objects.create(title="Emma", isbn="9780141439587")
+        cache.clear()
+
+    def test_last_modified_falls_back_to_newest_update(self):
+        self.assertEqual(catalog_last_modified(), self.other.updated_at)
+
+    def test_deleting_a_book_moves_last_modified(self):
+        before = catalog_last_modified()
+        version = catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+
+        self.assertEqual(catalog_version(), version + 1)
+        self.assertGreater(catalog_last_modified(), before)
+
+    def test_bulk_update_and_delete_bump_the_version(self):
+        version = catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(pk=self.book.pk).update(stock_quantity=3)
+        self.assertEqual(catalog_version(), version + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(pk=self.other.pk).delete()
+        self.assertGreater(catalog_version(), version + 1)
+
+    def test_noop_bulk_update_keeps_the_version(self):
+        version = catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(isbn="0").update(stock_quantity=3)
+
+        self.assertEqual(catalog_version(), version)
+
+    def test_list_is_served_until_a_delete(self):
+        url = reverse("book-list")
+        # Last-Modified saniye hassasiyetinde; silme sonraki bir saniyeye düşsün
+        cache.set(LAST_MODIFIED_KEY, timezone.now() - timedelta(seconds=5))
+        response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(pk=self.other.pk).delete()
+        again = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(len(again.data["results"]), 1)
+        self.assertNotEqual(again["ETag"], response["ETag"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "books.example"])
+    def test_each_host_gets_its_own_links(self):
+        url = reverse("book-list") + "?page_size=1"
+
+        internal = self.client.get(url)
+        public = self.client.get(url, HTTP_HOST="books.example")
+
+        self.assertTrue(internal.data["next"].startswith("http://testserver/"))
+        self.assertTrue(public.data["next"].startswith("http://books.example/"))
+
+    def test_stale_etag_does_not_hide_a_deleted_book(self):
+        url = reverse("book-detail", args=[self.other.isbn])
+        response = self.client.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
+
+        # Sürüm artmadan silinen kitap (ör. önbellek yenilenmeden önce)
+        Book.objects.filter(pk=self.other.pk).delete()
+        cache.clear()
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(again.status_code, 404)
@@ -0,0 +1,115 @@
+import asyncio
+
+from django.test import SimpleTestCase, override_settings
+
+from books.crawler import BrowserCrawler, CatalogCrawler
+from books.tests.test_parsing import fixture
+from scraper.models import ScrapePageResult
+
+EMPTY = "<html><body><p>No results</p></body></html>"
+
+
+class FakeFetcher:
+    """Serves ``pages[n]`` for page n; a missing page raises like a timeout."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def fetch(self, get_page, url, timer=None):
+        self.fetched.append(timer.page_number)
+        content = self.pages.get(timer.page_number)
+        if content is None:
+            raise TimeoutError("page did not load")
+        if content is EMPTY:
+            timer.failure = ScrapePageResult.Failure.EMPTY
+        else:
+            timer.ready = True
+        return content
+
+
+def crawl(crawler, pages):
+    """Runs the crawler's claim loop with one worker and no browser."""
+    crawler._fetcher = FakeFetcher(pages)
+
+    async def run():
+        while (page_number := crawler.claim()) is not None:
+            await crawler._crawl_one(None, page_number)
+
+    asyncio.run(run())
+    return crawler.summary()
+
+
+@override_settings(SCRAPER_ARCHIVE_DIR="")
+class CatalogCrawlerTests(SimpleTestCase):
+    def crawler(self, **kwargs):
+        kwargs = {"max_retries": 0, "max_failed_pages": 3, "max_pages": 10, **kwargs}
+        return CatalogCrawler(1, -1, concurrency=1, contexts=1, **kwargs)
+
+    def test_stops_at_the_first_empty_page(self):
+        listing = fixture("listing.html")
+
+        summary = crawl(self.crawler(), {1: listing, 2: listing, 3: EMPTY})
+
+        self.assertEqual(summary["last_page"], 2)
+        self.assertEqual((summary["pages"], summary["books"]), (2, 6))
+        self.assertNotIn("aborted", summary)
+
+    def test_gives_up_after_pages_fail_in_a_row(self):
+        listing = fixture("listing.html")
+        crawler = self.crawler()
+
+        summary = crawl(crawler, {1: listing, 3: listing})
+
+        # 2 başarısız, 3 sayacı sıfırlıyor; 4, 5, 6 üst üste başarısız
+        self.assertEqual(crawler._fetcher.fetched, [1, 2, 3, 4, 5, 6])
+        self.assertEqual(summary["failed_pages"], [2, 4, 5, 6])
+        self.assertEqual(summary["aborted"], "3 pages in a row failed")
+
+    def test_failed_pages_are_retried_first(self):
+        crawler = self.crawler(max_retries=1, max_failed_pages=1)
+
+        crawl(crawler, {})
+
+        self.assertEqual(crawler._fetcher.fetched, [1, 1])
+
+    def test_open_ended_crawl_is_capped(self):
+        listing = fixture("listing.html")
+        crawler = self.crawler(max_pages=4)
+
+        summary = crawl(crawler, dict.fromkeys(range(1, 10), listing))
+
+        self.assertEqual(crawler._fetcher.fetched, [1, 2, 3, 4])
+        self.assertEqual(summary["aborted"], "no empty page within 4 pages")
+
+    def test_cap_is_not_hit_when_the_last_page_is_empty(self):
+        listing = fixture("listing.html")
+
+        summary = crawl(self.crawler(max_pages=3), {1: listing, 2: listing, 3: EMPTY})
+
+        self.assertNotIn("aborted", summary)
+
+    def test_pages_past_the_end_are_not_retried(self):
+        crawler = self.crawler(max_retries=1, max_failed_pages=1)
+        crawler._fetcher = FakeFetcher({1: fixture("listing.html"), 2: EMPTY})
+
+        async def run():
+            # Üç sayfa aynı anda sürüyor; 3 hata verdikten sonra 2 boş çıkıyor
+            claimed = [crawler.claim() for _ in range(3)]
+            for page_number in reversed(claimed):
+                await crawler._crawl_one(None, page_number)
+            return crawler.claim()
+
+        self.assertIsNone(asyncio.run(run()))
+        summary = crawler.summary()
+        self.assertEqual((summary["last_page"], summary["failed_pages"]), (1, []))
+        self.assertNotIn("aborted", summary)
+
+class BrowserCrawlerTests(SimpleTestCase):
+    def test_subclasses_must_implement_the_claim_loop(self):
+        class Incomplete(BrowserCrawler):
+            def claim(self):
+                return None
+
+        with self.assertRaises(TypeError):
+            Incomplete(concurrency=1, contexts=1)
@@ -0,0 +1,126 @@
+import csv
+import json
+import tempfile
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from books.export import EXPORT_FIELDS, export_rows, parquet_available, stream_csv
+from books.models import Book
+
+WATERMARK_PREFIX = "Next --since watermark: "
+
+
+class ExportBooksTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.dune = Book.objects.create(
+            title="Dune",
+            isbn="9780441172719",
+            author="Frank Herbert",
+            book_depot_price="5.00",
+            stock="12+",
+            stock_quantity=12,
+            stock_at_least=True,
+        )
+        self.emma = Book.objects.create(
+            title="Emma", isbn="9780141439587", book_depot_price="9.00"
+        )
+
+    def export(self, file_format, *args):
+        output = self.directory / f"books.{file_format}"
+        err = StringIO()
+        call_command(
+            "export_books",
+            "--file-format",
+            file_format,
+            "--output",
+            str(output),
+            *args,
+            stderr=err,
+        )
+        watermark = err.getvalue().strip().removeprefix(WATERMARK_PREFIX)
+        return output, watermark
+
+    def test_csv(self):
+        output, _ = self.export("csv")
+
+        with open(output, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        # En eski değişiklik önce
+        self.assertEqual(
+            [row[0] for row in rows[1:]], [self.dune.isbn, self.emma.isbn]
+        )
+        self.assertEqual(
+            rows[1][1:8], ["Dune", "Frank Herbert", "", "5.00", "12+", "12", "True"]
+        )
+
+    def test_ndjson(self):
+        output, _ = self.export("ndjson")
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        self.assertEqual(
+            [row["isbn"] for row in rows], [self.dune.isbn, self.emma.isbn]
+        )
+        self.assertEqual(rows[0]["book_depot_price"], "5.00")
+        self.assertIs(rows[0]["stock_at_least"], True)
+        self.assertIsNone(rows[1]["stock_quantity"])
+        self.assertEqual(set(rows[0]), set(EXPORT_FIELDS))
+
+    def test_watermark_exports_only_later_changes(self):
+        _, watermark = self.export("ndjson")
+        self.emma.book_depot_price = "7.50"
+        self.emma.save()
+
+        output, next_watermark = self.export("ndjson", "--since", watermark)
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        self.assertEqual([row["isbn"] for row in rows], [self.emma.isbn])
+        self.assertEqual(rows[0]["book_depot_price"], "7.50")
+        self.assertGreater(next_watermark, watermark)
+
+        output, _ = self.export("ndjson", "--since", next_watermark)
+
+        self.assertEqual(output.read_text(), "")
+
+    def test_invalid_since(self):
+        with self.assertRaises(CommandError):
+            self.export("csv", "--since", "yesterday")
+
+    def test_parquet_without_pyarrow(self):
+        with mock.patch(
+            "books.management.commands.export_books.parquet_available",
+            return_value=False,
+        ):
+            with self.assertRaisesMessage(CommandError, "needs pyarrow"):
+                self.export("parquet")
+
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        with self.settings(BOOKS_EXPORT_CHUNK_SIZE=1):
+            output, _ = self.export("parquet")
+
+        parquet = pq.ParquetFile(output)
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column_names, list(EXPORT_FIELDS))
+        self.assertEqual(
+            table.column("isbn").to_pylist(), [self.dune.isbn, self.emma.isbn]
+        )
+
+    def test_stream_csv_writes_header_for_an_empty_export(self):
+        Book.objects.all().delete()
+
+        self.assertEqual(
+            "".join(stream_csv(export_rows())), ",".join(EXPORT_FIELDS) + "\r\n"
+        )
@@ -0,0 +1,128 @@
+import asyncio
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+from playwright.async_api import TimeoutError as AsyncPlaywrightTimeoutError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from books.fetcher import (
+    DETAIL_READY,
+    LISTING_READY,
+    finish_http_fetch,
+    wait_until_ready,
+    wait_until_ready_async,
+)
+from books.throttle import BLOCKED
+from scraper.models import ScrapePageResult
+from scraper.utils import PageTimer
+
+CHALLENGE = "<html><title>Just a moment...</title></html>"
+LISTING = '<html><body><div class="grid-item"></div></body></html>'
+END_OF_CATALOG = "<html><body><p>No results</p></body></html>"
+
+
+class FakePage:
+    """Just the part of a Playwright page ``wait_until_ready`` touches."""
+
+    def __init__(self, html, appears=False):
+        self.html = html
+        self.appears = appears
+        self.waited = False
+
+    def query_selector(self, selector):
+        return object() if "grid-item" in self.html else None
+
+    def content(self):
+        return self.html
+
+    def wait_for_selector(self, selector, timeout):
+        self.waited = True
+        if not self.appears:
+            raise PlaywrightTimeoutError("timed out")
+
+
+class AsyncFakePage(FakePage):
+    async def query_selector(self, selector):
+        return FakePage.query_selector(self, selector)
+
+    async def content(self):
+        return self.html
+
+    async def wait_for_selector(self, selector, timeout):
+        self.waited = True
+        if not self.appears:
+            raise AsyncPlaywrightTimeoutError("timed out")
+
+
+class WaitUntilReadyTests(SimpleTestCase):
+    def check(self, html, appears, ready, waited):
+        page = FakePage(html, appears)
+        self.assertEqual(wait_until_ready(page, LISTING_READY), ready)
+        self.assertEqual(page.waited, waited)
+
+        page = AsyncFakePage(html, appears)
+        self.assertEqual(asyncio.run(wait_until_ready_async(page, LISTING_READY)), ready)
+        self.assertEqual(page.waited, waited)
+
+    def test_listing_is_ready_without_waiting(self):
+        self.check(LISTING, appears=False, ready=True, waited=False)
+
+    def test_end_of_catalog_is_not_waited_for(self):
+        self.check(END_OF_CATALOG, appears=False, ready=False, waited=False)
+
+    def test_challenge_waits_for_the_selector(self):
+        self.check(CHALLENGE, appears=True, ready=True, waited=True)
+        self.check(CHALLENGE, appears=False, ready=False, waited=True)
+
+
+class FinishHttpFetchTests(SimpleTestCase):
+    def finish(self, html, ready_selector=LISTING_READY, status=200):
+        response = httpx.Response(
+            status, text=html, request=httpx.Request("GET", "https://bookdepot.ca/")
+        )
+        timer = PageTimer(1)
+        self.throttle = mock.Mock()
+        with mock.patch("books.fetcher.drop_session") as self.drop_session:
+            content = finish_http_fetch(
+                self.throttle, {"id": "s"}, response, timer, ready_selector
+            )
+        return content, timer
+
+    def test_challenge_backs_off_and_drops_the_session(self):
+        content, timer = self.finish(CHALLENGE, status=403)
+
+        self.assertIsNone(content)
+        self.throttle.report.assert_called_once_with(BLOCKED)
+        self.drop_session.assert_called_once_with({"id": "s"})
+
+    def test_listing(self):
+        content, timer = self.finish(LISTING)
+
+        self.assertEqual(content, LISTING)
+        self.assertTrue(timer.ready)
+        self.assertFalse(timer.failure)
+
+    def test_class_name_outside_an_element_is_not_ready(self):
+        html = "<html><script>$('.grid-item').show()</script><p>grid-item</p></html>"
+
+        _, timer = self.finish(html)
+
+        self.assertFalse(timer.ready)
+        self.assertEqual(timer.failure, ScrapePageResult.Failure.EMPTY)
+
+    def test_detail_page_needs_the_product_block(self):
+        not_found = "<html><body><h1>Page not found</h1></body></html>"
+        product = (
+            '<html><body><div itemscope itemtype="https://schema.org/Product">'
+            "<h1>Dune</h1></div></body></html>"
+        )
+
+        self.assertFalse(self.finish(not_found, DETAIL_READY)[1].ready)
+        self.assertTrue(self.finish(product, DETAIL_READY)[1].ready)
+
+    def test_challenge_falls_back_to_the_browser(self):
+        content, timer = self.finish(CHALLENGE, status=403)
+
+        self.assertIsNone(content)
+        self.assertFalse(timer.ready)
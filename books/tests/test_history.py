@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from books.history import biggest_price_drops, price_series
+from books.models import Book, BookPriceSnapshot
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime(2026, 3, day, hour))
+
+
+class PriceHistoryTestCase(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Dune", isbn="9780441172719", book_depot_price="5.00"
+        )
+
+    def snapshot(self, when, price, book=None):
+        BookPriceSnapshot.objects.create(
+            book=book or self.book, recorded_at=when, book_depot_price=price
+        )
+
+
+class PriceSeriesTests(PriceHistoryTestCase):
+    def test_last_price_carries_over_empty_buckets(self):
+        self.snapshot(at(1), "8.00")
+        self.snapshot(at(3, 9), "6.00")
+
+        series = price_series(self.book.isbn, until=at(4))
+
+        self.assertEqual(
+            [point["bucket"] for point in series], [at(day, 0) for day in range(1, 5)]
+        )
+        self.assertEqual(
+            [(point["low"], point["high"]) for point in series],
+            [
+                (Decimal("8.00"), Decimal("8.00")),
+                (Decimal("8.00"), Decimal("8.00")),
+                (Decimal("6.00"), Decimal("8.00")),
+                (Decimal("6.00"), Decimal("6.00")),
+            ],
+        )
+        self.assertEqual(series[2]["average"], Decimal("7.00"))
+
+    def test_since_starts_from_the_price_in_effect(self):
+        self.snapshot(at(1), "8.00")
+        self.snapshot(at(5), "6.00")
+
+        series = price_series(self.book.isbn, "week", since=at(3), until=at(10))
+
+        self.assertEqual(series[0]["bucket"], at(2, 0))
+        self.assertEqual(series[0]["low"], Decimal("6.00"))
+        self.assertEqual(series[0]["high"], Decimal("8.00"))
+        self.assertEqual(series[1]["high"], Decimal("6.00"))
+
+    def test_book_without_history(self):
+        self.assertEqual(price_series(self.book.isbn), [])
+        with self.assertRaises(ValueError):
+            price_series(self.book.isbn, "year")
+
+
+class BiggestPriceDropsTests(PriceHistoryTestCase):
+    def test_drops_since_a_date(self):
+        rising = Book.objects.create(
+            title="Emma", isbn="9780141439587", book_depot_price="9.00"
+        )
+        small = Book.objects.create(
+            title="Ulysses", isbn="9780199535675", book_depot_price="4.00"
+        )
+        self.snapshot(at(1), "8.00")
+        self.snapshot(at(1), "7.00", book=rising)
+        self.snapshot(at(1), "4.50", book=small)
+        # Tarihten sonraki değişiklik başlangıç fiyatını etkilemiyor
+        self.snapshot(at(1) + timedelta(days=5), "1.00")
+
+        drops = list(biggest_price_drops(at(2)))
+
+        self.assertEqual([book.isbn for book in drops], [self.book.isbn, small.isbn])
+        self.assertEqual(drops[0].price_drop, Decimal("3.00"))
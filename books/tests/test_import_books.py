@@ -0,0 +1,109 @@
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from books.models import Book
+
+
+class ImportMixin:
+    def run_import(self, name, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / name
+            path.write_text(content, encoding="utf-8")
+            out, err = StringIO(), StringIO()
+            call_command("import_books", str(path), stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def ndjson(self, *records):
+        return "".join(
+            (record if isinstance(record, str) else json.dumps(record)) + "\n"
+            for record in records
+        )
+
+
+class ImportBooksTests(ImportMixin, TestCase):
+    def test_csv(self):
+        out, _ = self.run_import(
+            "feed.csv",
+            "isbn,title,author,format,book_depot_price,stock,book_depot_url\n"
+            "978-1-111-11111-1,Dune,Frank Herbert,Paperback,$4.99,12+,\n",
+        )
+
+        self.assertIn("1 inserted", out)
+        book = Book.objects.get(isbn="9781111111111")
+        self.assertEqual(book.book_depot_price, Decimal("4.99"))
+        self.assertEqual((book.stock_quantity, book.stock_at_least), (12, True))
+
+    def test_numeric_json_values(self):
+        out, _ = self.run_import(
+            "feed.ndjson",
+            self.ndjson(
+                {"isbn": 9781111111111, "title": "Dune", "book_depot_price": 4.99, "stock": 7}
+            ),
+        )
+
+        self.assertIn("1 inserted", out)
+        book = Book.objects.get(isbn="9781111111111")
+        self.assertEqual(book.book_depot_price, Decimal("4.99"))
+        self.assertEqual((book.stock, book.stock_quantity), ("7", 7))
+
+    def test_long_values_are_cut_to_their_column(self):
+        self.run_import(
+            "feed.ndjson",
+            self.ndjson(
+                {
+                    "isbn": "9781111111111",
+                    "title": "x" * 600,
+                    "author": "y" * 300,
+                    "book_depot_url": "https://bookdepot.ca/" + "z" * 1000,
+                }
+            ),
+        )
+
+        book = Book.objects.get(isbn="9781111111111")
+        self.assertEqual((len(book.title), len(book.author)), (500, 255))
+        self.assertIsNone(book.book_depot_url)
+
+    def test_bad_records_are_skipped_and_reported(self):
+        out, err = self.run_import(
+            "feed.ndjson",
+            self.ndjson(
+                {"isbn": "9781111111111", "title": "Dune"},
+                "{not json",
+                ["9782222222222"],
+                {"isbn": "123", "title": "Short ISBN"},
+                {"isbn": "9783333333333", "stock": "12345678901"},
+                {"isbn": "9784444444444", "stock": "9999999999"},
+            ),
+        )
+
+        self.assertIn("1 inserted", out)
+        self.assertIn("5 skipped", out)
+        self.assertEqual(list(Book.objects.values_list("isbn", flat=True)), ["9781111111111"])
+        self.assertIn("Skipped record 2: not a JSON object", err)
+        self.assertIn("Skipped record 4: invalid ISBN '123'", err)
+        self.assertIn("Skipped record 6: invalid stock '9999999999'", err)
+
+
+class ImportBooksRerunTests(ImportMixin, TransactionTestCase):
+    # Geçici tablolar commit'te siliniyor; her içe aktarma kendi
+    # transaction'ında çalışsın
+
+    def test_enriched_book_keeps_its_full_title(self):
+        record = {"isbn": "9781111111111", "title": "Dune: The Desert...", "stock": 7}
+        self.run_import("feed.ndjson", self.ndjson(record))
+        Book.objects.update(title="Dune: The Desert Planet", enriched_at=timezone.now())
+
+        out, _ = self.run_import("feed.ndjson", self.ndjson(record))
+
+        self.assertIn("0 updated", out)
+        self.run_import("feed.ndjson", self.ndjson({**record, "stock": 3}))
+        book = Book.objects.get()
+        self.assertEqual(book.title, "Dune: The Desert Planet")
+        self.assertEqual((book.listing_title, book.stock), ("Dune: The Desert...", "3"))
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from books.models import Book
+from books.pagination import KeysetPagination
+
+
+def request(url="/api/books/"):
+    return Request(APIRequestFactory().get(url))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}", isbn=f"97800000000{i:02d}") for i in range(7)
+        )
+        # İki kitap aynı zamanda güncellenmiş; sıra id ile ayrılmalı
+        now = timezone.now()
+        for minutes, pk in enumerate(Book.objects.order_by("id").values_list("id", flat=True)):
+            Book.objects.filter(pk=pk).update(
+                updated_at=now - timedelta(minutes=min(minutes, 5))
+            )
+        cls.expected = list(Book.objects.order_by("-updated_at", "-id"))
+
+    def pages(self, page_size):
+        url = f"/api/books/?page_size={page_size}"
+        seen = []
+        while url:
+            paginator = KeysetPagination()
+            seen.append(paginator.paginate_queryset(Book.objects.all(), request(url)))
+            url = paginator.get_next_link()
+        return seen
+
+    def test_walks_every_row_once_in_order(self):
+        # Eşit updated_at'li son iki kitap ayrı sayfalara düşüyor
+        self.assertEqual(self.expected[5].updated_at, self.expected[6].updated_at)
+        pages = self.pages(page_size=3)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([book for page in pages for book in page], self.expected)
+
+    def test_last_full_page_has_no_next_link(self):
+        pages = self.pages(page_size=7)
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0], self.expected)
+
+    def test_page_size_is_clamped(self):
+        paginator = KeysetPagination()
+
+        self.assertEqual(paginator.get_page_size(request("/?page_size=0")), 1)
+        self.assertEqual(paginator.get_page_size(request("/?page_size=5000")), 200)
+        self.assertEqual(paginator.get_page_size(request("/?page_size=x")), 50)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        book = self.expected[0]
+
+        cursor = paginator.encode_cursor(book.updated_at, book.pk)
+
+        self.assertEqual(paginator.decode_cursor(cursor), (book.updated_at, book.pk))
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-base64!", "Zm9v", "YXwx"):
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                KeysetPagination().paginate_queryset(
+                    Book.objects.all(), request(f"/?cursor={cursor}")
+                )
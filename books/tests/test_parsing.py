@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from books.parsing import looks_blocked, parse_detail, parse_listing, parse_page_count
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class ParseListingTests(SimpleTestCase):
+    def setUp(self):
+        self.html = fixture("listing.html")
+
+    def test_backends_return_the_same_rows(self):
+        self.assertEqual(
+            parse_listing(self.html, backend="lxml"),
+            parse_listing(self.html, backend="bs4"),
+        )
+
+    def test_rows(self):
+        rows = parse_listing(self.html)
+
+        self.assertEqual(
+            [row["isbn"] for row in rows],
+            ["9781111111111", "9782222222222", "9783333333333"],
+        )
+        self.assertEqual(
+            rows[0],
+            {
+                "title": "The Long Way Home",
+                "author": "Jane Doe",
+                "format": "Paperback",
+                "book_depot_price": "$4.99",
+                "isbn": "9781111111111",
+                "stock": "12",
+                "book_depot_url": "https://bookdepot.ca/Store/Details/1001/the-long-way-home",
+            },
+        )
+
+    def test_discounted_price_and_link_quantity(self):
+        row = parse_listing(self.html)[1]
+
+        self.assertEqual(row["title"], "A Very Long Title That Gets Cut...")
+        self.assertEqual(row["book_depot_price"], "$6.49")
+        self.assertEqual(row["stock"], "+10000")
+
+    def test_price_without_strong_falls_back_to_dollar_span(self):
+        row = parse_listing(self.html)[2]
+
+        self.assertEqual(row["book_depot_price"], "$2.00")
+        self.assertEqual(row["author"], "Author not found")
+
+    def test_empty_page(self):
+        for backend in ("lxml", "bs4"):
+            with self.subTest(backend=backend):
+                self.assertEqual(parse_listing("<html><body></body></html>", backend), [])
+        self.assertEqual(parse_listing("", "lxml"), [])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            parse_listing(self.html, backend="regex")
+
+
+class ParseDetailTests(SimpleTestCase):
+    def test_fields_come_from_the_product_block(self):
+        self.assertEqual(
+            parse_detail(fixture("detail.html")),
+            {
+                "isbn": "9782222222222",
+                "title": "A Very Long Title That Gets Cut Short on the Listing",
+                "publisher": "Harbor Press",
+                "category": "Fiction / Literary",
+                "page_count": 352,
+                "description": "A quiet story about a long road and the people met along it.",
+            },
+        )
+
+    def test_page_without_a_product_block(self):
+        empty = dict.fromkeys(
+            ("isbn", "title", "publisher", "category", "page_count", "description")
+        )
+        page = (
+            '<html><head><meta name="description" content="Discount books"></head>'
+            "<body><h1>Page not found</h1><p>ISBN: 9781111111111</p></body></html>"
+        )
+        self.assertEqual(parse_detail(page), empty)
+        self.assertEqual(parse_detail(""), empty)
+
+
+class ParsePageCountTests(SimpleTestCase):
+    def test_highest_page_link(self):
+        self.assertEqual(parse_page_count(fixture("listing.html")), 412)
+
+    def test_no_pagination(self):
+        self.assertIsNone(parse_page_count("<html><body></body></html>"))
+        self.assertIsNone(parse_page_count(""))
+
+
+class LooksBlockedTests(SimpleTestCase):
+    def test_challenge_page(self):
+        self.assertTrue(looks_blocked("<title>Just a moment...</title>"))
+        self.assertFalse(looks_blocked(fixture("listing.html")))
+        self.assertFalse(looks_blocked(""))
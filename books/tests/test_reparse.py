@@ -0,0 +1,90 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book, BookPriceSnapshot
+from books.tests.test_parsing import fixture
+from scraper.archive import store_html
+from scraper.models import ArchivedPage, ScrapeRun
+
+
+class ReparseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(SCRAPER_ARCHIVE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.fetched_at = timezone.now() - timedelta(days=1)
+
+    def archived_run(self, kind=ScrapeRun.Kind.CATALOG, html=None):
+        run = ScrapeRun.objects.create(kind=kind)
+        digest, size, compressed_size = store_html(html or fixture("listing.html"))
+        ArchivedPage.objects.create(
+            run=run,
+            page_number=1,
+            fetched_at=self.fetched_at,
+            sha256=digest,
+            size=size,
+            compressed_size=compressed_size,
+        )
+        return run
+
+    def reparse(self, *args):
+        out = StringIO()
+        with mock.patch("books.writer.request_details") as request_details:
+            call_command("reparse", "--workers", "1", *args, stdout=out)
+        request_details.assert_not_called()
+        return out.getvalue()
+
+    def test_replay_inserts_books_dated_by_the_page(self):
+        self.archived_run()
+
+        self.reparse()
+
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(
+            set(BookPriceSnapshot.objects.values_list("recorded_at", flat=True)),
+            {self.fetched_at},
+        )
+
+    def test_replay_does_not_roll_back_a_newer_price(self):
+        self.archived_run()
+        book = Book.objects.create(
+            isbn="9781111111111", title="The Long Way Home", book_depot_price="3.99"
+        )
+
+        out = self.reparse()
+
+        self.assertIn("newer in the database 1", out)
+        book.refresh_from_db()
+        self.assertEqual(book.book_depot_price, Decimal("3.99"))
+        self.assertFalse(BookPriceSnapshot.objects.filter(book=book).exists())
+
+    def test_replay_updates_books_older_than_the_page(self):
+        self.archived_run()
+        Book.objects.create(
+            isbn="9781111111111", title="The Long Way Home", book_depot_price="3.99"
+        )
+        Book.objects.update(updated_at=self.fetched_at - timedelta(hours=1))
+
+        self.reparse()
+
+        self.assertEqual(
+            Book.objects.get(isbn="9781111111111").book_depot_price, Decimal("4.99")
+        )
+
+    def test_default_is_the_latest_catalog_run(self):
+        catalog = self.archived_run()
+        self.archived_run(kind=ScrapeRun.Kind.INCREMENTAL, html="<html></html>")
+
+        out = self.reparse("--dry-run")
+
+        self.assertIn(f"{catalog}: 1 pages", out)
+        self.assertFalse(Book.objects.exists())
@@ -0,0 +1,262 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from books.models import Book
+from books.parsing import parse_listing
+from books.tasks import (
+    catalog_lock,
+    crawl_catalog,
+    crawl_failed,
+    crawl_incremental,
+    fetch_page,
+    finalize_crawl,
+    page_lock,
+    page_summary,
+    parse_books,
+)
+from books.tests.test_parsing import fixture
+from scraper.models import PageFingerprint, ScrapePageResult, ScrapeRun
+from scraper.utils import PageTimer, page_fingerprint, save_page_fingerprints
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+@unittest.skipUnless(fakeredis, "needs fakeredis")
+class CatalogCrawlFailureTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("shared.locks.get_redis", return_value=fakeredis.FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("books.tasks.discover_page_count", return_value=3)
+    @mock.patch("books.tasks.chord")
+    def test_chord_callback_has_an_errback(self, chord, discover_page_count):
+        result = crawl_catalog.apply(kwargs={"page_size": 20, "chunk_size": 2}).get()
+
+        callback = chord.return_value.call_args.args[0]
+        (errback,) = callback.options["link_error"]
+        self.assertEqual(errback.task, "books.tasks.crawl_failed")
+        self.assertEqual(errback.kwargs["run_id"], result["run_id"])
+        self.assertTrue(errback.immutable)
+
+    def test_crawl_failed_closes_the_run_and_frees_the_lock(self):
+        run = ScrapeRun.objects.create(kind=ScrapeRun.Kind.CATALOG, task_id="crawl")
+        lock = catalog_lock(20)
+        lock.reserve("crawl")
+
+        crawl_failed("crawl", page_size=20, run_id=run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, ScrapeRun.Status.FAILED)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(lock.reserve("next"), "next")
+
+
+class FinalizeCrawlTests(TestCase):
+    def test_aborted_subtask_fails_the_run(self):
+        run = ScrapeRun.objects.create(kind=ScrapeRun.Kind.CATALOG)
+        aborted = {**page_summary(3, failed=True), "aborted": "5 pages in a row failed"}
+
+        summary = finalize_crawl([page_summary(1, books=20), aborted], 0, run_id=run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual(summary["aborted"], ["5 pages in a row failed"])
+        self.assertEqual(run.status, ScrapeRun.Status.FAILED)
+        self.assertEqual((run.pages, run.books, run.failed_pages), (1, 20, [3]))
+
+    def test_finished_run(self):
+        run = ScrapeRun.objects.create(kind=ScrapeRun.Kind.CATALOG)
+
+        finalize_crawl([page_summary(1, books=20)], 0, run_id=run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, ScrapeRun.Status.FINISHED)
+
+
+@unittest.skipUnless(fakeredis, "needs fakeredis")
+class ScrapePagePipelineTests(TestCase):
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        overridden = override_settings(SCRAPER_ARCHIVE_DIR=archive_dir.name)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("shared.locks.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.run = ScrapeRun.objects.create(kind=ScrapeRun.Kind.PAGE, task_id="fetch")
+        self.lock = page_lock(1, 20)
+        self.lock.reserve("fetch")
+
+    def payload(self, html):
+        timer = PageTimer(1)
+        timer.ready = True
+        return {
+            "page_number": 1,
+            "page_size": 20,
+            "run_id": self.run.pk,
+            "owner": "fetch",
+            "html": html,
+            "timer": timer.as_dict(),
+        }
+
+    def test_fetch_page_sends_the_html_and_extends_the_lock(self):
+        def fetch_listing(page_number, page_size, timer):
+            timer.ready = True
+            return "<html></html>"
+
+        self.lock.release("fetch")
+        with mock.patch("books.tasks.fetch_listing", side_effect=fetch_listing):
+            payload = fetch_page.apply(args=[1], task_id="fetch").get()
+
+        self.assertEqual(payload["html"], "<html></html>")
+        self.assertGreater(self.redis.ttl(self.lock.key), settings.SCRAPER_LOCK_TTL)
+
+    def test_retry_keeps_the_lock_while_it_waits(self):
+        with (
+            mock.patch("books.tasks.fetch_listing", return_value=None),
+            mock.patch.object(fetch_page, "retry", side_effect=Retry()),
+        ):
+            result = fetch_page.apply(
+                args=[1], kwargs={"run_id": self.run.pk}, task_id="fetch"
+            )
+
+        self.assertEqual(result.state, "RETRY")
+        self.assertGreater(self.redis.ttl(self.lock.key), settings.SCRAPER_LOCK_TTL)
+        self.assertEqual(self.lock.reserve("other"), "fetch")
+
+    def test_page_failing_every_retry_fails_the_run(self):
+        with mock.patch("books.tasks.fetch_listing", return_value=None):
+            summary = fetch_page.apply(
+                args=[1],
+                kwargs={"run_id": self.run.pk},
+                task_id="fetch",
+                retries=settings.SCRAPER_PAGE_MAX_RETRIES,
+            ).get()
+
+        self.assertEqual(summary, page_summary(1, failed=True))
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, ScrapeRun.Status.FAILED)
+        self.assertEqual(self.lock.reserve("next"), "next")
+
+    def test_parse_books_hands_rows_on_and_extends_the_lock(self):
+        payload = parse_books(self.payload(fixture("listing.html")))
+
+        self.assertNotIn("html", payload)
+        self.assertEqual(len(payload["books"]), 3)
+        self.assertIsNotNone(payload["timer"]["archived"])
+        self.assertGreater(self.redis.ttl(self.lock.key), settings.SCRAPER_LOCK_TTL)
+
+    def test_parse_error_fails_the_page(self):
+        with mock.patch("books.tasks.parse_page", side_effect=ValueError("broken")):
+            summary = parse_books(self.payload("<html></html>"))
+
+        self.assertEqual(summary, page_summary(1, failed=True))
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, ScrapeRun.Status.FAILED)
+        self.assertEqual(
+            ScrapePageResult.objects.get().failure, ScrapePageResult.Failure.ERROR
+        )
+        self.assertEqual(self.lock.reserve("next"), "next")
+
+
+@unittest.skipUnless(fakeredis, "needs fakeredis")
+class IncrementalCrawlTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("shared.locks.get_redis", return_value=fakeredis.FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("books.writer.request_details")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Her sayfada farklı ISBN'ler
+        listing = parse_listing(fixture("listing.html"))
+        self.pages = {
+            page_number: [
+                {**row, "isbn": f"9780000{page_number:03d}{index:03d}"}
+                for index, row in enumerate(listing)
+            ]
+            for page_number in range(1, 6)
+        }
+        self.visited = []
+
+    def crawl_pages(self, start_page, end_page, page_size, on_page, timers, archive):
+        # CatalogCrawler gibi: on_page'in döndürdüğü sayfadan sonra duruyor
+        stop_after = None
+        for page_number, books in self.pages.items():
+            if stop_after is not None and page_number > stop_after:
+                break
+            self.visited.append(page_number)
+            stop_after = on_page(page_number, books) or stop_after
+        return {"pages": len(self.visited), "failed_pages": []}
+
+    def crawl(self, **kwargs):
+        with mock.patch("books.tasks.crawl_pages", side_effect=self.crawl_pages):
+            return crawl_incremental.apply(kwargs={"page_size": 20, **kwargs}).get()
+
+    def test_stops_after_consecutive_unchanged_pages(self):
+        save_page_fingerprints(
+            20,
+            {
+                page_number: page_fingerprint(books)
+                for page_number, books in self.pages.items()
+                if page_number != 1
+            },
+        )
+
+        summary = self.crawl(unchanged_pages=2)
+
+        self.assertEqual(self.visited, [1, 2, 3])
+        self.assertEqual(summary["changed"], 3)
+        # Yalnızca parmak izi değişen ilk sayfa yazıldı
+        self.assertEqual(
+            set(Book.objects.values_list("isbn", flat=True)),
+            {row["isbn"] for row in self.pages[1]},
+        )
+        self.assertEqual(
+            PageFingerprint.objects.get(page_size=20, page_number=1).fingerprint,
+            page_fingerprint(self.pages[1]),
+        )
+        run = ScrapeRun.objects.get()
+        self.assertEqual(run.kind, ScrapeRun.Kind.INCREMENTAL)
+        self.assertEqual(run.status, ScrapeRun.Status.FINISHED)
+
+    def test_known_rows_on_a_changed_page_count_as_unchanged(self):
+        outdated = dict.fromkeys(self.pages, "outdated")
+        save_page_fingerprints(20, outdated)
+        self.crawl(unchanged_pages=2)
+        self.assertEqual(Book.objects.count(), 15)
+        save_page_fingerprints(20, outdated)
+        self.visited = []
+
+        summary = self.crawl(unchanged_pages=2)
+
+        self.assertEqual(self.visited, [1, 2])
+        self.assertEqual(summary["changed"], 0)
+        self.assertEqual(
+            list(
+                PageFingerprint.objects.filter(fingerprint="outdated")
+                .order_by("page_number")
+                .values_list("page_number", flat=True)
+            ),
+            [3, 4, 5],
+        )
+
+    @mock.patch("books.tasks.start_catalog_crawl")
+    def test_without_fingerprints_runs_a_full_sweep(self, start_catalog_crawl):
+        start_catalog_crawl.return_value = (mock.Mock(id="catalog"), True)
+
+        summary = self.crawl()
+
+        self.assertEqual(summary, {"full_sweep": True, "task_id": "catalog"})
+        start_catalog_crawl.assert_called_once_with(20)
+        self.assertEqual(self.visited, [])
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import unittest
+
+from django.test import SimpleTestCase, override_settings
+
+from books.throttle import BLOCKED, OK, ScrapeThrottle
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+@unittest.skipUnless(fakeredis, "needs fakeredis")
+@override_settings(
+    SCRAPER_RATE_LIMIT=1000,
+    SCRAPER_RATE_BURST=1000,
+    SCRAPER_CONCURRENCY_INITIAL=1,
+    SCRAPER_CONCURRENCY_MIN=1,
+    SCRAPER_CONCURRENCY_MAX=4,
+    SCRAPER_AIMD_INCREASE=1,
+    SCRAPER_AIMD_DECREASE=0.5,
+    SCRAPER_AIMD_COOLDOWN=0,
+    SCRAPER_SLOT_POLL_INTERVAL=0.01,
+)
+class ScrapeThrottleTests(SimpleTestCase):
+    def setUp(self):
+        self.throttle = ScrapeThrottle("test", client=fakeredis.FakeRedis())
+
+    def leases(self):
+        return self.throttle.client.zcard(self.throttle.leases_key)
+
+    def test_page_holds_a_slot_until_exit(self):
+        with self.throttle.page():
+            self.assertEqual(self.leases(), 1)
+        self.assertEqual(self.leases(), 0)
+
+    def test_aimd_feedback(self):
+        self.assertEqual(self.throttle.report(OK), 2)
+        self.assertEqual(self.throttle.report(OK), 2.5)
+        self.assertEqual(self.throttle.report(BLOCKED), 1.25)
+
+    def test_page_async_calls_redis_off_the_event_loop(self):
+        threads = []
+        try_acquire = self.throttle._try_acquire
+
+        def recording_try_acquire(lease):
+            threads.append(threading.current_thread())
+            return try_acquire(lease)
+
+        self.throttle._try_acquire = recording_try_acquire
+
+        async def crawl():
+            async with self.throttle.page_async():
+                return self.leases()
+
+        self.assertEqual(asyncio.run(crawl()), 1)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertEqual(self.leases(), 0)
+
+    def test_page_async_waits_for_a_free_slot(self):
+        async def crawl():
+            order = []
+
+            async def tab(name):
+                async with self.throttle.page_async():
+                    order.append(f"{name} in")
+                    await asyncio.sleep(0.05)
+                    order.append(f"{name} out")
+
+            await asyncio.gather(tab("a"), tab("b"))
+            return order
+
+        # Eşzamanlılık sınırı 1: ikinci sekme ilki çıkmadan girmemeli
+        self.assertEqual(asyncio.run(crawl()), ["a in", "a out", "b in", "b out"])
@@ -0,0 +1,161 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from books.enrich import record_failures, save_details
+from books.models import Book, BookPriceSnapshot
+from books.writer import BookWriter
+
+
+def row(isbn="9780000000001", price="$4.99", stock="12", title="A Book"):
+    return {
+        "title": title,
+        "author": "An Author",
+        "format": "Paperback",
+        "book_depot_price": price,
+        "isbn": isbn,
+        "stock": stock,
+        "book_depot_url": f"https://bookdepot.ca/Store/Details/{isbn}",
+    }
+
+
+class BookWriterTests(TestCase):
+    def test_inserts_new_books_with_a_snapshot(self):
+        with BookWriter() as writer:
+            writer.extend([row(), row("9780000000002", "$1.00", "+10000")])
+
+        self.assertEqual((writer.inserted, writer.updated, writer.unchanged), (2, 0, 0))
+        book = Book.objects.get(isbn="9780000000002")
+        self.assertEqual(book.book_depot_price, Decimal("1.00"))
+        self.assertEqual((book.stock_quantity, book.stock_at_least), (10000, True))
+        self.assertEqual(BookPriceSnapshot.objects.count(), 2)
+
+    def test_skips_unchanged_books(self):
+        with BookWriter() as writer:
+            writer.add(row())
+        updated_at = Book.objects.get().updated_at
+
+        with BookWriter() as writer:
+            writer.add(row())
+
+        self.assertEqual((writer.inserted, writer.updated, writer.unchanged), (0, 0, 1))
+        self.assertEqual(Book.objects.get().updated_at, updated_at)
+        self.assertEqual(BookPriceSnapshot.objects.count(), 1)
+
+    def test_updates_moved_price_and_records_it(self):
+        with BookWriter() as writer:
+            writer.add(row())
+        with BookWriter() as writer:
+            writer.add(row(price="$3.99"))
+
+        self.assertEqual((writer.inserted, writer.updated), (0, 1))
+        self.assertEqual(Book.objects.get().book_depot_price, Decimal("3.99"))
+        self.assertEqual(
+            list(
+                BookPriceSnapshot.objects.order_by("id").values_list(
+                    "book_depot_price", flat=True
+                )
+            ),
+            [Decimal("4.99"), Decimal("3.99")],
+        )
+
+    def test_unreadable_price_keeps_the_stored_one(self):
+        with BookWriter() as writer:
+            writer.add(row())
+        with BookWriter() as writer:
+            writer.add(row(price="Price not found", stock="3"))
+
+        self.assertEqual(writer.price_errors, 1)
+        book = Book.objects.get()
+        self.assertEqual(book.book_depot_price, Decimal("4.99"))
+        self.assertEqual(book.stock_quantity, 3)
+
+    def test_last_row_of_a_batch_wins(self):
+        with BookWriter() as writer:
+            writer.extend([row(price="$1.00"), row(price="$2.00")])
+
+        self.assertEqual(writer.inserted, 1)
+        self.assertEqual(Book.objects.get().book_depot_price, Decimal("2.00"))
+
+    def test_flushes_buffered_rows_when_the_block_raises(self):
+        with self.assertRaises(RuntimeError):
+            with BookWriter(batch_size=100) as writer:
+                writer.add(row())
+                raise RuntimeError("crawl failed")
+
+        self.assertTrue(Book.objects.filter(isbn="9780000000001").exists())
+
+
+class BookWriterTitleTests(TestCase):
+    def setUp(self):
+        with BookWriter() as writer:
+            writer.add(row(title="A Very Long Title That Gets Cut..."))
+        Book.objects.update(
+            title="A Very Long Title That Gets Cut Short on the Listing",
+            enriched_at=timezone.now(),
+        )
+
+    def test_enriched_book_keeps_its_full_title(self):
+        with BookWriter() as writer:
+            writer.add(row(title="A Very Long Title That Gets Cut..."))
+
+        self.assertEqual((writer.unchanged, writer.detail_requests), (1, 0))
+        self.assertEqual(
+            Book.objects.get().title,
+            "A Very Long Title That Gets Cut Short on the Listing",
+        )
+
+    def test_changed_listing_title_is_enriched_again(self):
+        with BookWriter() as writer:
+            writer.add(row(title="A Very Long Title, Second Edition"))
+
+        self.assertEqual((writer.updated, writer.detail_requests), (1, 1))
+        book = Book.objects.get()
+        self.assertEqual(book.listing_title, "A Very Long Title, Second Edition")
+        self.assertEqual(
+            book.title, "A Very Long Title That Gets Cut Short on the Listing"
+        )
+
+    def test_unenriched_book_takes_the_listing_title(self):
+        Book.objects.update(enriched_at=None)
+
+        with BookWriter() as writer:
+            writer.add(row(title="A Very Long Title That Gets Cut..."))
+
+        self.assertEqual(writer.updated, 1)
+        self.assertEqual(Book.objects.get().title, "A Very Long Title That Gets Cut...")
+
+
+@override_settings(SCRAPER_ENRICH_MAX_FAILURES=3)
+class BookWriterEnrichFailureTests(TestCase):
+    def setUp(self):
+        with BookWriter() as writer:
+            writer.add(row())
+
+    def test_failing_book_is_queued_until_the_limit(self):
+        Book.objects.update(enrich_failures=2)
+        with BookWriter() as writer:
+            writer.add(row())
+        self.assertEqual(writer.detail_requests, 1)
+
+        record_failures(["9780000000001"])
+        with BookWriter() as writer:
+            writer.add(row())
+        self.assertEqual(writer.detail_requests, 0)
+
+    def test_changed_listing_is_queued_again(self):
+        Book.objects.update(enrich_failures=3)
+
+        with BookWriter() as writer:
+            writer.add(row(title="A Book, Revised"))
+
+        self.assertEqual(writer.detail_requests, 1)
+
+    def test_success_resets_the_count(self):
+        Book.objects.update(enrich_failures=3)
+
+        save_details({"9780000000001": {"publisher": "Harbor Press"}})
+
+        book = Book.objects.get()
+        self.assertEqual((book.enrich_failures, book.publisher), (0, "Harbor Press"))
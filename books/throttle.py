@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from redis.exceptions import RedisError
+
+from shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+BLOCKED = "blocked"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+KEY_PREFIX = "scraper:throttle"
+
+# Saniyede `rate` token dolan, en çok `burst` token tutan kova.
+# Token varsa 0, yoksa kaç saniye sonra olacağını döner.
+TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+# Süresi dolan kiralar (ölen worker'lar) düşülür; limitin altındaysak yeni
+# kira eklenir.
+ACQUIRE_SLOT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit')) or tonumber(ARGV[3])
+if redis.call('ZCARD', KEYS[1]) < math.floor(limit) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# AIMD: her başarılı sayfada limit += increase / limit (yaklaşık her
+# "limit" sayfada bir +increase), engel/timeout'ta cooldown'da bir kez
+# limit *= decrease.
+FEEDBACK = """
+local ok = tonumber(ARGV[1])
+local initial = tonumber(ARGV[2])
+local min_limit = tonumber(ARGV[3])
+local max_limit = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local limit = tonumber(redis.call('HGET', KEYS[1], 'limit')) or initial
+if ok == 1 then
+    limit = math.min(max_limit, limit + tonumber(ARGV[5]) / limit)
+else
+    local decreased_at = tonumber(redis.call('HGET', KEYS[1], 'decreased_at')) or 0
+    if now - decreased_at >= tonumber(ARGV[7]) then
+        limit = math.max(min_limit, limit * tonumber(ARGV[6]))
+        redis.call('HSET', KEYS[1], 'decreased_at', now)
+    end
+end
+redis.call('HSET', KEYS[1], 'limit', limit)
+return tostring(limit)
+"""
+
+
+class ScrapeThrottle:
+    """
+    Paces Book Depot page loads across every worker process.
+
+    Two pieces of state live in Redis: a token bucket capping page loads at
+    ``SCRAPER_RATE_LIMIT`` per second, and an AIMD concurrency limit on
+    pages in flight. The limit grows additively while pages come back with
+    books and is cut multiplicatively (at most once per
+    ``SCRAPER_AIMD_COOLDOWN`` seconds) on blocks and timeouts. In-flight
+    pages are leases with a TTL, so a killed worker does not hold its slot.
+
+    If Redis is unreachable the throttle lets pages through unpaced rather
+    than stopping the crawl.
+    """
+
+    def __init__(self, name="bookdepot", client=None):
+        self.client = client or get_redis()
+        self.bucket_key = f"{KEY_PREFIX}:{name}:bucket"
+        self.leases_key = f"{KEY_PREFIX}:{name}:leases"
+        self.state_key = f"{KEY_PREFIX}:{name}:state"
+        self._token_bucket = self.client.register_script(TOKEN_BUCKET)
+        self._acquire_slot = self.client.register_script(ACQUIRE_SLOT)
+        self._feedback = self.client.register_script(FEEDBACK)
+
+    @contextmanager
+    def page(self):
+        """Blocks until a page may be loaded; the slot is freed on exit."""
+        lease = self._wait(time.sleep)
+        try:
+            yield
+        finally:
+            self._release(lease)
+
+    @asynccontextmanager
+    async def page_async(self):
+        """
+        Async twin of ``page``. The Redis calls run in worker threads so the
+        crawler's event loop keeps serving the other tabs meanwhile.
+        """
+        lease = uuid.uuid4().hex
+        try_acquire = sync_to_async(self._try_acquire, thread_sensitive=False)
+        while (delay := await try_acquire(lease)) > 0:
+            await asyncio.sleep(delay)
+        try:
+            yield
+        finally:
+            await sync_to_async(self._release, thread_sensitive=False)(lease)
+
+    def report(self, outcome):
+        """Feeds a page's outcome (``OK``, ``BLOCKED``, ``TIMEOUT``...) back to AIMD."""
+        try:
+            limit = float(
+                self._feedback(
+                    keys=[self.state_key],
+                    args=[
+                        1 if outcome == OK else 0,
+                        settings.SCRAPER_CONCURRENCY_INITIAL,
+                        settings.SCRAPER_CONCURRENCY_MIN,
+                        settings.SCRAPER_CONCURRENCY_MAX,
+                        settings.SCRAPER_AIMD_INCREASE,
+                        settings.SCRAPER_AIMD_DECREASE,
+                        settings.SCRAPER_AIMD_COOLDOWN,
+                    ],
+                )
+            )
+        except RedisError as e:
+            logger.warning("Throttle feedback failed: %s", e)
+            return None
+        if outcome != OK:
+            logger.info("Page %s, concurrency limit now %.1f", outcome, limit)
+        return limit
+
+    async def report_async(self, outcome):
+        return await sync_to_async(self.report, thread_sensitive=False)(outcome)
+
+    def _wait(self, sleep):
+        lease = uuid.uuid4().hex
+        while (delay := self._try_acquire(lease)) > 0:
+            sleep(delay)
+        return lease
+
+    def _try_acquire(self, lease):
+        """Takes a slot and a token, or returns how long to wait before retrying."""
+        try:
+            if not self._acquire_slot(
+                keys=[self.leases_key, self.state_key],
+                args=[
+                    lease,
+                    settings.SCRAPER_PAGE_LEASE_TIMEOUT,
+                    settings.SCRAPER_CONCURRENCY_INITIAL,
+                ],
+            ):
+                return settings.SCRAPER_SLOT_POLL_INTERVAL
+
+            wait = float(
+                self._token_bucket(
+                    keys=[self.bucket_key],
+                    args=[settings.SCRAPER_RATE_LIMIT, settings.SCRAPER_RATE_BURST],
+                )
+            )
+        except RedisError as e:
+            logger.warning("Throttle unavailable, not pacing this page: %s", e)
+            return 0
+
+        if wait > 0:
+            # Token gelene kadar slotu başkasına bırak
+            self._release(lease)
+        return wait
+
+    def _release(self, lease):
+        try:
+            self.client.zrem(self.leases_key, lease)
+        except RedisError as e:
+            logger.warning("Could not release throttle slot: %s", e)
+
+
+def failure_outcome(exc):
+    """Maps an exception raised while loading a page to a throttle outcome."""
+    return TIMEOUT if isinstance(exc, PlaywrightTimeoutError) else ERROR
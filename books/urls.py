@@ -0,0 +1,16 @@
+from django.urls import path
+from .views import (
+    BookDetailView,
+    BookExportView,
+    BookListView,
+    BookSearchView,
+    BookStatsView,
+)
+
+urlpatterns = [
+    path("", BookListView.as_view(), name="book-list"),
+    path("search/", BookSearchView.as_view(), name="book-search"),
+    path("stats/", BookStatsView.as_view(), name="book-stats"),
+    path("export/", BookExportView.as_view(), name="book-export"),
+    path("<str:isbn>/", BookDetailView.as_view(), name="book-detail"),
+]
@@ -1,3 +1,113 @@
-from django.shortcuts import render
+from django.db.models import Avg, Count, Max, Min, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .cache import CachedCatalogMixin
+from .export import CONTENT_TYPES, STREAMERS, export_rows, parquet_available
+from .filters import filter_books
+from .models import Book
+from .pagination import KeysetPagination
+from .search import ranked, search_books
+from .serializers import DETAIL_FIELDS, LIST_FIELDS, BookDetailSerializer, BookSerializer
+
+
+class BookListView(CachedCatalogMixin, generics.ListAPIView):
+    """
+    ``GET /api/books/`` with the filters of ``books.filters.filter_books``.
+    (``book_format`` because ``format`` is taken by DRF's format override.)
+    """
+
+    permission_classes = [AllowAny]
+    serializer_class = BookSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return filter_books(Book.objects.only(*LIST_FIELDS), self.request.query_params)
+
+
+class BookDetailView(CachedCatalogMixin, generics.RetrieveAPIView):
+    """``GET /api/books/<isbn>/``"""
+
+    permission_classes = [AllowAny]
+    serializer_class = BookDetailSerializer
+    queryset = Book.objects.only(*DETAIL_FIELDS)
+    lookup_field = "isbn"
+
+
+class BookSearchView(CachedCatalogMixin, generics.ListAPIView):
+    """``GET /api/books/search/?q=<term>&limit=20``, best matches first."""
+
+    permission_classes = [AllowAny]
+    serializer_class = BookSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        term = self.request.query_params.get("q", "").strip()
+        if not term:
+            raise ValidationError({"q": "This parameter is required."})
+
+        try:
+            limit = int(self.request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, self.max_limit))
+
+        queryset = search_books(Book.objects.only(*LIST_FIELDS), term)
+        return ranked(queryset)[:limit]
+
+
+class BookStatsView(CachedCatalogMixin, generics.RetrieveAPIView):
+    """``GET /api/books/stats/``: catalog-wide aggregates in one query."""
+
+    permission_classes = [AllowAny]
+
+    def retrieve(self, request, *args, **kwargs):
+        stats = Book.objects.aggregate(
+            total=Count("id"),
+            in_stock=Count("id", filter=Q(stock_quantity__gt=0)),
+            min_price=Min("book_depot_price"),
+            avg_price=Avg("book_depot_price"),
+            max_price=Max("book_depot_price"),
+            last_updated=Max("updated_at"),
+        )
+        for name in ("min_price", "avg_price", "max_price"):
+            if stats[name] is not None:
+                stats[name] = str(round(stats[name], 2))
+        return Response(stats)
+
+
+class BookExportView(APIView):
+    """
+    ``GET /api/books/export/?file_format=csv|ndjson|parquet`` streams the
+    whole (filtered) catalog. ``since=<ISO datetime>`` limits it to rows
+    updated since then; ``X-Export-Watermark`` is the value to pass next
+    time.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in STREAMERS:
+            raise ValidationError({"file_format": f"One of: {', '.join(STREAMERS)}."})
+        if file_format == "parquet" and not parquet_available():
+            raise ValidationError({"file_format": "Parquet export needs pyarrow."})
+
+        # Alınma anından sonra değişenler bir sonraki export'a kalıyor
+        watermark = timezone.now()
+        queryset = filter_books(Book.objects.all(), request.query_params)
+
+        response = StreamingHttpResponse(
+            STREAMERS[file_format](export_rows(queryset)),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="books.{file_format}"'
+        response["X-Export-Watermark"] = watermark.isoformat()
+        return response
@@ -0,0 +1,243 @@
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .enrich import request_details
+from .models import Book, BookPriceSnapshot
+from shared.utils import normalize_prices, parse_stock
+
+logger = logging.getLogger(__name__)
+
+UPSERT_FIELDS = (
+    "title",
+    "listing_title",
+    "author",
+    "format",
+    "book_depot_price",
+    "stock",
+    "stock_quantity",
+    "stock_at_least",
+    "book_depot_url",
+)
+HISTORY_FIELDS = ("book_depot_price", "stock")
+
+
+def book_values(row, price):
+    """
+    Maps a parsed row and its price from ``normalize_prices`` to ``Book``
+    field values as they are stored.
+    """
+    stock_quantity, stock_at_least = parse_stock(row["stock"])
+    return {
+        "title": row["title"],
+        "listing_title": row["title"],
+        "author": row["author"],
+        "format": row["format"],
+        "book_depot_price": price,
+        "stock": row["stock"],
+        "stock_quantity": stock_quantity,
+        "stock_at_least": stock_at_least,
+        "book_depot_url": row.get("book_depot_url"),
+    }
+
+
+class BookWriter:
+    """
+    Buffers parsed rows and upserts them in batches.
+
+    Each flush reads the current values of the buffered ISBNs with one
+    query and writes only new or changed books with a single
+    ``INSERT ... ON CONFLICT (isbn) DO UPDATE``, so unchanged books keep
+    their ``updated_at``. New books and books whose price or stock moved
+    also get a ``BookPriceSnapshot``, and a flush that changes anything
+    bumps the catalog cache version. A price that cannot be read keeps the
+    stored one (or stays empty for a new book) and is counted in
+    ``price_errors``; so does a missing product URL. The listing's (often
+    truncated) title is kept in ``listing_title``; an enriched book keeps
+    the detail page's full ``title``.
+
+    New books, books whose listing title (compared with the stored
+    ``listing_title``) or URL changed, and books never enriched whose page
+    failed fewer than ``SCRAPER_ENRICH_MAX_FAILURES`` times are queued for
+    their detail page (``books.enrich``) once the transaction commits,
+    unless ``enrich`` is false; price and stock changes are not. Use as a
+    context manager to flush on exit, also when the block raises.
+
+    Rows replayed from the archive pass ``as_of``, the time their page was
+    fetched, to ``add``: a book saved after that is left alone (counted in
+    ``stale``) and price snapshots are dated ``as_of``.
+    """
+
+    def __init__(self, batch_size=None, enrich=True):
+        self.batch_size = batch_size or settings.BOOKS_WRITER_BATCH_SIZE
+        self.enrich = enrich
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.stale = 0
+        self.price_errors = 0
+        self.detail_requests = 0
+        self._buffer = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+            return
+        # Hata olsa da ayrıştırılmış satırlar kaybolmasın; bu ikinci yazım
+        # da başarısız olursa asıl hatayı gizlemesin
+        pending = len(self._buffer)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not save %s buffered books after an error.", pending)
+
+    @property
+    def changed(self):
+        return self.inserted + self.updated
+
+    def add(self, row, as_of=None):
+        # Aynı ISBN bir batch'te iki kez gelirse sonuncusu geçerli
+        self._buffer[row["isbn"]] = (row, as_of)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        """Writes the buffer and returns how many books were inserted or updated."""
+        if not self._buffer:
+            return 0
+
+        rows = [row for row, _ in self._buffer.values()]
+        as_of = {isbn: when for isbn, (_, when) in self._buffer.items() if when}
+        self._buffer = {}
+
+        prices, errors = normalize_prices([row["book_depot_price"] for row in rows])
+        values = {
+            row["isbn"]: book_values(row, price) for row, price in zip(rows, prices)
+        }
+        unpriced = {row["isbn"] for row, error in zip(rows, errors) if error}
+        if unpriced:
+            self.price_errors += len(unpriced)
+            logger.warning(
+                "Could not read the price of %s books, e.g. %s",
+                len(unpriced),
+                sorted(unpriced)[:5],
+            )
+
+        with transaction.atomic():
+            existing = {}
+            enriched = set()
+            # Detay sayfası defalarca açılamayan kitap her taramada yeniden
+            # kuyruğa girmesin
+            given_up = set()
+            stored_rows = Book.objects.filter(isbn__in=values.keys()).values_list(
+                "isbn", "enriched_at", "enrich_failures", "updated_at", *UPSERT_FIELDS
+            )
+            for isbn, enriched_at, failures, updated_at, *current in stored_rows:
+                # Arşivden gelen satır kitabın son kaydından eskiyse yazılmıyor
+                if isbn in as_of and updated_at > as_of[isbn]:
+                    del values[isbn]
+                    self.stale += 1
+                    continue
+                existing[isbn] = dict(zip(UPSERT_FIELDS, current))
+                if enriched_at is not None:
+                    enriched.add(isbn)
+                elif failures >= settings.SCRAPER_ENRICH_MAX_FAILURES:
+                    given_up.add(isbn)
+
+            for isbn, fields in values.items():
+                stored = existing.get(isbn)
+                if stored is None:
+                    continue
+                if isbn in unpriced:
+                    fields["book_depot_price"] = stored["book_depot_price"]
+                if fields["book_depot_url"] is None:
+                    fields["book_depot_url"] = stored["book_depot_url"]
+                if isbn in enriched:
+                    fields["title"] = stored["title"]
+
+            changed = [
+                Book(isbn=isbn, **fields)
+                for isbn, fields in values.items()
+                if existing.get(isbn) != fields
+            ]
+            if changed:
+                Book.objects.bulk_create(
+                    changed,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=["isbn"],
+                    update_fields=[*UPSERT_FIELDS, "updated_at"],
+                )
+                self._record_history(changed, existing, as_of)
+                transaction.on_commit(bump_catalog_version)
+
+            needs_details = [
+                isbn
+                for isbn, fields in values.items()
+                if fields["book_depot_url"]
+                and (
+                    isbn not in existing
+                    or (isbn not in enriched and isbn not in given_up)
+                    or fields["book_depot_url"] != existing[isbn]["book_depot_url"]
+                    or fields["listing_title"] != existing[isbn]["listing_title"]
+                )
+            ]
+            if needs_details and self.enrich:
+                self.detail_requests += len(needs_details)
+                # Kuyruk/broker hatası kaydedilmiş satırları geri almasın
+                transaction.on_commit(
+                    partial(request_details, needs_details), robust=True
+                )
+
+        inserted = sum(1 for book in changed if book.isbn not in existing)
+        self.inserted += inserted
+        self.updated += len(changed) - inserted
+        self.unchanged += len(values) - len(changed)
+        return len(changed)
+
+    def _record_history(self, changed, existing, as_of):
+        moved = [
+            book
+            for book in changed
+            if book.isbn not in existing
+            or any(
+                getattr(book, name) != existing[book.isbn][name]
+                for name in HISTORY_FIELDS
+            )
+        ]
+        if not moved:
+            return
+
+        # Çakışmada güncellenen satırların pk'si her veritabanında dönmüyor
+        missing = [book.isbn for book in moved if book.pk is None]
+        if missing:
+            ids = dict(
+                Book.objects.filter(isbn__in=missing).values_list("isbn", "id")
+            )
+            for book in moved:
+                if book.pk is None:
+                    book.pk = ids[book.isbn]
+
+        BookPriceSnapshot.objects.bulk_create(
+            [
+                BookPriceSnapshot(
+                    book_id=book.pk,
+                    book_depot_price=book.book_depot_price,
+                    stock=book.stock,
+                    recorded_at=as_of.get(book.isbn) or timezone.now(),
+                )
+                for book in moved
+            ],
+            batch_size=self.batch_size,
+        )
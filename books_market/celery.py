@@ -10,4 +10,7 @@ app = Celery('books_market')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks from all registered apps.
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Görev süreleri, kuyrukta bekleme ve retry metrikleri
+import shared.celery_metrics  # noqa: E402,F401
@@ -15,6 +15,7 @@ from pathlib import Path
 
 import dj_database_url
 from celery import Celery
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +43,190 @@ CELERY_BROKER_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("REDIS_URL", "redis://redis:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Kuyruklar: tarayıcı açan görevler (browser), HTML ayrıştırma (parse),
+# veritabanına yazma (persist) ve detay sayfaları (enrich) ayrı worker
+# profillerinde çalışıyor; bkz. docker-compose.yml
+CELERY_TASK_DEFAULT_QUEUE = "persist"
+CELERY_TASK_ROUTES = {
+    "books.tasks.fetch_page": {"queue": "browser"},
+    "books.tasks.crawl_books": {"queue": "browser"},
+    "books.tasks.crawl_incremental": {"queue": "browser"},
+    "books.tasks.crawl_catalog": {"queue": "browser"},
+    "books.tasks.parse_books": {"queue": "parse"},
+    "books.tasks.persist_books": {"queue": "persist"},
+    "books.tasks.finalize_crawl": {"queue": "persist"},
+    "books.tasks.crawl_failed": {"queue": "persist"},
+    "books.tasks.enrich_books": {"queue": "enrich"},
+    "books.tasks.prune_archived_pages": {"queue": "persist"},
+}
+# Görevler uzun: worker'lar birer birer alsın, iş bitince onaylasın
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+# acks_late görevleri bu süre onaylanmazsa yeniden dağıtılıyor; en uzun
+# tarama kadar olmalı (kopyaları görev kilitleri eliyor)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": int(
+        os.environ.get("CELERY_VISIBILITY_TIMEOUT", 6 * 60 * 60)
+    )
+}
+# A worker child is replaced after a task leaves it above this many KiB
+# resident (Chromium-heavy tasks leak); worker profiles may override it
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(
+    os.environ.get("CELERY_WORKER_MAX_MEMORY_PER_CHILD", 500 * 1024)
+)
+CELERY_BEAT_SCHEDULE = {
+    # Yeni gelenler için sık, kısa taramalar
+    "crawl-incremental": {
+        "task": "books.tasks.crawl_incremental",
+        "schedule": crontab(minute=0),
+    },
+    # Arada kaçan değişiklikler için günde bir tam tarama
+    "crawl-catalog": {
+        "task": "books.tasks.crawl_catalog",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    # Saklama süresi dolan ve hiçbir run'ın göstermediği arşiv sayfaları
+    "prune-archive": {
+        "task": "books.tasks.prune_archived_pages",
+        "schedule": crontab(minute=0, hour=5),
+    },
+}
+
+# Cache Configuration
+# Redis zaten Celery için ayakta; katalog yanıtları da orada tutuluyor
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get(
+            "CACHE_URL", os.environ.get("REDIS_URL", "redis://redis:6379/0")
+        ),
+        "KEY_PREFIX": "books_market",
+    }
+}
+# Cached catalog responses are invalidated by version bumps; this only
+# bounds how long orphaned entries linger
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 60))
+
+# Metrics Configuration
+# /metrics requires "Authorization: Bearer <token>"; unset keeps it forbidden
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Scraper Configuration
+# Number of Chromium instances each worker process keeps warm
+SCRAPER_BROWSER_POOL_SIZE = int(os.environ.get("SCRAPER_BROWSER_POOL_SIZE", 1))
+# A browser is relaunched after serving this many pages
+SCRAPER_BROWSER_MAX_PAGES = int(os.environ.get("SCRAPER_BROWSER_MAX_PAGES", 50))
+# Pages kept in flight by the async crawler, and contexts they are spread over
+SCRAPER_CRAWL_CONCURRENCY = int(os.environ.get("SCRAPER_CRAWL_CONCURRENCY", 8))
+SCRAPER_CRAWL_CONTEXTS = int(os.environ.get("SCRAPER_CRAWL_CONTEXTS", 2))
+# "lxml" (fast) or "bs4" (reference) backend for books.parsing.parse_listing
+SCRAPER_PARSER_BACKEND = os.environ.get("SCRAPER_PARSER_BACKEND", "lxml")
+# Pages per crawl_catalog subtask; 1 sends each page through the scrape_page pipeline
+SCRAPER_CATALOG_CHUNK_SIZE = int(os.environ.get("SCRAPER_CATALOG_CHUNK_SIZE", 1))
+# Redis holding state shared by every worker (throttle)
+SCRAPER_REDIS_URL = os.environ.get(
+    "SCRAPER_REDIS_URL", os.environ.get("REDIS_URL", "redis://redis:6379/0")
+)
+# Page loads per second across all workers, and how many may go back to back
+SCRAPER_RATE_LIMIT = float(os.environ.get("SCRAPER_RATE_LIMIT", 2))
+SCRAPER_RATE_BURST = int(os.environ.get("SCRAPER_RATE_BURST", 4))
+# AIMD limit on pages in flight across all workers: +INCREASE per window of
+# successful pages, *DECREASE on a block or timeout (once per COOLDOWN seconds)
+SCRAPER_CONCURRENCY_INITIAL = int(os.environ.get("SCRAPER_CONCURRENCY_INITIAL", 4))
+SCRAPER_CONCURRENCY_MIN = int(os.environ.get("SCRAPER_CONCURRENCY_MIN", 1))
+SCRAPER_CONCURRENCY_MAX = int(os.environ.get("SCRAPER_CONCURRENCY_MAX", 16))
+SCRAPER_AIMD_INCREASE = float(os.environ.get("SCRAPER_AIMD_INCREASE", 1))
+SCRAPER_AIMD_DECREASE = float(os.environ.get("SCRAPER_AIMD_DECREASE", 0.5))
+SCRAPER_AIMD_COOLDOWN = int(os.environ.get("SCRAPER_AIMD_COOLDOWN", 10))
+# Seconds before an in-flight slot of a dead worker is reclaimed
+SCRAPER_PAGE_LEASE_TIMEOUT = int(os.environ.get("SCRAPER_PAGE_LEASE_TIMEOUT", 120))
+# Seconds between checks while the concurrency limit is full
+SCRAPER_SLOT_POLL_INTERVAL = float(os.environ.get("SCRAPER_SLOT_POLL_INTERVAL", 0.5))
+# "hybrid": plain HTTP/2 with the browser's Cloudflare cookies, browser only
+# when a challenge shows up; "browser": every page in a browser tab
+SCRAPER_FETCH_MODE = os.environ.get("SCRAPER_FETCH_MODE", "hybrid")
+# Seconds a browser-solved session is shared before a browser solves a new one
+SCRAPER_SESSION_TTL = int(os.environ.get("SCRAPER_SESSION_TTL", 30 * 60))
+# Pooled HTTP/2 connections per process and per-request timeout (seconds)
+SCRAPER_HTTP_MAX_CONNECTIONS = int(os.environ.get("SCRAPER_HTTP_MAX_CONNECTIONS", 10))
+SCRAPER_HTTP_TIMEOUT = float(os.environ.get("SCRAPER_HTTP_TIMEOUT", 30))
+# Subresources browser tabs do not fetch (Playwright resource types, and hosts
+# with their subdomains); the scraper only reads the HTML
+SCRAPER_BLOCKED_RESOURCE_TYPES = [
+    name.strip()
+    for name in os.environ.get(
+        "SCRAPER_BLOCKED_RESOURCE_TYPES", "image,media,font"
+    ).split(",")
+    if name.strip()
+]
+SCRAPER_BLOCKED_DOMAINS = [
+    name.strip()
+    for name in os.environ.get(
+        "SCRAPER_BLOCKED_DOMAINS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,"
+        "googleadservices.com,facebook.net,facebook.com,hotjar.com,bing.com,"
+        "clarity.ms,tiktok.com,pinterest.com",
+    ).split(",")
+    if name.strip()
+]
+# Fetch the detail page of new or changed books (books.enrich)
+SCRAPER_ENRICH_DETAILS = os.environ.get("SCRAPER_ENRICH_DETAILS", "true").lower() == "true"
+# Detail pages in flight per enrich_books task, and queued ISBNs it takes at a time
+SCRAPER_ENRICH_CONCURRENCY = int(os.environ.get("SCRAPER_ENRICH_CONCURRENCY", 4))
+SCRAPER_ENRICH_BATCH_SIZE = int(os.environ.get("SCRAPER_ENRICH_BATCH_SIZE", 200))
+# A book whose detail page failed this many times is queued again only when
+# its listing title or URL changes
+SCRAPER_ENRICH_MAX_FAILURES = int(os.environ.get("SCRAPER_ENRICH_MAX_FAILURES", 3))
+# Fetched listing pages are kept here, zstd-compressed and deduplicated, for
+# manage.py reparse; empty disables the archive
+SCRAPER_ARCHIVE_DIR = os.environ.get("SCRAPER_ARCHIVE_DIR", str(BASE_DIR / "archive"))
+# zstd level for archived pages (1-22; higher is smaller and slower)
+SCRAPER_ARCHIVE_LEVEL = int(os.environ.get("SCRAPER_ARCHIVE_LEVEL", 3))
+# Archived pages older than this many days are pruned daily; 0 keeps them
+SCRAPER_ARCHIVE_RETENTION_DAYS = int(
+    os.environ.get("SCRAPER_ARCHIVE_RETENTION_DAYS", 30)
+)
+# Unreferenced archive files younger than this many seconds are kept: their
+# page may still be on its way to an ArchivedPage row
+SCRAPER_ARCHIVE_PRUNE_GRACE = int(
+    os.environ.get("SCRAPER_ARCHIVE_PRUNE_GRACE", 24 * 60 * 60)
+)
+# Seconds a Cloudflare challenge gets to clear (.grid-item to show up) before
+# the page counts as blocked; pages without one are classified at once
+SCRAPER_READY_TIMEOUT = int(os.environ.get("SCRAPER_READY_TIMEOUT", 30))
+# Seconds a scrape task's lock lives without a heartbeat
+SCRAPER_LOCK_TTL = int(os.environ.get("SCRAPER_LOCK_TTL", 300))
+# A catalog crawl's lock is held until its chord finishes, or this many seconds
+SCRAPER_CRAWL_LOCK_TTL = int(os.environ.get("SCRAPER_CRAWL_LOCK_TTL", 6 * 60 * 60))
+# Seconds a page's lock lives while its HTML or rows wait in the parse or
+# persist queue of the scrape_page pipeline, or (on top of
+# SCRAPER_PAGE_RETRY_DELAY) while its retry waits in the browser queue
+SCRAPER_PIPELINE_LOCK_TTL = int(os.environ.get("SCRAPER_PIPELINE_LOCK_TTL", 30 * 60))
+# A page (or crawl) done this recently is not scraped again
+SCRAPER_DEDUP_WINDOW = int(os.environ.get("SCRAPER_DEDUP_WINDOW", 10 * 60))
+SCRAPER_PAGE_MAX_RETRIES = int(os.environ.get("SCRAPER_PAGE_MAX_RETRIES", 3))
+SCRAPER_PAGE_RETRY_DELAY = int(os.environ.get("SCRAPER_PAGE_RETRY_DELAY", 30))
+# A crawl gives up (and its run fails) after this many pages in a row fail
+# every retry, e.g. while the site blocks us
+SCRAPER_MAX_FAILED_PAGES = int(os.environ.get("SCRAPER_MAX_FAILED_PAGES", 5))
+# Crawls until the first empty page stop (and fail) after this many pages
+SCRAPER_MAX_PAGES = int(os.environ.get("SCRAPER_MAX_PAGES", 5000))
+# Incremental crawls stop after this many consecutive pages with no changes
+SCRAPER_INCREMENTAL_UNCHANGED_PAGES = int(
+    os.environ.get("SCRAPER_INCREMENTAL_UNCHANGED_PAGES", 3)
+)
+# Book admin: tables above this many rows show an estimated total
+BOOKS_ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.environ.get("BOOKS_ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000)
+)
+# Book admin: also count the whole table when showing search results
+BOOKS_ADMIN_SHOW_FULL_RESULT_COUNT = (
+    os.environ.get("BOOKS_ADMIN_SHOW_FULL_RESULT_COUNT", "false").lower() == "true"
+)
+# Rows fetched per server-side cursor round trip (and per Parquet row group) in exports
+BOOKS_EXPORT_CHUNK_SIZE = int(os.environ.get("BOOKS_EXPORT_CHUNK_SIZE", 5000))
+# Rows buffered by books.writer.BookWriter before each bulk upsert
+BOOKS_WRITER_BATCH_SIZE = int(os.environ.get("BOOKS_WRITER_BATCH_SIZE", 1000))
 
 
 # Application definition
@@ -53,6 +238,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "rest_framework",
     # Local apps
@@ -62,6 +248,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En dışta: tüm istek süresini ve sorgularını ölçsün
+    "shared.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -21,8 +21,12 @@ from django.views.generic import TemplateView
 from django.conf.urls.static import static
 from django.conf import settings
 
+from shared.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/accounts/", include("accounts.urls")),
+    path("api/books/", include("books.urls")),
+    path("metrics", metrics_view, name="metrics"),
     re_path(r"^.*$", TemplateView.as_view(template_name="index.html")),
 ]
\ No newline at end of file
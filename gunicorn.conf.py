@@ -0,0 +1,13 @@
+# Prometheus multiprocess modu: her gunicorn worker'ı metriklerini
+# PROMETHEUS_MULTIPROC_DIR'e yazıyor, /metrics hepsini topluyor
+from prometheus_client import multiprocess
+
+from shared.metrics import reset_multiprocess_dir
+
+
+def on_starting(server):
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
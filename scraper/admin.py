@@ -1,3 +1,100 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.utils import timezone
+
+from .models import ArchivedPage, ScrapePageResult, ScrapeRun
+from .stats import crawl_stats
+
+DASHBOARD_WINDOWS = (("Last 24 hours", timedelta(days=1)), ("Last 7 days", timedelta(days=7)))
+
+
+@admin.register(ScrapeRun)
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "__str__",
+        "kind",
+        "status",
+        "started_at",
+        "duration",
+        "pages",
+        "books",
+        "changed",
+        "failed_page_count",
+        "pages_per_minute",
+    )
+    list_filter = ("kind", "status")
+    search_fields = ("task_id",)
+    readonly_fields = [field.name for field in ScrapeRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Liste üstünde throughput / hata oranı özeti
+        now = timezone.now()
+        extra_context = {
+            **(extra_context or {}),
+            "dashboard": [
+                (label, crawl_stats(now - window)) for label, window in DASHBOARD_WINDOWS
+            ],
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
+    @admin.display(description="Failed pages")
+    def failed_page_count(self, run):
+        return len(run.failed_pages)
+
+    @admin.display(description="Pages/min")
+    def pages_per_minute(self, run):
+        if not run.duration or not run.pages:
+            return None
+        return round(run.pages / (run.duration.total_seconds() / 60), 1)
+
+
+@admin.register(ScrapePageResult)
+class ScrapePageResultAdmin(admin.ModelAdmin):
+    list_display = (
+        "page_number",
+        "run",
+        "attempt",
+        "failure",
+        "navigation_ms",
+        "wait_ms",
+        "parse_ms",
+        "db_ms",
+        "requests",
+        "blocked_requests",
+        "bytes_received",
+        "books",
+        "changed",
+        "recorded_at",
+    )
+    list_filter = ("failure", "run__kind")
+    list_select_related = ("run",)
+    raw_id_fields = ("run",)
+    readonly_fields = [field.name for field in ScrapePageResult._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedPage)
+class ArchivedPageAdmin(admin.ModelAdmin):
+    list_display = (
+        "page_number",
+        "run",
+        "attempt",
+        "sha256",
+        "size",
+        "compressed_size",
+        "fetched_at",
+    )
+    list_filter = ("run__kind",)
+    list_select_related = ("run",)
+    search_fields = ("=sha256",)
+    raw_id_fields = ("run",)
+    readonly_fields = [field.name for field in ArchivedPage._meta.fields]
 
-# Register your models here.
+    def has_add_permission(self, request):
+        return False
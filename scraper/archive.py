@@ -0,0 +1,115 @@
+"""
+Content-addressed archive of fetched listing pages.
+
+Each page's HTML is stored once, zstd-compressed, under its sha256
+(``<dir>/ab/cd/abcd....html.zst``); ``ArchivedPage`` rows index which run
+saw which page with which content. ``manage.py reparse`` replays them
+through the current parser. Pages are archived only by crawls that record
+them under a run; ``manage.py prune_archive`` (also a daily beat task)
+drops rows older than ``SCRAPER_ARCHIVE_RETENTION_DAYS`` and every file no
+row references any more.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import zstandard
+from django.conf import settings
+
+from books.parsing import parse_listing
+
+_local = threading.local()
+
+
+def archive_enabled():
+    return bool(settings.SCRAPER_ARCHIVE_DIR)
+
+
+def archive_path(digest, root=None):
+    root = Path(root or settings.SCRAPER_ARCHIVE_DIR)
+    return root / digest[:2] / digest[2:4] / f"{digest}.html.zst"
+
+
+def _compressor():
+    # ZstdCompressor thread-safe değil; thread başına bir tane
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(
+            level=settings.SCRAPER_ARCHIVE_LEVEL
+        )
+    return compressor
+
+
+def store_html(html):
+    """
+    Archives ``html`` and returns ``(sha256, size, compressed_size)``.
+    Content already in the archive is not written again.
+    """
+    raw = html.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    path = archive_path(digest)
+    if path.exists():
+        try:
+            # Budama yeni görülen dosyayı (satırı henüz yazılmamışken) silmesin
+            os.utime(path)
+            return digest, len(raw), path.stat().st_size
+        except FileNotFoundError:
+            pass
+
+    compressed = _compressor().compress(raw)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Yarım yazılmış dosya görünmesin diye önce geçici dosyaya
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(compressed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return digest, len(raw), len(compressed)
+
+
+def remove_unreferenced(referenced, grace, root=None):
+    """
+    Deletes archived pages whose sha256 is not in ``referenced``, and
+    leftover temporary files, unless they were written (or stored again)
+    within the last ``grace`` seconds. Returns ``(files, bytes)`` removed.
+    """
+    root = Path(root or settings.SCRAPER_ARCHIVE_DIR)
+    cutoff = time.time() - grace
+    files = size = 0
+    for path in root.glob("*/*/*"):
+        name = path.name
+        if name.endswith(".html.zst"):
+            if name[: -len(".html.zst")] in referenced:
+                continue
+        elif not name.endswith(".tmp"):
+            continue
+        try:
+            stat = path.stat()
+            if stat.st_mtime >= cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        files += 1
+        size += stat.st_size
+    return files, size
+
+
+def read_html(digest, root=None):
+    with open(archive_path(digest, root), "rb") as f:
+        return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+
+def parse_archived(digest, root, backend):
+    """
+    ``parse_listing`` over an archived page. Module-level and free of the
+    ORM so ``reparse`` can run it in worker processes.
+    """
+    return parse_listing(read_html(digest, root), backend=backend)
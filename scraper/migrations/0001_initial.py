@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page_number', models.PositiveIntegerField()),
+                ('page_size', models.PositiveSmallIntegerField(default=20)),
+                ('fingerprint', models.CharField(max_length=64)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('page_size', 'page_number'), name='unique_page_fingerprint')],
+            },
+        ),
+    ]
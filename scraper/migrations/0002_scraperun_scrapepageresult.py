@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:11
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('catalog', 'Catalog'), ('range', 'Page range'), ('page', 'Single page'), ('incremental', 'Incremental')], max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('task_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('page_size', models.PositiveSmallIntegerField(default=20)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('books', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('failed_pages', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['-started_at'], name='scraper_scr_started_f70634_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScrapePageResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('attempt', models.PositiveSmallIntegerField(default=1)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('navigation_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('wait_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('parse_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('db_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('books', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('failure', models.CharField(blank=True, choices=[('blocked', 'Blocked (Cloudflare)'), ('timeout', 'Timeout'), ('parse_error', 'Parse error'), ('empty', 'Empty page'), ('error', 'Error')], max_length=20)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='page_results', to='scraper.scraperun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'page_number'], name='scraper_scr_run_id_5e9819_idx'), django.contrib.postgres.indexes.BrinIndex(fields=['recorded_at'], name='scraper_scr_recorde_d16cb3_brin')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_scraperun_scrapepageresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapepageresult',
+            name='blocked_requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapepageresult',
+            name='bytes_received',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapepageresult',
+            name='requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
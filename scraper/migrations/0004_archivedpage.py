@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:18
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0003_page_result_traffic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('attempt', models.PositiveSmallIntegerField(default=1)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveIntegerField()),
+                ('compressed_size', models.PositiveIntegerField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_pages', to='scraper.scraperun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'page_number'], name='scraper_arc_run_id_3c7159_idx'), django.contrib.postgres.indexes.BrinIndex(fields=['fetched_at'], name='scraper_arc_fetched_41659b_brin')],
+            },
+        ),
+    ]
@@ -1,3 +1,154 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from shared.models import TimestampedModel
+
+
+class PageFingerprint(TimestampedModel):
+    """
+    Hash of the (ISBN, price, stock) rows last seen on a listing page, used
+    by incremental crawls to tell unchanged pages apart without a DB diff.
+    """
+
+    page_number = models.PositiveIntegerField()
+    page_size = models.PositiveSmallIntegerField(default=20)
+    fingerprint = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["page_size", "page_number"], name="unique_page_fingerprint"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Page {self.page_number} (size {self.page_size})"
+
+
+class ScrapeRun(TimestampedModel):
+    """One crawl task (and for catalog crawls, its whole chord) with its totals."""
+
+    class Kind(models.TextChoices):
+        CATALOG = "catalog", "Catalog"
+        RANGE = "range", "Page range"
+        PAGE = "page", "Single page"
+        INCREMENTAL = "incremental", "Incremental"
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        FINISHED = "finished", "Finished"
+        FAILED = "failed", "Failed"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.RUNNING
+    )
+    task_id = models.CharField(max_length=255, blank=True, db_index=True)
+    page_size = models.PositiveSmallIntegerField(default=20)
+    page_count = models.PositiveIntegerField(blank=True, null=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    pages = models.PositiveIntegerField(default=0)
+    books = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    failed_pages = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [models.Index(fields=["-started_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} run #{self.pk}"
+
+    @property
+    def duration(self):
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def finish(self, summary, status=Status.FINISHED):
+        """Stores a crawl summary (``pages``, ``books``, ...) and closes the run."""
+        self.status = status
+        self.finished_at = timezone.now()
+        self.pages = summary.get("pages", 0)
+        self.books = summary.get("books", 0)
+        self.changed = summary.get("changed", 0)
+        self.failed_pages = summary.get("failed_pages", [])
+        if summary.get("page_count") is not None:
+            self.page_count = summary["page_count"]
+        self.save()
+
+
+class ScrapePageResult(models.Model):
+    """
+    One attempt at one listing page: where its time went (milliseconds per
+    stage) and how it ended.
+    """
+
+    class Failure(models.TextChoices):
+        BLOCKED = "blocked", "Blocked (Cloudflare)"
+        TIMEOUT = "timeout", "Timeout"
+        PARSE_ERROR = "parse_error", "Parse error"
+        EMPTY = "empty", "Empty page"
+        ERROR = "error", "Error"
+
+    run = models.ForeignKey(
+        ScrapeRun, on_delete=models.CASCADE, related_name="page_results"
+    )
+    page_number = models.PositiveIntegerField()
+    attempt = models.PositiveSmallIntegerField(default=1)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    navigation_ms = models.PositiveIntegerField(blank=True, null=True)
+    wait_ms = models.PositiveIntegerField(blank=True, null=True)
+    parse_ms = models.PositiveIntegerField(blank=True, null=True)
+    db_ms = models.PositiveIntegerField(blank=True, null=True)
+
+    # Tarayıcıda: sayfanın tüm istekleri (engellenenler dahil); HTTP'de 1
+    requests = models.PositiveIntegerField(default=0)
+    blocked_requests = models.PositiveIntegerField(default=0)
+    bytes_received = models.PositiveBigIntegerField(default=0)
+
+    books = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    # Boş: sayfa başarılı
+    failure = models.CharField(max_length=20, choices=Failure.choices, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["run", "page_number"]),
+            BrinIndex(fields=["recorded_at"]),
+        ]
+
+    def __str__(self):
+        return f"Page {self.page_number} of run #{self.run_id}"
+
+
+class ArchivedPage(models.Model):
+    """
+    A listing page as one run fetched it. The HTML itself is in the archive
+    under ``sha256`` (see ``scraper.archive``), shared by identical pages,
+    so ``manage.py reparse`` can replay the run without crawling again.
+    """
+
+    run = models.ForeignKey(
+        ScrapeRun, on_delete=models.CASCADE, related_name="archived_pages"
+    )
+    page_number = models.PositiveIntegerField()
+    attempt = models.PositiveSmallIntegerField(default=1)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveIntegerField()
+    compressed_size = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["run", "page_number"]),
+            BrinIndex(fields=["fetched_at"]),
+        ]
+
+    def __str__(self):
+        return f"Page {self.page_number} ({self.sha256[:12]})"
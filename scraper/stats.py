@@ -0,0 +1,50 @@
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ScrapePageResult, ScrapeRun
+
+STAGES = ("navigation", "wait", "parse", "db")
+
+
+def crawl_stats(since):
+    """
+    Page attempts recorded since ``since``: throughput, error rate, failures
+    per class, and average stage timings, requests and bytes of successful
+    pages.
+    """
+    results = ScrapePageResult.objects.filter(recorded_at__gte=since)
+    succeeded = Q(failure="")
+    stats = results.aggregate(
+        attempts=Count("id"),
+        succeeded=Count("id", filter=succeeded),
+        books=Coalesce(Sum("books"), 0),
+        changed=Coalesce(Sum("changed"), 0),
+        requests=Avg("requests", filter=succeeded),
+        blocked_requests=Avg("blocked_requests", filter=succeeded),
+        bytes_received=Avg("bytes_received", filter=succeeded),
+        **{
+            f"{stage}_ms": Avg(f"{stage}_ms", filter=succeeded)
+            for stage in STAGES
+        },
+    )
+
+    counts = dict(
+        results.exclude(failure="")
+        .values_list("failure")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    stats["failures"] = [
+        (label, counts.get(value, 0)) for value, label in ScrapePageResult.Failure.choices
+    ]
+    failed = stats["attempts"] - stats["succeeded"]
+    stats["error_rate"] = failed / stats["attempts"] if stats["attempts"] else None
+
+    # Çalışma süresi biten run'lardan; paralel run'lar ayrı ayrı sayılıyor
+    crawl_time = ScrapeRun.objects.filter(
+        finished_at__gte=since, started_at__gte=since
+    ).aggregate(total=Sum(F("finished_at") - F("started_at")))["total"]
+    minutes = crawl_time.total_seconds() / 60 if crawl_time else 0
+    stats["crawl_minutes"] = minutes
+    stats["pages_per_minute"] = stats["succeeded"] / minutes if minutes else None
+    return stats
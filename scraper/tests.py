@@ -1,3 +1,259 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from books.crawler import parse_page
+from scraper.archive import archive_path, read_html, store_html
+from scraper.models import ArchivedPage, PageFingerprint, ScrapePageResult, ScrapeRun
+from scraper.stats import crawl_stats
+from scraper.utils import (
+    PageTimer,
+    UnchangedPageTracker,
+    page_fingerprint,
+    prune_archive,
+    save_page_fingerprints,
+    stored_fingerprints,
+)
+
+LISTING = '<div class="grid-item"><div class="caption">ISBN: 9781111111111</div></div>'
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings = override_settings(SCRAPER_ARCHIVE_DIR=str(self.root))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def archive(self, html, run=None, days_ago=0, file_age=0):
+        digest, size, compressed_size = store_html(html)
+        if file_age:
+            then = time.time() - file_age
+            os.utime(archive_path(digest), (then, then))
+        if run is not None:
+            ArchivedPage.objects.create(
+                run=run,
+                page_number=1,
+                fetched_at=timezone.now() - timedelta(days=days_ago),
+                sha256=digest,
+                size=size,
+                compressed_size=compressed_size,
+            )
+        return digest
+
+    def files(self):
+        return sorted(path.name for path in self.root.glob("*/*/*"))
+
+
+class ArchiveTests(ArchiveTestCase):
+    def test_round_trip_and_dedup(self):
+        digest, size, _ = store_html("<p>é</p>")
+
+        self.assertEqual(store_html("<p>é</p>")[0], digest)
+        self.assertEqual(read_html(digest), "<p>é</p>")
+        self.assertEqual(size, len("<p>é</p>".encode()))
+        self.assertEqual(len(self.files()), 1)
+
+    def test_storing_again_refreshes_the_file(self):
+        digest = self.archive("<p>old</p>", file_age=3600)
+
+        store_html("<p>old</p>")
+
+        self.assertGreater(archive_path(digest).stat().st_mtime, time.time() - 60)
+
+    def test_parse_page_archives_only_when_asked(self):
+        timer = PageTimer(1)
+        parse_page(LISTING, timer)
+        self.assertIsNone(timer.archived)
+        self.assertEqual(self.files(), [])
+
+        parse_page(LISTING, timer, archive=True)
+        self.assertEqual(self.files(), [f"{timer.archived[0]}.html.zst"])
+
+
+class PruneArchiveTests(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.run = ScrapeRun.objects.create(kind=ScrapeRun.Kind.CATALOG)
+
+    def test_drops_expired_rows_and_their_files(self):
+        old = self.archive("<p>old</p>", self.run, days_ago=40, file_age=3600)
+        shared = self.archive("<p>shared</p>", self.run, days_ago=40, file_age=3600)
+        self.archive("<p>shared</p>", self.run)
+        kept = self.archive("<p>new</p>", self.run)
+
+        rows, files, size = prune_archive(retention_days=30, grace=60)
+
+        self.assertEqual((rows, files), (2, 1))
+        self.assertGreater(size, 0)
+        self.assertFalse(archive_path(old).exists())
+        self.assertTrue(archive_path(shared).exists())
+        self.assertTrue(archive_path(kept).exists())
+
+    def test_removes_files_of_deleted_runs(self):
+        digest = self.archive("<p>page</p>", self.run, file_age=3600)
+        self.run.delete()
+
+        rows, files, _ = prune_archive(retention_days=0, grace=60)
+
+        self.assertEqual((rows, files), (0, 1))
+        self.assertFalse(archive_path(digest).exists())
+
+    def test_keeps_unreferenced_files_within_the_grace_period(self):
+        digest = self.archive("<p>on its way</p>")
+
+        prune_archive(retention_days=30, grace=60)
+
+        self.assertTrue(archive_path(digest).exists())
+
+    def test_command(self):
+        self.archive("<p>orphan</p>", file_age=3600)
+
+        call_command("prune_archive", "--grace", "60", stdout=StringIO())
+
+        self.assertEqual(self.files(), [])
+
+
+class PageFingerprintTests(TestCase):
+    books = [
+        {"isbn": "9781111111111", "book_depot_price": "4.99", "stock": "12"},
+        {"isbn": "9782222222222", "book_depot_price": "6.49", "stock": "+100"},
+    ]
+
+    def test_covers_isbn_price_stock_and_order(self):
+        fingerprint = page_fingerprint(self.books)
+
+        copied = [dict(book) for book in self.books]
+        self.assertEqual(page_fingerprint(copied), fingerprint)
+        self.assertNotEqual(page_fingerprint(self.books[::-1]), fingerprint)
+        repriced = [{**self.books[0], "book_depot_price": "3.99"}, self.books[1]]
+        self.assertNotEqual(page_fingerprint(repriced), fingerprint)
+        restocked = [self.books[0], {**self.books[1], "stock": "5"}]
+        self.assertNotEqual(page_fingerprint(restocked), fingerprint)
+        # Başlık parmak izine girmiyor
+        retitled = [{**self.books[0], "title": "Other"}, self.books[1]]
+        self.assertEqual(page_fingerprint(retitled), fingerprint)
+
+    def test_save_upserts_per_page_size(self):
+        save_page_fingerprints(20, {1: "a", 2: "b"})
+        save_page_fingerprints(20, {2: "c"})
+        save_page_fingerprints(40, {1: "d"})
+
+        self.assertEqual(PageFingerprint.objects.count(), 3)
+        self.assertEqual(stored_fingerprints(20), {1: "a", 2: "c"})
+        self.assertEqual(stored_fingerprints(40), {1: "d"})
+
+
+class UnchangedPageTrackerTests(SimpleTestCase):
+    def test_stops_after_a_run_of_unchanged_pages(self):
+        tracker = UnchangedPageTracker(limit=3)
+
+        self.assertIsNone(tracker.mark(1, changed=0))
+        self.assertIsNone(tracker.mark(2, changed=4))
+        self.assertIsNone(tracker.mark(3, changed=0))
+        self.assertIsNone(tracker.mark(4, changed=0))
+        self.assertEqual(tracker.mark(5, changed=0), 5)
+
+    def test_pages_completing_out_of_order(self):
+        tracker = UnchangedPageTracker(limit=3)
+
+        self.assertIsNone(tracker.mark(4, changed=0))
+        self.assertIsNone(tracker.mark(2, changed=0))
+        self.assertIsNone(tracker.mark(6, changed=0))
+        # 2-3-4 tamamlanınca 4'ten sonra durulmalı, 6'dan değil
+        self.assertEqual(tracker.mark(3, changed=0), 4)
+
+
+class CrawlStatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.crawl_run = ScrapeRun.objects.create(
+            kind=ScrapeRun.Kind.CATALOG,
+            started_at=now - timedelta(minutes=10),
+            finished_at=now,
+            pages=3,
+        )
+        for page_number, navigation_ms in enumerate((100, 200, 300), start=1):
+            ScrapePageResult.objects.create(
+                run=cls.crawl_run,
+                page_number=page_number,
+                navigation_ms=navigation_ms,
+                requests=10,
+                blocked_requests=4,
+                bytes_received=2048,
+                books=20,
+                changed=2,
+            )
+        ScrapePageResult.objects.create(
+            run=cls.crawl_run, page_number=4, failure=ScrapePageResult.Failure.BLOCKED
+        )
+        # Pencerenin dışında
+        ScrapePageResult.objects.create(
+            run=cls.crawl_run,
+            page_number=5,
+            recorded_at=now - timedelta(days=2),
+            failure=ScrapePageResult.Failure.TIMEOUT,
+        )
+
+
+class CrawlStatsTests(CrawlStatsTestCase):
+    def test_window(self):
+        stats = crawl_stats(timezone.now() - timedelta(days=1))
+
+        self.assertEqual((stats["attempts"], stats["succeeded"]), (4, 3))
+        self.assertEqual(stats["error_rate"], 0.25)
+        self.assertEqual((stats["books"], stats["changed"]), (60, 6))
+        self.assertEqual(stats["navigation_ms"], 200)
+        self.assertEqual(stats["blocked_requests"], 4)
+        self.assertIsNone(stats["wait_ms"])
+        failures = dict(stats["failures"])
+        self.assertEqual(failures[ScrapePageResult.Failure.BLOCKED.label], 1)
+        self.assertEqual(failures[ScrapePageResult.Failure.TIMEOUT.label], 0)
+        self.assertAlmostEqual(stats["crawl_minutes"], 10, places=3)
+        self.assertAlmostEqual(stats["pages_per_minute"], 0.3, places=3)
+
+    def test_empty_window(self):
+        stats = crawl_stats(timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(stats["attempts"], 0)
+        self.assertIsNone(stats["error_rate"])
+        self.assertIsNone(stats["pages_per_minute"])
+
+
+# Manifest'i collectstatic üretiyor; testlerde yok
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class ScrapeRunAdminTests(CrawlStatsTestCase):
+    def test_changelist_shows_the_dashboard(self):
+        user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("admin:scraper_scraperun_changelist"))
+
+        self.assertEqual(response.status_code, 200)
+        labels = [label for label, _ in response.context["dashboard"]]
+        self.assertEqual(labels, ["Last 24 hours", "Last 7 days"])
+        self.assertContains(response, "Crawl health")
+        self.assertContains(response, "Blocked (Cloudflare): 1")
+        # Liste sütunu: 3 sayfa / 10 dakika
+        self.assertContains(response, "<td class=\"field-pages_per_minute\">0.3</td>")
@@ -0,0 +1,207 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from shared.metrics import observe_page
+
+from .archive import remove_unreferenced
+from .models import ArchivedPage, PageFingerprint, ScrapePageResult, ScrapeRun
+
+
+def page_fingerprint(books):
+    """sha256 of the page's (ISBN, price, stock) tuples, in page order."""
+    digest = hashlib.sha256()
+    for book in books:
+        digest.update(
+            f"{book['isbn']}|{book['book_depot_price']}|{book['stock']}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def stored_fingerprints(page_size):
+    """``{page_number: fingerprint}`` recorded by previous crawls."""
+    return dict(
+        PageFingerprint.objects.filter(page_size=page_size).values_list(
+            "page_number", "fingerprint"
+        )
+    )
+
+
+def save_page_fingerprints(page_size, fingerprints):
+    """Upserts ``{page_number: fingerprint}``; call only once the rows are saved."""
+    PageFingerprint.objects.bulk_create(
+        [
+            PageFingerprint(
+                page_number=page_number, page_size=page_size, fingerprint=fingerprint
+            )
+            for page_number, fingerprint in fingerprints.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["page_size", "page_number"],
+        update_fields=["fingerprint", "updated_at"],
+    )
+
+
+class UnchangedPageTracker:
+    """
+    Watches pages complete (in any order) and reports the first run of
+    ``limit`` consecutive page numbers that had no changed rows.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._unchanged = set()
+
+    def mark(self, page_number, changed):
+        """Returns the page to stop after once such a run exists, else ``None``."""
+        if changed:
+            return None
+        self._unchanged.add(page_number)
+
+        low = page_number
+        while low - 1 in self._unchanged:
+            low -= 1
+        high = page_number
+        while high + 1 in self._unchanged:
+            high += 1
+
+        if high - low + 1 >= self.limit:
+            return low + self.limit - 1
+        return None
+
+
+class PageTimer:
+    """
+    Collects one page attempt's stage timings and outcome, to be stored as
+    a ``ScrapePageResult``. ``with timer.stage("navigation"): ...`` records
+    the block's duration in milliseconds. ``archived`` is what
+    ``scraper.archive.store_html`` returned for the page's HTML, if stored.
+    """
+
+    STAGES = ("navigation", "wait", "parse", "db")
+
+    def __init__(self, page_number, attempt=1):
+        self.page_number = page_number
+        self.attempt = attempt
+        self.timings = {}
+        self.ready = False
+        self.requests = 0
+        self.blocked_requests = 0
+        self.bytes = 0
+        self.books = 0
+        self.changed = 0
+        self.failure = ""
+        self.archived = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = round((time.perf_counter() - started) * 1000)
+            self.timings[name] = self.timings.get(name, 0) + elapsed
+
+    def as_result(self, run_id):
+        return ScrapePageResult(
+            run_id=run_id,
+            page_number=self.page_number,
+            attempt=self.attempt,
+            requests=self.requests,
+            blocked_requests=self.blocked_requests,
+            bytes_received=self.bytes,
+            books=self.books,
+            changed=self.changed,
+            failure=self.failure,
+            **{f"{name}_ms": self.timings.get(name) for name in self.STAGES},
+        )
+
+    def as_dict(self):
+        """JSON-friendly state, for handing the timer to the next pipeline task."""
+        return {
+            name: getattr(self, name)
+            for name in (
+                "page_number",
+                "attempt",
+                "timings",
+                "ready",
+                "requests",
+                "blocked_requests",
+                "bytes",
+                "books",
+                "changed",
+                "failure",
+                "archived",
+            )
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        timer = cls(data["page_number"], data["attempt"])
+        for name, value in data.items():
+            setattr(timer, name, value)
+        return timer
+
+    def as_archived_page(self, run_id):
+        sha256, size, compressed_size = self.archived
+        return ArchivedPage(
+            run_id=run_id,
+            page_number=self.page_number,
+            attempt=self.attempt,
+            sha256=sha256,
+            size=size,
+            compressed_size=compressed_size,
+        )
+
+
+def save_page_results(run_id, timers):
+    """
+    Counts finished ``PageTimer``s in the metrics and stores them, with the
+    pages they archived, for a run.
+    """
+    for timer in timers:
+        observe_page(timer)
+    if run_id is None or not timers:
+        return
+    ScrapePageResult.objects.bulk_create([timer.as_result(run_id) for timer in timers])
+    ArchivedPage.objects.bulk_create(
+        [timer.as_archived_page(run_id) for timer in timers if timer.archived]
+    )
+
+
+def start_run(kind, task_id="", page_size=20, page_count=None):
+    return ScrapeRun.objects.create(
+        kind=kind, task_id=task_id or "", page_size=page_size, page_count=page_count
+    )
+
+
+def finish_run(run_id, summary, status=ScrapeRun.Status.FINISHED, kinds=None):
+    """Closes the run with ``summary`` (only if it is one of ``kinds``, if given)."""
+    run = ScrapeRun.objects.filter(pk=run_id).first()
+    if run is not None and (kinds is None or run.kind in kinds):
+        run.finish(summary, status=status)
+
+
+def prune_archive(retention_days=None, grace=None):
+    """
+    Deletes ``ArchivedPage`` rows older than ``retention_days`` (0 keeps
+    them) and then every archived file no row references, including those
+    of deleted runs. Returns ``(rows, files, bytes)`` removed.
+    """
+    if retention_days is None:
+        retention_days = settings.SCRAPER_ARCHIVE_RETENTION_DAYS
+    if grace is None:
+        grace = settings.SCRAPER_ARCHIVE_PRUNE_GRACE
+
+    rows = 0
+    if retention_days:
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        rows, _ = ArchivedPage.objects.filter(fetched_at__lt=cutoff).delete()
+
+    referenced = set(ArchivedPage.objects.values_list("sha256", flat=True).distinct())
+    files, size = remove_unreferenced(referenced, grace)
+    return rows, files, size
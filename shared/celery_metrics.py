@@ -0,0 +1,102 @@
+"""Celery signal handlers feeding the task metrics in ``shared.metrics``."""
+
+import os
+import time
+from datetime import datetime
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    task_revoked,
+    worker_init,
+    worker_process_shutdown,
+    worker_ready,
+)
+from prometheus_client import multiprocess, start_http_server
+
+from shared.metrics import (
+    celery_task_queue_wait,
+    celery_task_retries,
+    celery_task_runtime,
+    celery_tasks,
+    metrics_registry,
+    reset_multiprocess_dir,
+)
+
+_started = {}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    # Kuyrukta bekleme süresi için; worker'da task.request.published_at olarak okunuyor
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    now = time.time()
+    _started[task_id] = time.perf_counter()
+
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None:
+        return
+    # Tekrar denemelerde countdown bekleme sayılmıyor
+    eta = task.request.eta
+    if eta:
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        published_at = max(published_at, eta.timestamp())
+    celery_task_queue_wait.labels(task=task.name).observe(max(0.0, now - published_at))
+
+
+def _observe_runtime(task_id, name):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        celery_task_runtime.labels(task=name).observe(time.perf_counter() - started)
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    _observe_runtime(task_id, task.name)
+    celery_tasks.labels(task=task.name, state=state or "UNKNOWN").inc()
+
+
+@task_failure.connect
+def task_failed(sender=None, task_id=None, **kwargs):
+    # postrun'a ulaşmayan hatalarda da başlangıç kaydı kalmasın
+    _observe_runtime(task_id, sender.name)
+
+
+@task_revoked.connect
+def task_cancelled(sender=None, request=None, **kwargs):
+    # İptal edilen görevler için postrun gönderilmiyor
+    _started.pop(request.id, None)
+    celery_tasks.labels(task=sender.name, state="REVOKED").inc()
+
+
+@task_retry.connect
+def task_retried(sender=None, **kwargs):
+    celery_task_retries.labels(task=sender.name).inc()
+
+
+@worker_init.connect
+def clear_stale_metrics(**kwargs):
+    reset_multiprocess_dir()
+
+
+@worker_ready.connect
+def serve_worker_metrics(**kwargs):
+    # Worker'ların metrikleri web'in /metrics'inde görünmüyor; ayrı portta
+    port = int(os.environ.get("CELERY_METRICS_PORT", 0))
+    if port:
+        start_http_server(port, registry=metrics_registry())
+
+
+@worker_process_shutdown.connect
+def mark_worker_dead(pid=None, **kwargs):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,107 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from celery.result import AsyncResult
+from celery.utils import uuid
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "scraper:lock"
+
+# Anahtar boşsa sahibi yaz; her durumda güncel sahibi döner
+RESERVE = """
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return ARGV[1]
+end
+return owner
+"""
+
+# Yalnızca sahibiyse süreyi uzat (keep > 0) ya da sil
+EXPIRE_IF_OWNER = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[2]) > 0 then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+class TaskLock:
+    """
+    A Redis lock owned by a Celery task id.
+
+    ``reserve(owner)`` takes the lock if it is free and returns whoever
+    holds it, so a caller that gets a different id back knows which task to
+    join. The lock expires after ``ttl`` seconds unless renewed (see
+    ``heartbeat``), so a killed worker cannot hold it forever. ``release``
+    can keep the key for a while after the work is done, which makes the
+    same work a no-op for that window.
+    """
+
+    def __init__(self, name, ttl=None, client=None):
+        self.key = f"{KEY_PREFIX}:{name}"
+        self.ttl = ttl or settings.SCRAPER_LOCK_TTL
+        self.client = client or get_redis()
+        self._reserve = self.client.register_script(RESERVE)
+        self._expire_if_owner = self.client.register_script(EXPIRE_IF_OWNER)
+
+    def reserve(self, owner):
+        owner_id = self._reserve(keys=[self.key], args=[owner, self.ttl])
+        return owner_id.decode() if isinstance(owner_id, bytes) else owner_id
+
+    def renew(self, owner):
+        return bool(self._expire_if_owner(keys=[self.key], args=[owner, self.ttl]))
+
+    def release(self, owner, keep=0):
+        """Frees the lock, or keeps it ``keep`` more seconds as a dedup window."""
+        return bool(self._expire_if_owner(keys=[self.key], args=[owner, keep]))
+
+    @contextmanager
+    def heartbeat(self, owner):
+        """Renews the lock every ``ttl / 3`` seconds while the block runs."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.ttl / 3):
+                try:
+                    if not self.renew(owner):
+                        logger.warning("Lost lock %s held by %s", self.key, owner)
+                        return
+                except RedisError as e:
+                    logger.warning("Could not renew lock %s: %s", self.key, e)
+
+        thread = threading.Thread(target=beat, name=f"heartbeat:{self.key}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def enqueue_once(task, lock, args=(), kwargs=None):
+    """
+    Sends ``task`` unless ``lock`` is already held, and returns
+    ``(AsyncResult, created)``. The lock is reserved for the new task id
+    before it is sent; a duplicate request gets the running (or recently
+    finished) task's result instead.
+    """
+    task_id = uuid()
+    owner = lock.reserve(task_id)
+    if owner != task_id:
+        return AsyncResult(owner, app=task.app), False
+
+    try:
+        return task.apply_async(args, kwargs, task_id=task_id), True
+    except Exception:
+        lock.release(task_id)
+        raise
@@ -0,0 +1,157 @@
+"""
+Prometheus metrics for the web app, the database and the Celery workers.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set (see the Dockerfile), every gunicorn
+and Celery process writes its samples there and ``metrics_view`` serves
+the sum over all of them; gunicorn.conf.py cleans up after dead workers.
+Without it, metrics are per process, which is enough for runserver.
+"""
+
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Metrik dosyaları import anında açılıyor; klasör önceden var olmalı
+if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+TASK_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL pattern",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Database queries per request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+celery_task_runtime = Histogram(
+    "celery_task_runtime_seconds",
+    "Celery task run time",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+celery_task_queue_wait = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time between publishing (or the retry ETA) and a worker starting the task",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+celery_tasks = Counter(
+    "celery_tasks_total", "Finished Celery tasks", ["task", "state"]
+)
+celery_task_retries = Counter(
+    "celery_task_retries_total", "Celery task retries", ["task"]
+)
+
+scraper_pages = Counter(
+    "scraper_pages_total", "Listing page attempts by outcome", ["outcome"]
+)
+scraper_books = Counter("scraper_books_total", "Book rows scraped")
+scraper_books_changed = Counter(
+    "scraper_books_changed_total", "Scraped book rows that changed the catalog"
+)
+scraper_page_requests = Counter(
+    "scraper_page_requests_total",
+    "Requests made while loading listing pages",
+    ["result"],
+)
+scraper_page_bytes = Counter(
+    "scraper_page_bytes_total", "Bytes received while loading listing pages"
+)
+scraper_stage_duration = Histogram(
+    "scraper_page_stage_seconds",
+    "Time per listing page stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS + (30, 60),
+)
+
+
+def metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """
+    ``GET /metrics``; needs ``Authorization: Bearer <METRICS_TOKEN>``.
+    Without a token configured it is always forbidden.
+    """
+    token = settings.METRICS_TOKEN
+    given = request.headers.get("Authorization", "").encode()
+    if not token or not hmac.compare_digest(given, f"Bearer {token}".encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+def observe_page(timer):
+    """Counts one ``scraper.utils.PageTimer`` attempt."""
+    scraper_pages.labels(outcome=timer.failure or "ok").inc()
+    scraper_books.inc(timer.books)
+    scraper_books_changed.inc(timer.changed)
+    scraper_page_requests.labels(result="allowed").inc(
+        max(0, timer.requests - timer.blocked_requests)
+    )
+    scraper_page_requests.labels(result="blocked").inc(timer.blocked_requests)
+    scraper_page_bytes.inc(timer.bytes)
+    for stage, elapsed_ms in timer.timings.items():
+        scraper_stage_duration.labels(stage=stage).observe(elapsed_ms / 1000)
+
+
+class QueryTimer:
+    """``execute_wrapper`` that counts and times every query it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def reset_multiprocess_dir():
+    """
+    Empties ``PROMETHEUS_MULTIPROC_DIR`` before the first worker starts, so
+    samples of a previous run (same container, new processes) are dropped.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
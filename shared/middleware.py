@@ -0,0 +1,45 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from shared.metrics import (
+    QueryTimer,
+    http_request_db_duration,
+    http_request_db_queries,
+    http_request_duration,
+)
+
+
+class MetricsMiddleware:
+    """
+    Records each request's latency, query count and query time under its
+    URL pattern (``api/books/<str:isbn>/``, not the concrete path), so the
+    label set stays small.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = self.route(request)
+        http_request_duration.labels(
+            method=request.method, route=route, status=response.status_code
+        ).observe(elapsed)
+        http_request_db_queries.labels(route=route).observe(queries.count)
+        http_request_db_duration.labels(route=route).observe(queries.duration)
+        return response
+
+    def route(self, request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "<unresolved>"
+        return match.route or match.view_name
@@ -0,0 +1,42 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips ``SELECT COUNT(*)`` on big unfiltered tables.
+
+    For an unfiltered queryset on Postgres, the planner's row estimate
+    (``pg_class.reltuples``, refreshed by autovacuum/ANALYZE) is used once
+    it passes ``estimate_threshold``. Filtered querysets and small tables
+    are still counted exactly.
+    """
+
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
+
+    def estimated_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where:
+            return None
+
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table is first analyzed
+        return row[0] if row and row[0] >= 0 else None
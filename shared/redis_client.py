@@ -0,0 +1,26 @@
+import os
+import threading
+
+import redis
+from django.conf import settings
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Return this process's Redis client for coordination state shared by all
+    workers (rate limits, locks), creating it on first use.
+
+    Keyed by pid like the browser pool, so forked Celery workers do not
+    share the parent's connections.
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = redis.Redis.from_url(settings.SCRAPER_REDIS_URL)
+            _client_pid = os.getpid()
+        return _client
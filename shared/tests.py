@@ -0,0 +1,164 @@
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from shared import celery_metrics
+from shared.locks import TaskLock, enqueue_once
+from shared.metrics import metrics_view
+from shared.utils import clean_price_string, normalize_prices, parse_stock
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+class NormalizePricesTests(SimpleTestCase):
+    def test_formats(self):
+        prices, errors = normalize_prices(
+            [
+                "4.99",
+                "$4.99",
+                "C$ 12.50",
+                "CAD 7",
+                "$1,250.99",
+                "Was $9.99 Now $4.49",
+                "$.99",
+                "2.345",
+                4.99,
+            ]
+        )
+
+        self.assertEqual(
+            prices,
+            [
+                Decimal("4.99"),
+                Decimal("4.99"),
+                Decimal("12.50"),
+                Decimal("7.00"),
+                Decimal("1250.99"),
+                Decimal("4.49"),
+                Decimal("0.99"),
+                Decimal("2.35"),
+                Decimal("4.99"),
+            ],
+        )
+        self.assertEqual(errors, [False] * 9)
+
+    def test_unreadable_prices_are_flagged_not_zeroed(self):
+        prices, errors = normalize_prices(
+            [None, "", "Price not found", "free", "$9.99$4.99", "$100000000.00"]
+        )
+
+        self.assertEqual(prices, [None] * 6)
+        self.assertEqual(errors, [True] * 6)
+
+    def test_accepts_any_iterable(self):
+        prices, errors = normalize_prices(value for value in ("$1.00", "$1.00", "x"))
+
+        self.assertEqual(prices, [Decimal("1.00"), Decimal("1.00"), None])
+        self.assertEqual(errors, [False, False, True])
+
+    def test_clean_price_string_falls_back_to_zero(self):
+        self.assertEqual(clean_price_string("$3.10"), Decimal("3.10"))
+        self.assertEqual(clean_price_string("Price not found"), Decimal("0.00"))
+
+
+class ParseStockTests(SimpleTestCase):
+    def test_values(self):
+        self.assertEqual(parse_stock("12"), (12, False))
+        self.assertEqual(parse_stock("12+"), (12, True))
+        self.assertEqual(parse_stock(" +10000 "), (10000, True))
+        self.assertEqual(parse_stock(""), (None, False))
+        self.assertEqual(parse_stock(None), (None, False))
+        self.assertEqual(parse_stock("many"), (None, False))
+
+
+@unittest.skipUnless(fakeredis, "needs fakeredis")
+@override_settings(SCRAPER_LOCK_TTL=60)
+class TaskLockTests(SimpleTestCase):
+    def setUp(self):
+        self.client = fakeredis.FakeRedis()
+        self.lock = TaskLock("test", client=self.client)
+
+    def test_reserve_returns_the_holder(self):
+        self.assertEqual(self.lock.reserve("a"), "a")
+        self.assertEqual(self.lock.reserve("b"), "a")
+        self.assertEqual(self.client.ttl(self.lock.key), 60)
+
+    def test_only_the_owner_renews_or_releases(self):
+        self.lock.reserve("a")
+
+        self.assertFalse(self.lock.renew("b"))
+        self.assertFalse(self.lock.release("b"))
+        self.assertTrue(self.lock.renew("a"))
+        self.assertTrue(self.lock.release("a"))
+        self.assertEqual(self.lock.reserve("b"), "b")
+
+    def test_release_can_keep_a_dedup_window(self):
+        self.lock.reserve("a")
+
+        self.lock.release("a", keep=5)
+
+        self.assertEqual(self.lock.reserve("b"), "a")
+        self.assertLessEqual(self.client.ttl(self.lock.key), 5)
+
+    def test_enqueue_once(self):
+        task = mock.Mock()
+        task.apply_async.side_effect = lambda args, kwargs, task_id: task_id
+
+        first, created = enqueue_once(task, self.lock)
+        second, duplicate = enqueue_once(task, self.lock)
+
+        self.assertTrue(created)
+        self.assertFalse(duplicate)
+        self.assertEqual(second.id, first)
+        task.apply_async.assert_called_once()
+
+    def test_enqueue_once_frees_the_lock_if_sending_fails(self):
+        task = mock.Mock()
+        task.apply_async.side_effect = ConnectionError("broker down")
+
+        with self.assertRaises(ConnectionError):
+            enqueue_once(task, self.lock)
+
+        self.assertFalse(self.client.exists(self.lock.key))
+
+
+class MetricsViewTests(SimpleTestCase):
+    def get(self, **headers):
+        return metrics_view(RequestFactory().get("/metrics", headers=headers))
+
+    @override_settings(METRICS_TOKEN="")
+    def test_forbidden_without_a_configured_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(Authorization="Bearer ").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_needs_the_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(Authorization="Bearer wrong").status_code, 403)
+        self.assertEqual(self.get(Authorization="Bearer secret").status_code, 200)
+
+
+class CeleryMetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.task = mock.Mock(request=mock.Mock(published_at=None))
+        self.task.name = "books.tasks.fetch_page"
+        self.addCleanup(celery_metrics._started.clear)
+
+    def test_failed_task_is_forgotten(self):
+        celery_metrics.task_started(task_id="a", task=self.task)
+
+        celery_metrics.task_failed(sender=self.task, task_id="a")
+
+        self.assertNotIn("a", celery_metrics._started)
+
+    def test_revoked_task_is_forgotten(self):
+        celery_metrics.task_started(task_id="a", task=self.task)
+
+        celery_metrics.task_cancelled(sender=self.task, request=mock.Mock(id="a"))
+
+        self.assertNotIn("a", celery_metrics._started)
@@ -1,27 +1,99 @@
 # shared/utils.py
 import re
+from decimal import ROUND_HALF_UP, Decimal
+
+# "4.99", "1250", "1250.9": zaten temiz, regex'e gerek yok
+PLAIN_PRICE_RE = re.compile(r"\d+(?:\.\d{1,2})?")
+# Metin içindeki tutarlar; virgül yalnızca binlik ayracı olarak ("1,250.99")
+AMOUNT_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+")
+# İndirimli ürün metni: "Was $9.99 Now $4.99"
+NOW_RE = re.compile(r"\bnow\b", re.IGNORECASE)
+WAS_RE = re.compile(r"\bwas\b", re.IGNORECASE)
+
+CENT = Decimal("0.01")
+# numeric(10, 2) sınırı
+MAX_PRICE = Decimal("99999999.99")
+MISSING_PRICES = ("", "Price not found")
+
+
+def _parse_price(text):
+    """Tek bir fiyat metnini ``Decimal``'a çevirir; okunamazsa ``None``."""
+    text = text.strip()
+    if PLAIN_PRICE_RE.fullmatch(text):
+        return Decimal(text)
+
+    now = None
+    for now in NOW_RE.finditer(text):
+        pass
+    if now is not None:
+        text = text[now.end():]
+
+    amounts = AMOUNT_RE.findall(text)
+    if not amounts:
+        return None
+    if len(amounts) > 1 and not WAS_RE.search(text):
+        # "$9.99$4.99" gibi hangisinin geçerli olduğu belli olmayan metinler
+        return None
+    return Decimal(amounts[-1].replace(",", ""))
+
+
+def normalize_prices(values):
+    """
+    Ham fiyat metinlerini (liste ya da herhangi bir dizi) toplu olarak
+    ``Decimal``'a çevirir ve ``(fiyatlar, hatalar)`` döner.
+
+    ``$``, ``C$``, ``CAD`` gibi para birimi işaretleri ve "Was $9.99 Now
+    $4.99" metinleri desteklenir. Okunamayan, boş ya da ``numeric(10, 2)``
+    sınırını aşan değerler için fiyat ``None`` ve ``hatalar`` listesinde
+    ``True`` olur; yanlış bir fiyatla (örn. 0.00) değiştirilmez. Aynı metin
+    bir kez çözülür.
+    """
+    prices = []
+    errors = []
+    seen = {}
+    for value in values:
+        if value is None:
+            value = ""
+        elif not isinstance(value, str):
+            value = str(value)
+
+        if value in seen:
+            price = seen[value]
+        else:
+            price = None if value in MISSING_PRICES else _parse_price(value)
+            if price is not None:
+                price = price.quantize(CENT, rounding=ROUND_HALF_UP)
+                if price > MAX_PRICE:
+                    price = None
+            seen[value] = price
+
+        prices.append(price)
+        errors.append(price is None)
+    return prices, errors
 
 
 def clean_price_string(price_str):
     """
-    Fiyat string'ini (örn: '$1,250.99') DecimalField'a uygun float'a çevirir.
+    Fiyat string'ini (örn: '$1,250.99') DecimalField'a uygun ``Decimal``'a
+    çevirir. Okunamayan değerler için 0.00 döner; toplu yazımda hatayı ayırt
+    edebilmek için ``normalize_prices`` kullanın.
     """
-    if not price_str or price_str == "Price not found":
-        return 0.00
+    (price,), _ = normalize_prices([price_str])
+    return price if price is not None else Decimal("0.00")
 
-    # 1. Adım: Sadece sayıları ve noktayı tut (Dolar, virgül, boşlukları temizle)
-    # replace(',', '') ile binlik ayracı olan virgülü yok ediyoruz
-    clean_str = re.sub(r"[^\d.]", "", price_str.replace(",", ""))
 
-    try:
-        # 2. Adım: Sayıya çevir
-        price = float(clean_str)
+def parse_stock(stock_str):
+    """
+    Stok metnini (örn: '12', '12+', '+10000') ``(miktar, en_az_mi)`` ikilisine
+    çevirir. '+' işareti miktarın bir alt sınır olduğunu gösterir.
+    Okunamayan değerler için ``(None, False)`` döner.
+    """
+    if not stock_str:
+        return None, False
 
-        # 3. Adım: Postgres "Numeric Field Overflow" hatasını önlemek için
-        # Mantıksız büyüklükteki sayıları sınırla (Örn: 10 Milyon)
-        if price > 9999999.99:
-            return 9999999.99
+    stock_str = stock_str.strip()
+    digits = stock_str.strip("+")
+    if not digits.isdigit():
+        return None, False
 
-        return price
-    except (ValueError, TypeError):
-        return 0.00
+    return int(digits), "+" in stock_str